@@ -0,0 +1,150 @@
+# benchmarks/bench_allotment.py
+
+"""
+Benchmarks the /api/generate-allotment pipeline phase by phase.
+
+    python benchmarks/bench_allotment.py --scenario medium --repeat 5
+    python benchmarks/bench_allotment.py --students 50000 --rooms 300 --output run.json
+
+For every workload it reports the wall time of each phase (grouping,
+common-group merge, seating loop, room layout, response encoding), the peak
+Python memory of one full run and the size of the JSON response. The rooms
+and the body are built the way the server builds them: RoomLayouts over the
+seat IDs, encoded one room at a time by encode_allotment_response(). Results are
+written as JSON so two runs can be compared.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.workload import SCENARIOS, generate_payload  # noqa: E402
+from seating_app.engine import (  # noqa: E402
+    AllotmentPlan, encode_allotment_response, group_students_by_subject, merge_common_groups, normalize_allotment_input,
+    plan_rooms, room_layouts, seat_students, total_bench_count,
+)
+
+PHASES = ['grouping', 'common_group_merge', 'seating_loop', 'room_layout', 'encode']
+
+
+def run_phases(payload):
+    """Runs the allotment pipeline once. Returns (phase timings in seconds, response body bytes, seated benches)."""
+    timings = {}
+    room_configurations, students_per_bench, common_groups_str, combined_student_data, skipped_students_report = normalize_allotment_input(payload)
+
+    start = time.perf_counter()
+    initial_student_lists = group_students_by_subject(combined_student_data)
+    timings['grouping'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    final_student_lists = merge_common_groups(initial_student_lists, common_groups_str)
+    timings['common_group_merge'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    seated_benches, unseated = seat_students(final_student_lists, students_per_bench, total_bench_count(room_configurations))
+    timings['seating_loop'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    room_plans = plan_rooms(room_configurations, len(seated_benches))
+    list(room_layouts(room_plans, len(seated_benches)))
+    timings['room_layout'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    plan = AllotmentPlan(students_per_bench, skipped_students_report, initial_student_lists, final_student_lists,
+                         seated_benches, unseated, room_plans)
+    body = encode_allotment_response(plan)
+    timings['encode'] = time.perf_counter() - start
+
+    return timings, body, len(seated_benches)
+
+
+def peak_memory(payload):
+    tracemalloc.start()
+    try:
+        run_phases(payload)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(name, params, repeat):
+    payload = generate_payload(**params)
+    samples = {phase: [] for phase in PHASES}
+    totals = []
+    for _ in range(repeat):
+        timings, body, benches = run_phases(payload)
+        for phase in PHASES:
+            samples[phase].append(timings[phase])
+        totals.append(sum(timings.values()))
+
+    return {
+        'workload': name,
+        'params': params,
+        'repeat': repeat,
+        'phases': {phase: {'min_s': min(values), 'median_s': statistics.median(values)} for phase, values in samples.items()},
+        'total': {'min_s': min(totals), 'median_s': statistics.median(totals)},
+        'peak_memory_bytes': peak_memory(payload),
+        'output_bytes': len(body),
+        'seated_benches': benches,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help='Named workload; repeatable. Defaults to small and medium.')
+    parser.add_argument('--students', type=int, help='Custom workload: number of students.')
+    parser.add_argument('--rooms', type=int, help='Custom workload: number of rooms.')
+    parser.add_argument('--subjects', type=int, default=50, help='Custom workload: number of subject codes.')
+    parser.add_argument('--students-per-bench', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=os.path.join(ROOT, 'benchmarks', 'results.json'))
+    args = parser.parse_args(argv)
+
+    workloads = []
+    if args.students or args.rooms:
+        workloads.append(('custom', {'num_students': args.students or 10000, 'num_rooms': args.rooms or 100, 'num_subjects': args.subjects}))
+    for name in args.scenario or ([] if workloads else ['small', 'medium']):
+        workloads.append((name, dict(SCENARIOS[name])))
+    for _, params in workloads:
+        params.update(students_per_bench=args.students_per_bench, seed=args.seed)
+
+    results = []
+    for name, params in workloads:
+        result = benchmark(name, params, args.repeat)
+        results.append(result)
+        phases = '  '.join(f"{phase}={result['phases'][phase]['median_s'] * 1000:.1f}ms" for phase in PHASES)
+        print(f"{name:>8}: {phases}  total={result['total']['median_s'] * 1000:.1f}ms  "
+              f"peak={result['peak_memory_bytes'] / 2**20:.1f}MiB  output={result['output_bytes'] / 2**20:.2f}MiB")
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/bench_batch.py
+
+"""
+Compares allotting a season of sessions one by one with the batch process pool.
+
+    python benchmarks/bench_batch.py --sessions 24 --scenario medium --workers 8
+
+Every session gets its own seeded student mix over the same room catalogue.
+The serial run calls the engine in-process; the batch run goes through
+batch_allotment.run_sessions() with WORKER_PROCESSES set to --workers. The
+pool is started before timing, so the numbers exclude worker start-up.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from seating_app import batch_allotment  # noqa: E402
+from benchmarks.workload import SCENARIOS, generate_payload  # noqa: E402
+
+
+def season_jobs(num_sessions, params):
+    catalogue = generate_payload(**params)['roomConfigurations']
+    jobs = []
+    for index in range(num_sessions):
+        payload = generate_payload(**dict(params, seed=index))
+        payload['roomConfigurations'] = catalogue
+        jobs.append((f'session-{index + 1}', payload, None))
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=24)
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='medium')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    os.environ['WORKER_PROCESSES'] = str(args.workers)
+    jobs = season_jobs(args.sessions, dict(SCENARIOS[args.scenario]))
+
+    start = time.perf_counter()
+    for job in jobs:
+        batch_allotment.allot_session(job)
+    serial = time.perf_counter() - start
+
+    if args.workers > 1:
+        batch_allotment.run_sessions(jobs[:args.workers])
+    start = time.perf_counter()
+    results, errors = batch_allotment.run_sessions(jobs)
+    batched = time.perf_counter() - start
+
+    print(f'{args.sessions} x {args.scenario} sessions: serial={serial:.2f}s  batch({args.workers} workers)={batched:.2f}s  '
+          f'speedup={serial / batched:.2f}x  errors={len(errors)}')
+
+
+if __name__ == '__main__':
+    main()
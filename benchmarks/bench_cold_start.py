@@ -0,0 +1,103 @@
+# benchmarks/bench_cold_start.py
+
+"""
+Measures the cold start of the server: a fresh interpreter importing the app, building it and answering its first request.
+
+    python benchmarks/bench_cold_start.py --repeat 10
+    python benchmarks/bench_cold_start.py --target final_app:app --mode branches
+
+Every run is a new process, as a freshly booted (or re-forked) gunicorn
+worker would be. '--target' is 'module:attribute', either a Flask app or
+an app factory that is called with no arguments. For each phase (import,
+app creation, first request) the median and fastest of the runs are
+reported, with the wall time of the whole process, its peak RSS and the
+optional subsystems it had loaded by the end of the first request.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.workload import generate_payload  # noqa: E402
+
+# Modules a plain /api/generate-allotment request has no use for.
+OPTIONAL_MODULES = [f'seating_app.{name}' for name in [
+    'allotment_jobs', 'batch_allotment', 'capacity_planner', 'compact_format', 'incremental_allotment', 'multi_centre',
+    'paged_results', 'pdf_export', 'plan_store', 'plan_validation', 'roster_ingest', 'seat_optimizer', 'worker_pool',
+]] + ['numpy', 'openpyxl', 'msgpack', 'sqlite3', 'concurrent.futures.process']
+PHASES = ['import', 'create', 'first_request', 'process']
+
+# Runs in the fresh process: reads the payload from stdin, prints the timings as JSON.
+CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+module_name, attribute = sys.argv[2].split(':')
+payload = json.loads(sys.stdin.read())
+import importlib
+module = importlib.import_module(module_name)
+imported = time.perf_counter()
+target = getattr(module, attribute)
+app = target if hasattr(target, 'test_client') else target()
+created = time.perf_counter()
+response = app.test_client().post('/api/generate-allotment', json=payload)
+answered = time.perf_counter()
+if response.status_code != 200:
+    sys.exit(f'First request failed with {response.status_code}: {response.get_data(as_text=True)[:200]}')
+print(json.dumps({
+    'import': imported - started, 'create': created - imported, 'first_request': answered - created,
+    'rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'loaded': [name for name in json.loads(sys.argv[3]) if name in sys.modules],
+}))
+"""
+
+
+def branch_payload(branches=6, students=120):
+    return {
+        'roomConfigurations': [{'name': f'Room {101 + i}', 'benches': 40, 'classColumns': 4} for i in range(branches * students // 60)],
+        'branchDetails': [{'name': f'B{i}', 'prefix': f'1XX21B{i}', 'start': 1, 'end': students, 'skip': '7, 9'} for i in range(branches)],
+        'studentsPerBench': 2,
+        'commonPaperGroups': 'B0, B1',
+    }
+
+
+def run_once(target, payload):
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', CHILD, ROOT, target, json.dumps(OPTIONAL_MODULES)],
+                               input=payload, capture_output=True, text=True, cwd=ROOT)
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise SystemExit(completed.stderr.strip())
+    result = json.loads(completed.stdout)
+    result['process'] = elapsed
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--target', default='seating_app:create_app', help="'module:attribute' of the app or app factory")
+    parser.add_argument('--mode', choices=['subjects', 'branches'], default='subjects',
+                        help="first request with 'combinedStudentData' or with 'branchDetails'")
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    payload = json.dumps(generate_payload(1000, 10, 12) if args.mode == 'subjects' else branch_payload())
+    runs = [run_once(args.target, payload) for _ in range(args.repeat)]
+
+    print(f'{args.target} ({args.mode}), {args.repeat} fresh processes:')
+    for phase in PHASES:
+        times = [run[phase] * 1000 for run in runs]
+        print(f'  {phase:<14} median {statistics.median(times):7.1f} ms   min {min(times):7.1f} ms')
+    print(f'  peak RSS       median {statistics.median(run["rss_mib"] for run in runs):7.1f} MiB')
+    print(f'  optional modules loaded: {", ".join(runs[-1]["loaded"]) or "none"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_memory.py
+
+"""
+Measures the memory and time of one allotment, from grouped students to the encoded response.
+
+    python benchmarks/bench_memory.py --students 1000000 --rooms 5000 --subjects 2000
+
+The students are grouped before measuring (as a stored roster would be), so
+the numbers cover the engine and the JSON encoding only, not the request
+payload. 'plan' is the memory the computed plan holds; 'peak' is the
+highest traced memory from the start of the allotment to the encoded body.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from seating_app import engine  # noqa: E402
+from benchmarks.workload import generate_payload  # noqa: E402
+
+MIB = 2 ** 20
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--students', type=int, default=1000000)
+    parser.add_argument('--rooms', type=int, default=5000)
+    parser.add_argument('--subjects', type=int, default=2000)
+    parser.add_argument('--students-per-bench', type=int, default=2)
+    args = parser.parse_args(argv)
+
+    payload = generate_payload(args.students, args.rooms, args.subjects, students_per_bench=args.students_per_bench)
+    student_groups = engine.group_students_by_subject(payload.pop('combinedStudentData'))
+    gc.collect()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    plan = engine.compute_allotment(payload, student_groups)
+    computed = time.perf_counter()
+    plan_bytes = tracemalloc.get_traced_memory()[0]
+    body = engine.encode_allotment_response(plan)
+    encoded = time.perf_counter()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(f'{args.students} students, {len(plan.seated_benches)} benches, {len(plan.room_plans)} rooms: '
+          f'plan={plan_bytes / MIB:.1f} MiB  peak={peak / MIB:.1f} MiB  body={len(body) / MIB:.1f} MiB  '
+          f'compute={computed - start:.2f}s  encode={encoded - computed:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
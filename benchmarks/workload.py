@@ -0,0 +1,78 @@
+# benchmarks/workload.py
+
+"""
+Seeded generator for realistic /api/generate-allotment payloads.
+
+Subject sizes follow a Zipf-like distribution so a few subject codes hold
+most of the cohort, like a real exam session. Rooms are sized to hold the
+cohort with some slack, and a share of them carry a custom
+'benchesInColumns' split. The same arguments always give the same payload.
+"""
+
+import random
+
+SCENARIOS = {
+    'small': {'num_students': 1000, 'num_rooms': 10, 'num_subjects': 12},
+    'medium': {'num_students': 20000, 'num_rooms': 200, 'num_subjects': 120},
+    'large': {'num_students': 100000, 'num_rooms': 500, 'num_subjects': 400},
+    'xlarge': {'num_students': 200000, 'num_rooms': 1000, 'num_subjects': 800},
+}
+
+
+def subject_sizes(num_students, num_subjects, skew, rng):
+    """Splits num_students over num_subjects with Zipf weights; every subject keeps at least one student."""
+    weights = [1.0 / (rank ** skew) for rank in range(1, num_subjects + 1)]
+    rng.shuffle(weights)
+    total_weight = sum(weights)
+    sizes = [1] * num_subjects
+    remaining = num_students - num_subjects
+    for i, weight in enumerate(weights):
+        sizes[i] += int(remaining * weight / total_weight)
+    for i in range(num_students - sum(sizes)):
+        sizes[i % num_subjects] += 1
+    return sizes
+
+
+def generate_rooms(num_rooms, total_benches, custom_column_ratio, rng):
+    rooms = []
+    base = max(1, total_benches // num_rooms)
+    for index in range(num_rooms):
+        benches = max(1, base + rng.randint(-base // 4, base // 4))
+        class_columns = rng.randint(2, 5)
+        room = {'name': f'Room {101 + index}', 'benches': benches, 'classColumns': class_columns}
+        if rng.random() < custom_column_ratio and benches >= class_columns:
+            cuts = sorted(rng.sample(range(1, benches), class_columns - 1)) if class_columns > 1 else []
+            edges = [0] + cuts + [benches]
+            room['benchesInColumns'] = [edges[i + 1] - edges[i] for i in range(class_columns)]
+        rooms.append(room)
+    return rooms
+
+
+def generate_payload(num_students, num_rooms, num_subjects=50, students_per_bench=2, seed=0, skew=1.1,
+                     capacity_ratio=1.1, custom_column_ratio=0.3, common_group_count=3):
+    """Builds one request body for /api/generate-allotment."""
+    rng = random.Random(seed)
+    num_subjects = max(1, min(num_subjects, num_students))
+    subject_codes = [f'{rng.choice(["21", "22", "23"])}{rng.choice(["CS", "EC", "ME", "CV", "AI", "IS", "MA"])}{index:03}' for index in range(num_subjects)]
+    sizes = subject_sizes(num_students, num_subjects, skew, rng)
+
+    combined_student_data = []
+    serial = 0
+    for subject_code, size in zip(subject_codes, sizes):
+        branch = subject_code[2:4]
+        for _ in range(size):
+            serial += 1
+            combined_student_data.append({'usn': f'1XX{subject_code[:2]}{branch}{serial:06}', 'subjectCode': subject_code})
+    rng.shuffle(combined_student_data)
+
+    groups = []
+    for _ in range(min(common_group_count, num_subjects // 2)):
+        groups.append(','.join(rng.sample(subject_codes, 2)))
+
+    total_benches = int(num_students / students_per_bench * capacity_ratio) + 1
+    return {
+        'studentsPerBench': students_per_bench,
+        'commonPaperGroups': '; '.join(groups),
+        'roomConfigurations': generate_rooms(num_rooms, total_benches, custom_column_ratio, rng),
+        'combinedStudentData': combined_student_data,
+    }
@@ -0,0 +1,56 @@
+# seating_app/__init__.py
+
+"""
+The exam seating server and its engine.
+
+create_app() builds one Flask app for both front-ends. /api/generate-allotment
+takes either input mode and hands it to its adapter over the shared engine
+(engine.allot_groups):
+
+- subject-based ('combinedStudentData' or 'rosterId', index.html): subjects.py,
+  with the result cache, streaming, compact bodies and scoring;
+- range-based ('branchDetails', final_index.html): branches.py, with the
+  paged results.
+
+The rest of the package is plain Python with no Flask dependency: the
+engine (engine.py, usn_ranges.py), the subsystems behind the endpoints
+(batch, multi-centre, capacity, incremental, optimizer, validation, PDF,
+compact format, rosters, jobs, plans, paged results) and the process pool
+they share. Worker processes only import those, never Flask.
+
+Run it with gunicorn ('seating_app:create_app()', '--preload' to share the
+imports between workers) or 'python -m seating_app' for development.
+
+create_app() loads Flask, the blueprints and the engine only. Optional
+subsystems (PDF export, the job queue, plan store, roster parsing, batch and
+multi-centre allotment, the optimizer, validation and NumPy, compact
+encoders) are imported by the requests that use them, and the stores are
+created on first use, so a worker boots without them.
+"""
+
+EXPOSED_HEADERS = ['ETag', 'X-Cache', 'Content-Encoding', 'Server-Timing', 'X-Profile-Id']
+
+
+def create_app(config=None):
+    """
+    Builds the app. `config` updates app.config; besides Flask's own keys it
+    reads PLANS_DB, JOBS_DB, RESULTS_DB and PROFILES_DB (database paths),
+    PLANS_TOKEN (needed to publish and delete plans) and ALLOTMENT_PROFILING.
+    """
+    # Imported here, so that the engine modules can be imported without Flask.
+    from flask import Flask
+    from flask_cors import CORS
+
+    from seating_app import api, branches, monitoring, subjects
+    from seating_app.services import Services
+
+    app = Flask(__name__)
+    app.config.update(config or {})
+    CORS(app, expose_headers=EXPOSED_HEADERS)
+    app.extensions['seating'] = Services(app.config)
+
+    app.register_blueprint(monitoring.blueprint)
+    app.register_blueprint(api.blueprint)
+    app.register_blueprint(subjects.blueprint)
+    app.register_blueprint(branches.blueprint)
+    return app
@@ -0,0 +1,25 @@
+# seating_app/__main__.py
+
+"""
+Development server: python -m seating_app [--host 0.0.0.0] [--port 5000] [--debug]
+
+Production workers should load the factory instead, e.g.
+gunicorn --preload 'seating_app:create_app()'.
+"""
+
+import argparse
+
+from seating_app import create_app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m seating_app', description='Runs the exam seating server with the Flask development server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--debug', action='store_true', help='reloader, debugger and pretty-printed JSON')
+    args = parser.parse_args(argv)
+    create_app().run(host=args.host, port=args.port, debug=args.debug)
+
+
+if __name__ == '__main__':
+    main()
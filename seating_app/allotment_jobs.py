@@ -0,0 +1,270 @@
+# seating_app/allotment_jobs.py
+
+"""
+Asynchronous allotment jobs.
+
+POST /api/jobs stores the allotment payload in an SQLite queue and answers
+at once with a job ID, so no web worker is held for the length of a large
+allotment. A dispatcher thread claims queued jobs, at most one per pool
+worker at a time, and runs them on the shared process pool. The worker
+process reads the payload from the database and writes the encoded response
+back to it, so the web process never touches the students. Every server
+process (and `python -m seating_app.allotment_jobs`, run on its own) can
+claim any queued job; no broker is needed.
+
+Job states: queued -> running -> done | failed. A job whose worker process
+dies is queued again once; a job still running after RUNNING_TIMEOUT_SECONDS
+is marked failed. Once the queued and running jobs reach JOB_QUEUE_LIMIT,
+new submissions are refused with QueueFull. Finished jobs are deleted
+JOB_RESULT_TTL seconds after they finish.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from seating_app.roster_ingest import RosterStore
+from seating_app.engine import AllotmentError, compute_allotment, encode_allotment_response
+from seating_app.worker_pool import discard_pool, get_pool, worker_count
+
+QUEUE_LIMIT = int(os.environ.get('JOB_QUEUE_LIMIT') or 64)
+RESULT_TTL_SECONDS = int(os.environ.get('JOB_RESULT_TTL') or 60 * 60)
+RUNNING_TIMEOUT_SECONDS = 15 * 60
+MAX_ATTEMPTS = 2
+MAX_WAIT_SECONDS = 30
+# Suggested wait before resubmitting when the queue is full.
+RETRY_AFTER_SECONDS = 5
+POLL_INTERVAL_SECONDS = 0.5
+FINISHED_STATES = ('done', 'failed')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    payload TEXT,
+    result BLOB,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, created_at);
+"""
+
+
+class QueueFull(RuntimeError):
+    """Too many allotment jobs are queued or running."""
+
+
+def default_db_path():
+    return os.environ.get('JOBS_DB') or os.path.join(tempfile.gettempdir(), 'exam-allotment-jobs.sqlite3')
+
+
+class JobStore:
+    """The job queue and results in one SQLite database, shared by every process that opens it."""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_db_path()
+        self._local = threading.local()
+
+    def connection(self):
+        # sqlite3 connections stay in the thread that opened them.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        connection = self.connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def submit(self, payload_json):
+        """Queues a job for an allotment payload (JSON text). Returns its ID. Raises QueueFull."""
+        now = time.time()
+        with self.transaction() as connection:
+            self._expire(connection, now)
+            pending = connection.execute("SELECT COUNT(*) FROM jobs WHERE state IN ('queued', 'running')").fetchone()[0]
+            if pending >= QUEUE_LIMIT:
+                raise QueueFull(f'The allotment queue is full ({pending} jobs). Please try again shortly.')
+            job_id = uuid.uuid4().hex
+            connection.execute('INSERT INTO jobs (id, state, payload, created_at) VALUES (?, ?, ?, ?)',
+                               (job_id, 'queued', payload_json, now))
+        return job_id
+
+    def claim(self, limit):
+        """Marks up to `limit` of the oldest queued jobs as running. Returns their IDs."""
+        with self.transaction() as connection:
+            job_ids = [row[0] for row in connection.execute(
+                "SELECT id FROM jobs WHERE state = 'queued' ORDER BY created_at LIMIT ?", (limit,))]
+            connection.executemany("UPDATE jobs SET state = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                                   [(time.time(), job_id) for job_id in job_ids])
+        return job_ids
+
+    def payload(self, job_id):
+        row = self.connection().execute('SELECT payload FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return row and row[0]
+
+    def finish(self, job_id, result=None, error=None):
+        """Stores the outcome of a running job; the payload is dropped."""
+        self.connection().execute(
+            "UPDATE jobs SET state = ?, result = ?, error = ?, payload = NULL, finished_at = ? WHERE id = ? AND state = 'running'",
+            ('failed' if error is not None else 'done', result, error, time.time(), job_id))
+
+    def retry(self, job_id, error):
+        """Queues a job whose worker died again, or fails it after MAX_ATTEMPTS."""
+        with self.transaction() as connection:
+            row = connection.execute("SELECT attempts FROM jobs WHERE id = ? AND state = 'running'", (job_id,)).fetchone()
+            if row is None:
+                return
+            if row[0] < MAX_ATTEMPTS:
+                connection.execute("UPDATE jobs SET state = 'queued', started_at = NULL WHERE id = ?", (job_id,))
+            else:
+                connection.execute("UPDATE jobs SET state = 'failed', error = ?, payload = NULL, finished_at = ? WHERE id = ?",
+                                   (error, time.time(), job_id))
+
+    def status(self, job_id):
+        """The job's state and timings (no result), or None for an unknown ID."""
+        row = self.connection().execute(
+            'SELECT state, error, attempts, created_at, started_at, finished_at FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        state, error, attempts, created_at, started_at, finished_at = row
+        status = {'job_id': job_id, 'state': state, 'attempts': attempts, 'created_at': created_at}
+        if state == 'queued':
+            status['queue_position'] = self.connection().execute(
+                "SELECT COUNT(*) FROM jobs WHERE state = 'queued' AND created_at <= ?", (created_at,)).fetchone()[0]
+        if started_at is not None:
+            status['queued_seconds'] = round(started_at - created_at, 3)
+        if finished_at is not None:
+            status['run_seconds'] = round(finished_at - (started_at or finished_at), 3)
+        if error is not None:
+            status['error'] = error
+        return status
+
+    def result(self, job_id):
+        """(state, encoded response, error) of a job, or None for an unknown ID."""
+        return self.connection().execute('SELECT state, result, error FROM jobs WHERE id = ?', (job_id,)).fetchone()
+
+    def counts(self):
+        """Number of jobs in each state."""
+        return dict(self.connection().execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+
+    def _expire(self, connection, now):
+        connection.execute("UPDATE jobs SET state = 'failed', error = ?, payload = NULL, finished_at = ? "
+                           "WHERE state = 'running' AND started_at < ?",
+                           ('The allotment did not finish in time.', now, now - RUNNING_TIMEOUT_SECONDS))
+        connection.execute('DELETE FROM jobs WHERE finished_at < ?', (now - RESULT_TTL_SECONDS,))
+
+    def wait(self, job_id, timeout):
+        """Polls until the job has finished or `timeout` seconds have passed. Returns its status."""
+        deadline = time.monotonic() + min(max(timeout, 0), MAX_WAIT_SECONDS)
+        interval = 0.05
+        while True:
+            status = self.status(job_id)
+            if status is None or status['state'] in FINISHED_STATES or time.monotonic() >= deadline:
+                return status
+            time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+            interval = min(interval * 2, POLL_INTERVAL_SECONDS)
+
+
+def run_job(db_path, job_id):
+    """Worker-process entry point: runs one claimed job and stores its response or error."""
+    store = JobStore(db_path)
+    payload = store.payload(job_id)
+    if payload is None:
+        return
+    try:
+        data = json.loads(payload)
+        student_groups = None
+        if isinstance(data, dict) and not data.get('combinedStudentData') and data.get('rosterId'):
+            student_groups = RosterStore().load_groups(str(data['rosterId']))
+            if student_groups is None:
+                raise AllotmentError(f"Unknown roster ID '{data['rosterId']}'. Please upload the roster again.")
+        # Byte for byte what /api/generate-allotment answers.
+        store.finish(job_id, result=encode_allotment_response(compute_allotment(data, student_groups)))
+    except AllotmentError as e:
+        store.finish(job_id, error=str(e))
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        store.finish(job_id, error=f'Invalid allotment data: {e}')
+
+
+class JobDispatcher:
+    """Feeds queued jobs to the process pool, keeping at most one job per pool worker in flight."""
+
+    def __init__(self, store):
+        self.store = store
+        # Job IDs handed to the pool; the dispatcher thread adds them, future callbacks remove them.
+        self.in_flight = set()
+        self.in_flight_lock = threading.Lock()
+        self.wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Starts the dispatcher thread of this process, once."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run_forever, name='allotment-jobs', daemon=True)
+                self._thread.start()
+
+    def run_forever(self):
+        while True:
+            try:
+                self.dispatch()
+            except sqlite3.Error:
+                # The database is busy or briefly unavailable; the queue is still there next round.
+                pass
+            self.wake.wait(POLL_INTERVAL_SECONDS)
+            self.wake.clear()
+
+    def dispatch(self):
+        with self.in_flight_lock:
+            free = worker_count() - len(self.in_flight)
+        if free <= 0:
+            return
+        for job_id in self.store.claim(free):
+            with self.in_flight_lock:
+                self.in_flight.add(job_id)
+            pool = get_pool()
+            try:
+                future = pool.submit(run_job, self.store.db_path, job_id)
+            except RuntimeError:
+                # Broken, or shut down since by another caller that found it broken.
+                self.job_done(job_id, pool, None)
+                continue
+            future.add_done_callback(lambda future, job_id=job_id, pool=pool: self.job_done(job_id, pool, future))
+
+    def job_done(self, job_id, pool, future):
+        """Called once per claimed job, with the pool it ran on and its future (None if it never started)."""
+        with self.in_flight_lock:
+            self.in_flight.discard(job_id)
+        lost = future is None or future.cancelled()
+        if lost or future.exception() is not None:
+            if lost or isinstance(future.exception(), BrokenProcessPool):
+                discard_pool(pool)
+            self.store.retry(job_id, 'The allotment worker stopped unexpectedly.')
+        self.wake.set()
+
+if __name__ == '__main__':
+    # A standalone job runner (python -m seating_app.allotment_jobs), for running the allotments on
+    # another machine or next to the web server. The classes come from the package module, so the
+    # pool workers unpickle run_job from seating_app.allotment_jobs rather than from __main__.
+    from seating_app import allotment_jobs
+    allotment_jobs.JobDispatcher(allotment_jobs.JobStore()).run_forever()
@@ -0,0 +1,182 @@
+# seating_app/api.py
+
+"""
+Endpoints shared by both input modes: the allotment itself, which hands
+the payload to its adapter (subjects.py or branches.py), and the ones that
+work on an allotment response whichever mode produced it (PDF export,
+validation, published plans and the seat lookup).
+"""
+
+import hashlib
+import hmac
+
+from flask import Blueprint, current_app, g, jsonify, request
+
+from seating_app.branches import generate_branch_allotment, is_branch_payload, stored_result
+from seating_app.services import SEAT_CACHE_SECONDS, services
+from seating_app.subjects import generate_subject_allotment
+
+blueprint = Blueprint('api', __name__)
+
+
+@blueprint.route('/api/generate-allotment', methods=['POST'])
+def generate_allotment_api():
+    """
+    Final, most advanced API.
+    - Automates layout creation based on a single 'studentsPerBench' number.
+    - Uses the (A, B, A, B...) pattern for separation.
+    - Implements "sticky pairing" to ensure columnar consistency.
+    - Handles "Common Paper Groups" by merging them first.
+    - Gracefully handles a single branch input.
+    - Supports a specific per-column bench distribution via 'benchesInColumns'.
+    - MODIFIED: Processes a combined list of student USNs and their subject codes, allowing for manual and file inputs.
+    - MODIFIED: Groups students by subject code for seating, not by branch/USN prefix.
+    - MODIFIED: The allotment itself lives in engine.py (cursor/heap based, same output).
+    - MODIFIED: Repeat submissions are served from a content-addressed cache, with an ETag
+      and a 304 answer to a matching 'If-None-Match'.
+    - MODIFIED: Optional NDJSON streaming: a header record, one record per room as it is laid out,
+      then a trailer with the unseated students.
+    - MODIFIED: Optional compact columnar body ('?format=compact') with a USN string table,
+      as JSON or MessagePack, gzip/zstd compressed when the client accepts it.
+    - MODIFIED: 'rosterId' (from /api/rosters) can replace 'combinedStudentData'.
+    - MODIFIED: '?score=1' adds a 'validation' report of same-paper neighbours (see /api/validate-allotment).
+    - MODIFIED: Optional 'optimize': {'timeBudgetMs': ...} improves the greedy plan by local search
+      (fewer same-paper neighbours, empty seats and unseated students) and reports its metrics.
+    - MODIFIED: Per-phase durations in a 'Server-Timing' header; latency, size and cache metrics at /metrics.
+    - MODIFIED: Seats are held as integer student IDs (engine.SeatMatrix); the JSON body is
+      built and encoded one room at a time.
+    - MODIFIED: Also takes the range-based 'branchDetails' payload of final_index.html, with its
+      '?view=paged' summary (see branches.py); both modes share the seating engine.
+    """
+    with g.timer.phase('parse'):
+        data = request.get_json()
+    services().request_bytes.observe(len(request.get_data()))
+    if is_branch_payload(data):
+        return generate_branch_allotment(data)
+    return generate_subject_allotment(data)
+
+
+@blueprint.route('/api/export-pdf', methods=['POST'])
+def export_pdf_api():
+    """
+    Server-side PDF export of an allotment result, laid out like the browser's jsPDF export.
+    Body: {'report': 'room-layouts' | 'summary', 'result': <allotment response>, 'branchDetails': [...]};
+    'resultId' (from '?view=paged') can replace 'result'.
+    Rooms are rendered on the worker pool and the document is streamed back as it is written.
+    """
+    from seating_app.pdf_export import PDF_MIMETYPE, PdfExportError, export_pdf
+    data = request.get_json()
+    if isinstance(data, dict) and not data.get('result') and data.get('resultId'):
+        result, error = stored_result(str(data['resultId']))
+        if error:
+            return error
+        data = dict(data, result=result.full_response())
+    try:
+        chunks, filename = export_pdf(data)
+    except PdfExportError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    return current_app.response_class(chunks, mimetype=PDF_MIMETYPE, headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
+@blueprint.route('/api/validate-allotment', methods=['POST'])
+def validate_allotment_api():
+    """
+    Counts same-paper neighbours (front/back, side, diagonal) in an allotment result.
+    Body: {'result': <allotment response>, 'commonPaperGroups': '...'}; without a
+    'group_map' (range-based results) students are grouped by USN prefix (branch).
+    Returns the totals, a 0..1 'score' and the counts per room.
+    """
+    from seating_app.plan_validation import ValidationUnavailable, validate_response
+    data = request.get_json()
+    if not isinstance(data, dict) or not isinstance(data.get('result'), dict):
+        return jsonify({'status': 'error', 'message': "Send the allotment response to validate as 'result'."}), 400
+    try:
+        report = validate_response(data['result'], data.get('commonPaperGroups', ''))
+    except ValidationUnavailable as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 501
+    except (KeyError, TypeError, AttributeError) as e:
+        return jsonify({'status': 'error', 'message': f'The allotment result is incomplete or malformed: {e}'}), 400
+    return jsonify(dict(report, status='success'))
+
+
+def plans_token_error():
+    """The error response for a publish or delete without the PLANS_TOKEN, else None."""
+    token = services().plans_token
+    if not token:
+        return jsonify({'status': 'error', 'message': 'Publishing plans is disabled on this server (no PLANS_TOKEN is set).'}), 403
+    sent = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(sent.encode(), f'Bearer {token}'.encode()):
+        return jsonify({'status': 'error', 'message': "Send the publishing token as 'Authorization: Bearer <token>'."}), 401
+    return None
+
+
+@blueprint.route('/api/plans', methods=['POST'])
+def publish_plan_api():
+    """
+    Publishes an allotment for the seat lookup.
+    Body: {'result': <allotment response>, 'name': 'May 2025, 10 AM session'}.
+    Every seated USN gets a row (room, column, bench, seat) in the indexed plan store.
+    Needs the header 'Authorization: Bearer <PLANS_TOKEN>'.
+    """
+    from seating_app.plan_store import PlanStoreError
+    error = plans_token_error()
+    if error:
+        return error
+    state = services()
+    data = request.get_json()
+    if not isinstance(data, dict) or not isinstance(data.get('result'), dict):
+        return jsonify({'status': 'error', 'message': "Send the allotment response to publish as 'result'."}), 400
+    try:
+        plan = state.plan_store.publish(data['result'], data.get('name'))
+    except PlanStoreError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    return jsonify(dict(plan, status='success')), 201
+
+
+@blueprint.route('/api/plans', methods=['GET'])
+def list_plans_api():
+    return jsonify({'status': 'success', 'plans': services().plan_store.plans()})
+
+
+@blueprint.route('/api/plans/<plan_id>', methods=['DELETE'])
+def delete_plan_api(plan_id):
+    error = plans_token_error()
+    if error:
+        return error
+    if not services().plan_store.delete(plan_id):
+        return jsonify({'status': 'error', 'message': f"Unknown plan ID '{plan_id}'."}), 404
+    return jsonify({'status': 'success', 'plan_id': plan_id})
+
+
+@blueprint.route('/api/seats/<usn>', methods=['GET'])
+def seat_lookup_api(usn):
+    """
+    "Where do I sit?": the room, column, bench and seat of a USN in every published plan,
+    newest first, or only in the plan given as '?plan=<plan_id>'. Read-only and cacheable.
+    """
+    state = services()
+    usn = usn.strip().upper()
+    plan_id = request.args.get('plan', '')
+    # Keyed on the store's revision, so a plan published or deleted by any worker ends the cached answers.
+    key = f'{state.plan_store.revision()}/{plan_id}/{usn}'
+    body = state.seat_cache.get(key)
+    if body is not None:
+        state.seat_lookups.inc(result='cache_hit')
+    else:
+        seats = state.plan_store.lookup(usn, plan_id)
+        if not seats:
+            state.seat_lookups.inc(result='not_found')
+            return jsonify({'status': 'error', 'message': f'No seat found for {usn}.'}), 404
+        state.seat_lookups.inc(result='found')
+        body = jsonify({'status': 'success', 'usn': usn, 'seats': seats}).get_data()
+        state.seat_cache.put(key, body)
+
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = SEAT_CACHE_SECONDS
+    return response
@@ -0,0 +1,119 @@
+# seating_app/batch_allotment.py
+
+"""
+Allots a whole exam season (many sessions over one room catalogue) in one call.
+
+A batch request carries the shared 'roomConfigurations' (and optionally a
+default 'studentsPerBench') once, plus a list of sessions:
+
+    {
+      "roomConfigurations": [...],
+      "studentsPerBench": 2,
+      "sessions": [
+        {"sessionId": "2024-05-10 AM", "combinedStudentData": [...], "commonPaperGroups": "..."},
+        {"sessionId": "2024-05-10 PM", "rosterId": "...", "rooms": ["Room 101", "Room 102"]},
+        ...
+      ]
+    }
+
+Each session is an ordinary /api/generate-allotment payload without the
+rooms; 'rooms' optionally picks (and orders) a subset of the catalogue by
+name. Sessions are independent, so they are computed in a process pool,
+one session per task. A session that fails, even because its worker
+process died, reports its error under its ID and does not affect the
+others.
+
+Workers send back each session's response already encoded as JSON, and the
+batch body is spliced together from those pieces, so the parent process
+does no per-student work.
+"""
+
+import json
+
+from seating_app.engine import AllotmentError, generate_allotment
+from seating_app.worker_pool import WORKER_LOST_MESSAGE, map_items
+
+MAX_BATCH_SESSIONS = 100
+
+
+def parse_batch(data):
+    """
+    Validates a batch request and splits it into sessions.
+    Returns a list of (session_id, payload, error); payload is a complete
+    allotment request, or None when the session itself is malformed.
+    Raises AllotmentError when the batch as a whole is unusable.
+    """
+    if not isinstance(data, dict):
+        raise AllotmentError('Invalid or missing root input data.')
+    sessions = data.get('sessions')
+    catalogue = data.get('roomConfigurations')
+    if not isinstance(sessions, list) or not sessions:
+        raise AllotmentError("No sessions provided. Send a non-empty 'sessions' list.")
+    if len(sessions) > MAX_BATCH_SESSIONS:
+        raise AllotmentError(f'Too many sessions in one batch ({len(sessions)}); the limit is {MAX_BATCH_SESSIONS}.')
+    if not isinstance(catalogue, list) or not catalogue:
+        raise AllotmentError('You must define at least one room.')
+    rooms_by_name = {}
+    for room in catalogue:
+        rooms_by_name.setdefault(str(room.get('name', '')).strip() if isinstance(room, dict) else '', room)
+
+    parsed = []
+    seen = set()
+    for index, session in enumerate(sessions):
+        if not isinstance(session, dict):
+            raise AllotmentError(f'Session {index + 1} is not an object.')
+        session_id = str(session.get('sessionId') or f'session-{index + 1}').strip()
+        if session_id in seen:
+            raise AllotmentError(f"Duplicate session ID '{session_id}'.")
+        seen.add(session_id)
+
+        payload = {key: value for key, value in session.items() if key not in ('sessionId', 'rooms')}
+        payload.setdefault('studentsPerBench', data.get('studentsPerBench'))
+        payload['roomConfigurations'] = catalogue
+        error = None
+        if session.get('rooms'):
+            names = [str(name).strip() for name in session['rooms']]
+            missing = [name for name in names if name not in rooms_by_name]
+            if missing:
+                error = f"Unknown room(s) for this session: {', '.join(missing)}"
+            payload['roomConfigurations'] = [rooms_by_name[name] for name in names if name in rooms_by_name]
+        parsed.append((session_id, None if error else payload, error))
+    return parsed
+
+
+def encode_json(obj):
+    """Same encoding as Flask's jsonify() outside debug mode."""
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'))
+
+
+def allot_session(job):
+    """Worker entry point: (session_id, payload, student_groups) -> (session_id, response JSON, error)."""
+    session_id, payload, student_groups = job
+    try:
+        return session_id, encode_json(generate_allotment(payload, student_groups)), None
+    except AllotmentError as e:
+        return session_id, None, str(e)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return session_id, None, f'Invalid session data: {e}'
+
+
+def run_sessions(jobs):
+    """
+    Allots every (session_id, payload, student_groups) job.
+    Returns ({session_id: response JSON}, {session_id: error message}).
+    """
+    results, errors = {}, {}
+    for session_id, response, error in map_items(allot_session, jobs, lambda job: (job[0], None, WORKER_LOST_MESSAGE)):
+        if error is None:
+            results[session_id] = response
+        else:
+            errors[session_id] = error
+    return results, errors
+
+
+def batch_response_body(session_order, results, errors):
+    """The batch response as JSON bytes; 'results' holds the per-session response JSON as is."""
+    status = ('partial' if results else 'error') if errors else 'success'
+    encoded_results = ','.join(f'{encode_json(session_id)}:{results[session_id]}' for session_id in sorted(results))
+    return (f'{{"errors":{encode_json(errors)},"results":{{{encoded_results}}},'
+            f'"session_order":{encode_json(session_order)},"status":{encode_json(status)}}}\n').encode('utf-8')
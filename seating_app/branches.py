@@ -0,0 +1,125 @@
+# seating_app/branches.py
+
+"""
+The range-based input mode of final_index.html: every branch is a USN
+range ({name, prefix, start, end, skip}) and is seated as a group of its
+own; a common paper group is named after its first branch
+(engine.compute_branch_allotment). The ranges stay range-encoded
+until the benches are written out.
+
+'?view=paged' keeps the computed plan on the server (paged_results.py) and
+answers with a summary; the rooms are then read from /api/results/<id>.
+"""
+
+from flask import Blueprint, g, jsonify, request
+
+from seating_app.services import services
+from seating_app.engine import AllotmentError, compute_branch_allotment, iter_room_arrangements, room_layouts, seat_headers
+from seating_app.usn_ranges import as_usn_list
+
+blueprint = Blueprint('branches', __name__)
+
+# Pages of a result never change, so the browser may keep them for as long as the result lives.
+PAGE_CACHE_CONTROL = 'private, max-age=600'
+
+
+def is_branch_payload(data):
+    """Whether an allotment payload uses 'branchDetails' rather than subject-coded students."""
+    return (isinstance(data, dict) and 'branchDetails' in data
+            and not data.get('combinedStudentData') and not data.get('rosterId'))
+
+
+def generate_branch_allotment(data):
+    """/api/generate-allotment for a range-based payload (see api.generate_allotment_api)."""
+    state = services()
+    try:
+        plan = compute_branch_allotment(data, g.timer)
+    except AllotmentError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    seated_benches = plan.seated_benches
+    state.students_per_request.observe(sum(len(students) for students in plan.group_map.values()))
+    state.benches_per_request.observe(len(seated_benches))
+
+    # Leftovers stay in seating order, as the branch lists are not sorted.
+    unseated_students = {branch: as_usn_list(students) for branch, students in plan.unseated.items() if students}
+    if request.args.get('view') == 'paged':
+        from seating_app.paged_results import PagedResult
+        result = PagedResult(seated_benches, list(room_layouts(plan.room_plans, len(seated_benches))), {
+            'student_seat_headers': seat_headers(plan.students_per_bench),
+            'skipped_students': plan.skipped_students,
+            'unseated_students': unseated_students
+        })
+        result_id = state.paged_results.put(result)
+        # Too large to keep: answer in full, as without '?view=paged'.
+        if result_id is not None:
+            return jsonify(result.summary(result_id))
+
+    with g.timer.phase('layout'):
+        room_arrangements = list(iter_room_arrangements(seated_benches, plan.room_plans))
+    return jsonify({
+        'status': 'success',
+        'student_seat_headers': seat_headers(plan.students_per_bench),
+        'room_arrangements': room_arrangements,
+        'skipped_students': plan.skipped_students,
+        'unseated_students': unseated_students
+    })
+
+
+def stored_result(result_id):
+    result = services().paged_results.get(result_id)
+    if result is None:
+        return None, (jsonify({'status': 'error', 'message': f"Unknown or expired result ID '{result_id}'. Please generate the plan again."}), 404)
+    return result, None
+
+
+def page_response(body):
+    response = jsonify(dict(body, status='success'))
+    response.headers['Cache-Control'] = PAGE_CACHE_CONTROL
+    return response
+
+
+@blueprint.route('/api/results/<result_id>', methods=['GET'])
+def result_summary_api(result_id):
+    """The summary '?view=paged' answered with: seat headers, skipped and unseated students, room outlines."""
+    result, error = stored_result(result_id)
+    if error:
+        return error
+    return page_response(result.summary(result_id))
+
+
+@blueprint.route('/api/results/<result_id>/rooms', methods=['GET'])
+def result_rooms_api(result_id):
+    """
+    A page of room arrangements of a stored result: '?offset=' (first room, 0-based)
+    and '?limit=' (up to 50 rooms).
+    """
+    from seating_app.paged_results import MAX_PAGE_ROOMS, page_bounds
+    result, error = stored_result(result_id)
+    if error:
+        return error
+    try:
+        offset, limit = page_bounds(request.args, 10, MAX_PAGE_ROOMS)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': "'offset' and 'limit' must be whole numbers."}), 400
+    return page_response({'result_id': result_id, 'offset': offset, 'room_count': len(result.rooms),
+                          'room_arrangements': result.room_page(offset, limit)})
+
+
+@blueprint.route('/api/results/<result_id>/rooms/<int:index>', methods=['GET'])
+def result_room_api(result_id, index):
+    """
+    One room of a stored result, or a range of its benches: '?start=' (0-based, in filling
+    order) and '?count=' (up to 2000 benches). Only the columns holding those benches are sent.
+    """
+    from seating_app.paged_results import MAX_PAGE_BENCHES, page_bounds
+    result, error = stored_result(result_id)
+    if error:
+        return error
+    if index >= len(result.rooms):
+        return jsonify({'status': 'error', 'message': f'The result has {len(result.rooms)} rooms; there is no room {index}.'}), 404
+    try:
+        start, count = page_bounds(request.args, MAX_PAGE_BENCHES, MAX_PAGE_BENCHES, 'start', 'count')
+    except ValueError:
+        return jsonify({'status': 'error', 'message': "'start' and 'count' must be whole numbers."}), 400
+    return page_response({'result_id': result_id, 'index': index, 'bench_count': result.rooms[index].bench_count(),
+                          'start': start, 'room': result.room_benches(index, start, count)})
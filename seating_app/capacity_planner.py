@@ -0,0 +1,200 @@
+# seating_app/capacity_planner.py
+
+"""
+Capacity planning without running the allotment.
+
+Sticky pairing only ever looks at how many students each group has left,
+so the number of benches it uses can be worked out from the group sizes
+alone. Each round pairs the two largest groups; with a = ceil(spb / 2)
+A seats and b = floor(spb / 2) B seats per bench, the round lasts
+
+    k = min(ceil(A_left / a), ceil(B_left / b))
+
+benches, after which at least one of the two groups is used up. Replaying
+the rounds on a heap of sizes therefore costs O(G log G) for G groups,
+independent of the number of students. seat_students() fills its benches
+from the same rounds (engine.sticky_pairing_rounds), so the benches,
+empty seats and unseated students are exactly the ones it would produce.
+
+Rooms only matter through their bench counts (the rooms are filled in
+order), so whether a set of rooms fits is a comparison with the number of
+benches needed.
+"""
+
+from bisect import bisect_left, insort
+from collections import Counter
+
+from seating_app.engine import AllotmentError, column_distribution, is_range_entry, parse_common_groups, sticky_pairing_rounds
+from seating_app.usn_ranges import parse_usn_range
+
+
+def subject_sizes(combined_student_data):
+    """Number of students per upper-cased subject code, in order of first appearance."""
+    sizes = Counter()
+    for student in combined_student_data:
+        subject_code = student['subjectCode'].strip().upper()
+        if is_range_entry(student):
+            try:
+                sizes[subject_code] += sum(len(usn_range) for usn_range in parse_usn_range(student))
+            except (KeyError, TypeError, ValueError) as e:
+                raise AllotmentError(f'Invalid USN range for subject {subject_code}: {e}')
+        else:
+            sizes[subject_code] += 1
+    return sizes
+
+
+def merged_group_sizes(sizes, common_groups_str):
+    """The seating groups and their sizes, named and ordered the way merge_common_groups() builds them."""
+    merged = {}
+    processed_in_group = set()
+    for group in (g for g in parse_common_groups(common_groups_str) if len(g) > 1):
+        total = 0
+        for subject_code in group:
+            if subject_code in sizes:
+                total += sizes[subject_code]
+                processed_in_group.add(subject_code)
+        if total:
+            merged.setdefault(', '.join(sorted(group)), total)
+    for subject_code, size in sizes.items():
+        if subject_code not in processed_in_group:
+            merged[subject_code] = size
+    return merged
+
+
+def sticky_pairing_usage(group_sizes, students_per_bench, total_benches=None):
+    """
+    Replays seat_students() on sizes only.
+    Returns (benches used, empty seats, {group: students left without a seat}).
+    `total_benches` None means as many benches as it takes.
+    """
+    names = list(group_sizes)
+    sizes = [group_sizes[name] for name in names]
+    remaining = list(sizes)
+    benches = empty_seats = 0
+    # A group with an empty name never gets a seat.
+    for rounds, taken in sticky_pairing_rounds(sizes, [bool(name) for name in names], students_per_bench, total_benches):
+        benches += rounds
+        empty_seats += rounds * students_per_bench - sum(count for _, _, _, count in taken)
+        for group, _, _, count in taken:
+            remaining[group] -= count
+
+    unseated = {names[i]: remaining[i] for i in range(len(names)) if remaining[i]}
+    return benches, empty_seats, unseated
+
+
+def room_bench_counts(room_configurations):
+    """(room_name, benches) of every room, validated like plan_rooms() validates them."""
+    rooms = []
+    for index, room_config in enumerate(room_configurations):
+        try:
+            room_name = room_config.get('name', f'Room {index + 1}')
+            benches = int(room_config['benches'])
+            class_columns = int(room_config['classColumns'])
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise AllotmentError(f'Invalid benches or column data for a room: {e}')
+        if benches <= 0 or class_columns <= 0:
+            raise AllotmentError(f'Benches and columns must be positive for room {room_name}.')
+        column_distribution(room_config, room_name, benches, class_columns)
+        rooms.append((room_name, benches))
+    return rooms
+
+
+def smallest_room_subset(rooms, benches_needed):
+    """
+    Indexes (in catalogue order) of the fewest rooms holding `benches_needed`
+    benches, or None when even the whole catalogue is too small. The largest
+    rooms give the fewest; swapping a chosen room for a smaller unused one
+    then trims the spare benches, best swap first.
+    """
+    if sum(benches for _, benches in rooms) < benches_needed:
+        return None
+    by_size = sorted(range(len(rooms)), key=lambda i: (-rooms[i][1], i))
+    count, total = 0, 0
+    while total < benches_needed:
+        total += rooms[by_size[count]][1]
+        count += 1
+    chosen = set(by_size[:count])
+    # The unused rooms as (benches, index), smallest first.
+    unused = sorted((rooms[i][1], i) for i in by_size[count:])
+
+    while total > benches_needed:
+        spare = total - benches_needed
+        best = None
+        for index in chosen:
+            benches = rooms[index][1]
+            # The smallest unused room that still leaves enough benches.
+            position = bisect_left(unused, (benches - spare, -1))
+            if position < len(unused) and unused[position][0] < benches:
+                gain = benches - unused[position][0]
+                if best is None or gain > best[0]:
+                    best = (gain, index, position)
+        if best is None:
+            break
+        gain, index, position = best
+        chosen.remove(index)
+        chosen.add(unused.pop(position)[1])
+        insort(unused, (rooms[index][1], index))
+        total -= gain
+    return sorted(chosen)
+
+
+def plan_capacity(data, student_groups=None):
+    """
+    Capacity report for an allotment payload, without seating anyone.
+    Group sizes come from 'groupSizes' ({subject_code: count}), else from
+    'combinedStudentData' or `student_groups` (a stored roster).
+    Raises AllotmentError for input the client has to fix.
+    """
+    try:
+        room_configurations = data.get('roomConfigurations') or []
+        students_per_bench = int(data['studentsPerBench'])
+        common_groups_str = data.get('commonPaperGroups', '')
+        if data.get('groupSizes'):
+            sizes = {str(subject).strip().upper(): int(count) for subject, count in data['groupSizes'].items()}
+        elif student_groups:
+            sizes = {subject: len(students) for subject, students in student_groups.items()}
+        else:
+            sizes = subject_sizes(data.get('combinedStudentData') or [])
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise AllotmentError(f'Invalid or missing root input data: {e}')
+    if students_per_bench <= 0:
+        raise AllotmentError('Students per bench must be greater than 0.')
+    if any(size < 0 for size in sizes.values()):
+        raise AllotmentError('Group sizes cannot be negative.')
+    if not any(sizes.values()):
+        raise AllotmentError('No student data provided. Please upload a file or add manual entries.')
+
+    groups = merged_group_sizes(sizes, common_groups_str)
+    rooms = room_bench_counts(room_configurations)
+    benches_available = sum(benches for _, benches in rooms)
+    benches_needed, empty_seats_needed, _ = sticky_pairing_usage(groups, students_per_bench)
+    benches_used, empty_seats, unseated = sticky_pairing_usage(groups, students_per_bench, benches_available)
+
+    rooms_used, filled = [], 0
+    for room_name, benches in rooms:
+        if filled >= benches_used:
+            break
+        rooms_used.append(room_name)
+        filled += benches
+
+    subset = smallest_room_subset(rooms, benches_needed)
+    students = sum(groups.values())
+    return {
+        'status': 'success',
+        'fits': not unseated,
+        'students': students,
+        'seating_groups': len(groups),
+        'benches_needed': benches_needed,
+        'empty_seats_needed': empty_seats_needed,
+        'benches_available': benches_available,
+        'benches_short': max(benches_needed - benches_available, 0),
+        'seated_students': students - sum(unseated.values()),
+        'empty_seats': empty_seats,
+        'unseated_students': unseated,
+        'rooms_used': rooms_used,
+        'smallest_room_subset': None if subset is None else {
+            'rooms': [rooms[i][0] for i in subset],
+            'benches': sum(rooms[i][1] for i in subset),
+            'spare_benches': sum(rooms[i][1] for i in subset) - benches_needed,
+        },
+    }
@@ -0,0 +1,236 @@
+# seating_app/compact_format.py
+
+"""
+Compact columnar response format for /api/generate-allotment?format=compact.
+
+The default response repeats each USN string inside nested bench dicts, and
+repeats it again in 'group_map'. The compact form keeps one USN table and
+refers to it by index everywhere else:
+
+    {
+      "format": "compact-v1",
+      "usn_runs": [["1XX21CS", 1, 60, 3], ...],   # prefix, first serial, count, serial width
+      "rooms": [{"room_name": "Room 101",
+                 "columns": [{"column": 1, "first_bench": 1, "benches": 14,
+                              "seat_runs": [[[0, 14]], [[60, 10], [-1, 4]]]}]}],
+      "unseated_students": {"21CS301": [[812, 2]]},
+      "group_map": {"21CS301": [[0, 60], ...]},
+      ...
+    }
+
+The table holds the seating groups one after another, each in its sorted
+seating order. It is stored as runs of USNs that share a prefix and have
+consecutive serial numbers; a USN without a numeric suffix is a run of one
+with width 0. Every other USN list is a list of [first table index, length]
+runs. Seats are stored per column and per seat position (Seat 1, Seat 2,
+...), with -1 as the first index of a run of "---" seats. Students of one
+group sit on consecutive table entries, so a column is usually one run per
+seat position. The 'group_map' lists come back in table order.
+
+expand_compact_response() turns it back into the default JSON shape.
+The body can also be sent as MessagePack and/or compressed with gzip or
+zstd. Those encoders are optional dependencies and are only imported when
+they are used.
+"""
+
+import gzip
+import re
+
+from seating_app.engine import EMPTY_SEAT, seat_headers, unseated_students
+
+COMPACT_FORMAT = 'compact-v1'
+EMPTY_INDEX = -1
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+_SERIAL_RE = re.compile(r'^(.*?)([0-9]+)$')
+
+
+def encode_runs(indexes):
+    """[5, 6, 7, -1, -1, 9] -> [[5, 3], [-1, 2], [9, 1]]"""
+    indexes = list(indexes)
+    if indexes and indexes[0] != EMPTY_INDEX and indexes == list(range(indexes[0], indexes[0] + len(indexes))):
+        return [[indexes[0], len(indexes)]]
+    runs = []
+    start = length = None
+    for index in indexes:
+        if length and index == (EMPTY_INDEX if start == EMPTY_INDEX else start + length):
+            length += 1
+            continue
+        if length:
+            runs.append([start, length])
+        start, length = index, 1
+    if length:
+        runs.append([start, length])
+    return runs
+
+
+def decode_runs(runs):
+    indexes = []
+    for start, length in runs:
+        indexes.extend([EMPTY_INDEX] * length if start == EMPTY_INDEX else range(start, start + length))
+    return indexes
+
+
+def encode_usn_runs(usns):
+    """Run-length codes USNs as [prefix, first serial, count, serial width]."""
+    runs = []
+    i = 0
+    while i < len(usns):
+        match = _SERIAL_RE.match(usns[i])
+        if match is None:
+            runs.append([usns[i], 0, 1, 0])
+            i += 1
+            continue
+        prefix, digits = match.groups()
+        serial, width = int(digits), len(digits)
+        template = prefix.replace('%', '%%') + f'%0{width}d'
+        # Grow the run in doubling steps, comparing whole slices against the expected USNs.
+        length, step = 1, 1
+        while i + length < len(usns):
+            chunk = usns[i + length:i + length + step]
+            expected = [template % number for number in range(serial + length, serial + length + len(chunk))]
+            if chunk == expected:
+                length += len(chunk)
+                step *= 2
+                continue
+            for actual, wanted in zip(chunk, expected):
+                if actual != wanted:
+                    break
+                length += 1
+            break
+        runs.append([prefix, serial, length, width])
+        i += length
+    return runs
+
+
+def decode_usn_runs(runs):
+    usns = []
+    for prefix, serial, count, width in runs:
+        if width == 0:
+            usns.append(prefix)
+        else:
+            usns.extend(f'{prefix}{number:0{width}d}' for number in range(serial, serial + count))
+    return usns
+
+
+def compact_response(plan):
+    """Builds the compact response body for a computed AllotmentPlan."""
+    table = []
+    group_offsets = {}
+    for group, students in plan.group_lists.items():
+        group_offsets[group] = len(table)
+        table.extend(students)
+    # Filled back to front so a USN listed twice maps to its first table index.
+    usn_index = dict(zip(reversed(table), range(len(table) - 1, -1, -1)))
+    usn_index[EMPTY_SEAT] = EMPTY_INDEX
+
+    # The seat matrix holds IDs into this same table; they only need mapping
+    # when a USN is listed twice (to its first index, as usn_index does).
+    seated_benches = plan.seated_benches
+    if len(usn_index) - 1 < len(table):
+        first_index = [usn_index[usn] for usn in table] + [EMPTY_INDEX]
+        seat_indexes = lambda ids: map(first_index.__getitem__, ids)
+    else:
+        seat_indexes = iter
+
+    students_per_bench = plan.students_per_bench
+    bench_count = len(seated_benches)
+    rooms = []
+    seated_bench_index = 0
+    for room_name, benches_in_each_column in plan.room_plans:
+        bench_counter = 1
+        columns = []
+        for i, benches_for_this_column in enumerate(benches_in_each_column):
+            if seated_bench_index >= bench_count:
+                break
+            benches = len(range(bench_count)[seated_bench_index:seated_bench_index + benches_for_this_column])
+            seat_runs = [encode_runs(seat_indexes(seated_benches.seat_ids(seated_bench_index, benches, position)))
+                         for position in range(students_per_bench)] if benches else []
+            seated_bench_index += benches
+            columns.append({'column': i + 1, 'first_bench': bench_counter, 'benches': benches, 'seat_runs': seat_runs})
+            bench_counter += benches
+        if columns:
+            rooms.append({'room_name': room_name, 'columns': columns})
+
+    body = {
+        'status': 'success',
+        'format': COMPACT_FORMAT,
+        'student_seat_headers': seat_headers(students_per_bench),
+        'students_per_bench': students_per_bench,
+        'usn_runs': encode_usn_runs(table),
+        'rooms': rooms,
+        'skipped_students': plan.skipped_students,
+        'unseated_students': {group: encode_runs([usn_index[usn] for usn in students]) for group, students in unseated_students(plan).items()},
+        'group_map': {subject: subject_runs(plan, subject, students, group_offsets, usn_index) for subject, students in plan.group_map.items()},
+    }
+    if plan.optimization:
+        body['optimization'] = plan.optimization
+    return body
+
+
+def subject_runs(plan, subject, students, group_offsets, usn_index):
+    # A subject outside any common paper group is its own seating group, stored as one block of the table.
+    if plan.group_lists.get(subject) is students:
+        return [[group_offsets[subject], len(students)]] if students else []
+    return encode_runs(sorted(usn_index[usn] for usn in students))
+
+
+def expand_compact_response(body):
+    """Rebuilds the default response shape from a compact body."""
+    table = decode_usn_runs(body['usn_runs'])
+
+    def usns(runs):
+        return [EMPTY_SEAT if index == EMPTY_INDEX else table[index] for index in decode_runs(runs)]
+
+    room_arrangements = []
+    for room in body['rooms']:
+        arrangement_by_column = []
+        for column in room['columns']:
+            positions = [usns(runs) for runs in column['seat_runs']]
+            seating_plan = [{'bench_number': column['first_bench'] + offset, 'seats': [seats[offset] for seats in positions]}
+                            for offset in range(column['benches'])]
+            arrangement_by_column.append({'name': f"Column {column['column']} ({column['benches']} Benches)", 'seating_plan': seating_plan})
+        room_arrangements.append({'room_name': room['room_name'], 'arrangement_by_column': arrangement_by_column})
+
+    return {
+        'status': body['status'],
+        'student_seat_headers': body['student_seat_headers'],
+        'room_arrangements': room_arrangements,
+        'skipped_students': body['skipped_students'],
+        'unseated_students': {group: usns(runs) for group, runs in body['unseated_students'].items()},
+        'group_map': {subject: usns(runs) for subject, runs in body['group_map'].items()},
+    }
+
+
+def msgpack_available():
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def pack_msgpack(body):
+    import msgpack
+    return msgpack.packb(body, use_bin_type=True)
+
+
+def available_content_codings():
+    """Content codings this server can produce, best first."""
+    codings = []
+    try:
+        import zstandard  # noqa: F401
+        codings.append('zstd')
+    except ImportError:
+        pass
+    codings.append('gzip')
+    return codings
+
+
+def compress(data, coding):
+    if coding == 'gzip':
+        return gzip.compress(data, compresslevel=6)
+    if coding == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise ValueError(f'Unsupported content coding: {coding}')
@@ -0,0 +1,736 @@
+# seating_app/engine.py
+
+"""
+Seating engine behind /api/generate-allotment.
+
+Everything in here is plain Python with no Flask dependency, so the same
+allotment can be produced from a script, a worker process or a test.
+The seating follows the "sticky pairing" rules of the original inline loop
+and produces the same benches for the same input, but it consumes the
+student lists through cursors and keeps the groups in a heap, so a plan with
+N students and G groups is built in O(N log G) instead of O(N * G).
+
+Seated students are kept as integer IDs in an array (SeatMatrix), one
+machine int per seat instead of a list per bench; USN strings and JSON
+objects are only produced when a response is encoded, one room at a time.
+
+Both input modes end in the same seating and room planning (allot_groups):
+subject-based payloads ('combinedStudentData' or a stored roster) through
+compute_allotment(), range-based ones ('branchDetails') through
+compute_branch_allotment(). They differ only in how the groups are built
+and named.
+"""
+
+import heapq
+import json
+import re
+from array import array
+from collections import defaultdict, namedtuple
+from itertools import accumulate, chain
+
+from seating_app.instrumentation import NULL_TIMER
+from seating_app.usn_ranges import MAX_RANGE_STUDENTS, UsnSequence, as_usn_list, parse_usn_range, range_skip_report, rejected_range, usn_ranges
+
+EMPTY_SEAT = "---"
+# Student ID of an empty seat in a SeatMatrix.
+EMPTY_ID = -1
+_COLUMN_NAME_RE = re.compile(r'^Column ([1-9][0-9]*)\b')
+
+# Everything a response is built from: the per-subject and per-group (merged, sorted)
+# student lists, the seated benches in seating order (a SeatMatrix), the leftovers per group, and the
+# (room_name, benches_in_each_column) of every room used. 'optimization' is the report of
+# the optional local search (see seat_optimizer.py), None for a greedy plan.
+AllotmentPlan = namedtuple('AllotmentPlan', ['students_per_bench', 'skipped_students', 'group_map', 'group_lists', 'seated_benches', 'unseated', 'room_plans', 'optimization'], defaults=(None,))
+
+
+class AllotmentError(ValueError):
+    """Invalid allotment input. The message is safe to send back to the client."""
+
+
+def parse_common_groups(group_str):
+    groups = []
+    if not group_str:
+        return groups
+    pairs = [p.strip() for p in group_str.upper().split(';') if p.strip()]
+    for pair in pairs:
+        branches = [b.strip() for b in pair.split(',') if b.strip()]
+        if branches:
+            groups.append(branches)
+    return groups
+
+
+def seating_groups(subjects, common_groups_str):
+    """Seating group of each subject code, named like merge_common_groups() names them."""
+    group_of = {}
+    for group in parse_common_groups(common_groups_str):
+        if len(group) > 1:
+            for subject in group:
+                group_of.setdefault(subject, ', '.join(sorted(group)))
+    return {subject: group_of.get(subject, subject) for subject in subjects}
+
+
+def normalize_allotment_input(data, student_groups=None):
+    """
+    Validates the root of an allotment request. `student_groups` stands in for
+    'combinedStudentData' when the students come pre-grouped (e.g. from a stored roster).
+    Returns (room_configurations, students_per_bench, common_groups_str,
+    combined_student_data, skipped_students_report).
+    """
+    try:
+        room_configurations = data['roomConfigurations']
+        students_per_bench = int(data['studentsPerBench'])
+        common_groups_str = data.get('commonPaperGroups', '')
+        combined_student_data = data.get('combinedStudentData', [])
+        skipped_students_report = data.get('skippedStudentsReport', {})
+    except (KeyError, TypeError, ValueError) as e:
+        raise AllotmentError(f'Invalid or missing root input data: {e}')
+
+    if not combined_student_data and not student_groups:
+        raise AllotmentError('No student data provided. Please upload a file or add manual entries.')
+    if not room_configurations:
+        raise AllotmentError('You must define at least one room.')
+    if students_per_bench <= 0:
+        raise AllotmentError('Students per bench must be greater than 0.')
+
+    return room_configurations, students_per_bench, common_groups_str, combined_student_data, skipped_students_report
+
+
+def is_range_entry(student):
+    return 'usn' not in student and 'prefix' in student
+
+
+def group_students_by_subject(combined_student_data, skipped_students_report=None):
+    """
+    Groups the upper-cased USNs by their upper-cased subject code.
+    Range-encoded entries ({prefix, start, end, skip, subjectCode}) stay lazy:
+    their subject gets a UsnSequence instead of a list. Their skipped USNs are
+    added to `skipped_students_report` when one is given, unless the client
+    already reported that name; so are the ranges past MAX_RANGE_STUDENTS,
+    which are left out.
+    """
+    initial_student_lists = defaultdict(list)
+    range_students = 0
+    for student in combined_student_data:
+        subject_code = student['subjectCode'].strip().upper()
+        if not is_range_entry(student):
+            initial_student_lists[subject_code].append(student['usn'].strip().upper())
+            continue
+
+        try:
+            ranges = parse_usn_range(student)
+            name, skipped = range_skip_report(student)
+        except (KeyError, TypeError, ValueError) as e:
+            raise AllotmentError(f'Invalid USN range for subject {subject_code}: {e}')
+        count = sum(map(len, ranges))
+        if range_students + count > MAX_RANGE_STUDENTS:
+            if skipped_students_report is not None:
+                entry = rejected_range(str(student['prefix']).strip().upper(), int(student['start']), int(student['end']))
+                skipped_students_report[name] = list(skipped_students_report.get(name, [])) + [entry]
+            continue
+        range_students += count
+        if skipped and skipped_students_report is not None:
+            skipped_students_report.setdefault(name, skipped)
+        if not ranges:
+            continue
+        students = initial_student_lists[subject_code]
+        if not isinstance(students, UsnSequence):
+            students = initial_student_lists[subject_code] = UsnSequence([students])
+        for usn_range in ranges:
+            students.extend(usn_range)
+    return initial_student_lists
+
+
+def subject_student_lists(combined_student_data, skipped_students_report, student_groups=None):
+    """
+    The students per subject: `student_groups` when given, else grouped from
+    `combined_student_data`. Returns (initial_student_lists, skipped_students_report);
+    the report is copied before the skipped USNs of range entries are added.
+    """
+    if student_groups:
+        return student_groups, skipped_students_report
+    if not isinstance(skipped_students_report, dict):
+        return group_students_by_subject(combined_student_data), skipped_students_report
+    skipped_students_report = dict(skipped_students_report)
+    return group_students_by_subject(combined_student_data, skipped_students_report), skipped_students_report
+
+
+def merge_common_groups(initial_student_lists, common_groups_str):
+    """
+    Merges the subject codes of every common paper group into one list named
+    after the sorted codes. Every resulting list is sorted in place; lists of
+    subjects outside any group are shared with `initial_student_lists`.
+    """
+    final_student_lists = defaultdict(list)
+    processed_in_group = set()
+    common_groups = [g for g in parse_common_groups(common_groups_str) if len(g) > 1]
+
+    for group in common_groups:
+        group_name = ', '.join(sorted(group))
+        merged_list = UsnSequence() if any(isinstance(initial_student_lists.get(s), UsnSequence) for s in group) else []
+        for subject_code in group:
+            if subject_code in initial_student_lists:
+                merged_list.extend(initial_student_lists[subject_code])
+                processed_in_group.add(subject_code)
+        if merged_list:
+            final_student_lists[group_name] = merged_list
+
+    for subject_code, students in initial_student_lists.items():
+        if subject_code not in processed_in_group:
+            final_student_lists[subject_code] = students
+
+    for subject_code in final_student_lists:
+        final_student_lists[subject_code].sort()
+
+    return final_student_lists
+
+
+def normalize_branch_input(data):
+    """
+    Validates the root of a range-based ('branchDetails') allotment request.
+    Returns (room_configurations, branch_details, students_per_bench, common_groups_str).
+    """
+    try:
+        room_configurations = data['roomConfigurations']
+        branch_details = data['branchDetails']
+        students_per_bench = int(data['studentsPerBench'])
+        common_groups_str = data.get('commonPaperGroups', '')
+    except (KeyError, TypeError, ValueError) as e:
+        raise AllotmentError(f'Invalid or missing root input data: {e}')
+
+    if not branch_details:
+        raise AllotmentError('You must define at least one branch.')
+    if not room_configurations:
+        raise AllotmentError('You must define at least one room.')
+    if students_per_bench <= 0:
+        raise AllotmentError('Students per bench must be greater than 0.')
+
+    return room_configurations, branch_details, students_per_bench, common_groups_str
+
+
+def branch_student_lists(branch_details):
+    """
+    The students of every branch ({name, prefix, start, end, skip}) as a lazy
+    UsnSequence of its USN range, by upper-cased name, in input order.
+    A branch whose range would take the request past MAX_RANGE_STUDENTS is
+    left out and reported as skipped.
+    Returns (initial_student_lists, skipped_students_report).
+    """
+    initial_student_lists = {}
+    skipped_students_report = {}
+    range_students = 0
+    for branch in branch_details:
+        try:
+            name = branch['name'].strip().upper()
+            if not name:
+                continue
+            prefix, start, end = branch['prefix'], int(branch['start']), int(branch['end'])
+            skip_string = branch.get('skip', '').strip()
+        except (KeyError, ValueError) as e:
+            raise AllotmentError(f'Invalid data for a branch: {e}.')
+        if start > end:
+            raise AllotmentError(f'For branch {name}, start USN > end USN.')
+        try:
+            skip_numbers = [int(s.strip()) for s in skip_string.split(',') if s.strip()] if skip_string else []
+            usns_to_skip = {f"{prefix}{num:03}" for num in skip_numbers}
+            # Kept as lazy ranges; USN strings are only formatted as benches are filled.
+            students = UsnSequence(usn_ranges(prefix, start, end, skip_numbers))
+        except (KeyError, ValueError) as e:
+            raise AllotmentError(f'Invalid data for a branch: {e}.')
+        if range_students + len(students) > MAX_RANGE_STUDENTS:
+            skipped_students_report[name] = [rejected_range(prefix, start, end)]
+            continue
+        range_students += len(students)
+        initial_student_lists[name] = students
+        if usns_to_skip:
+            skipped_students_report[name] = sorted(usns_to_skip)
+    return initial_student_lists, skipped_students_report
+
+
+def merge_branch_groups(initial_student_lists, common_groups_str):
+    """
+    Merges the branches of every common paper group into one list named after
+    the group's first branch (its leader), in the order given. Unlike
+    merge_common_groups(), every branch of a group must be defined and
+    nothing is sorted.
+    """
+    final_student_lists = {}
+    processed_in_group = set()
+    for group in parse_common_groups(common_groups_str):
+        group_leader = group[0]
+        if group_leader not in initial_student_lists:
+            raise AllotmentError(f"Common Group Error: The group leader '{group_leader}' is not a defined branch.")
+        merged_list = UsnSequence()
+        for branch_name in group:
+            if branch_name not in initial_student_lists:
+                raise AllotmentError(f"Common Group Error: The branch '{branch_name}' in group '{group_leader}' is not defined.")
+            merged_list.extend(initial_student_lists[branch_name])
+            processed_in_group.add(branch_name)
+        final_student_lists[group_leader] = merged_list
+    for branch_name, students in initial_student_lists.items():
+        if branch_name not in processed_in_group:
+            final_student_lists[branch_name] = students
+    return final_student_lists
+
+
+def total_bench_count(room_configurations):
+    return sum(int(room['benches']) for room in room_configurations)
+
+
+def ceil_div(a, b):
+    return -(-a // b)
+
+
+class UsnTable:
+    """
+    Interned USNs: the seating groups laid end to end, so a student is an
+    integer ID and the students of group g have the IDs offsets[g] onwards,
+    in list order.
+    """
+
+    __slots__ = ('lists', 'offsets', '_lookup')
+
+    def __init__(self, lists):
+        self.lists = lists
+        self.offsets = list(accumulate((len(students) for students in lists), initial=0))
+        self._lookup = None
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    @property
+    def lookup(self):
+        """The USN of every ID, then EMPTY_SEAT, so that EMPTY_ID (-1) reads as "---"."""
+        if self._lookup is None:
+            self._lookup = list(chain.from_iterable(self.lists))
+            self._lookup.append(EMPTY_SEAT)
+        return self._lookup
+
+    def usns(self, ids):
+        return list(map(self.lookup.__getitem__, ids))
+
+
+class SeatMatrix:
+    """
+    The seated benches as a flat array('i') of student IDs, `students_per_bench`
+    per bench, EMPTY_ID for an empty seat. Reads like the list of benches it
+    replaces: indexing gives a bench as a list of USNs, slicing a list of benches.
+    """
+
+    __slots__ = ('ids', 'students_per_bench', 'table')
+
+    def __init__(self, ids, students_per_bench, table):
+        self.ids = ids
+        self.students_per_bench = students_per_bench
+        self.table = table
+
+    def __len__(self):
+        return len(self.ids) // self.students_per_bench
+
+    def __getitem__(self, index):
+        spb = self.students_per_bench
+        if isinstance(index, slice):
+            first, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(first, stop, step)]
+            seats = self.table.usns(self.ids[first * spb:max(stop, first) * spb])
+            return [seats[i:i + spb] for i in range(0, len(seats), spb)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('SeatMatrix index out of range')
+        return self.table.usns(self.ids[index * spb:(index + 1) * spb])
+
+    def __iter__(self):
+        for first in range(0, len(self), 4096):
+            yield from self[first:first + 4096]
+
+    def seat_ids(self, first_bench, benches, position):
+        """IDs in seat `position` of `benches` benches from `first_bench` on."""
+        spb = self.students_per_bench
+        return self.ids[first_bench * spb + position:(first_bench + benches) * spb:spb]
+
+    def as_numpy(self):
+        """The IDs as a (benches, students_per_bench) int32 NumPy view, without copying."""
+        import numpy as np
+        return np.frombuffer(self.ids, dtype=np.intc).reshape(len(self), self.students_per_bench)
+
+
+def sticky_pairing_rounds(sizes, seatable, students_per_bench, total_benches=None):
+    """
+    The rounds of "sticky pairing", worked out from the group sizes alone.
+    Each round pairs the two largest remaining groups (ties to the lower
+    index) for as many benches as both last; with a = ceil(spb / 2) A seats and
+    b = floor(spb / 2) B seats per bench that is min(ceil(A_left / a), ceil(B_left / b)).
+    Yields (benches, [(group, seats per bench, first student, students seated)]),
+    the A group first. `total_benches` None means as many benches as it takes.
+    """
+    # A group with an empty name never gets a seat of its own, as in the
+    # original loop where a falsy group name always produced "---".
+    primary_seats = (students_per_bench + 1) // 2
+    secondary_seats = students_per_bench // 2
+    cursors = [0] * len(sizes)
+    heap = [(-size, index) for index, size in enumerate(sizes) if size]
+    heapq.heapify(heap)
+    benches = 0
+
+    while heap and (total_benches is None or benches < total_benches):
+        primary = heapq.heappop(heap)[1]
+        secondary = heapq.heappop(heap)[1] if heap else None
+        per_bench = [(primary, primary_seats if seatable[primary] else 0)]
+        if secondary is not None:
+            per_bench.append((secondary, secondary_seats if seatable[secondary] else 0))
+
+        # The round ends as soon as one of the paired groups is used up; a group
+        # that takes no seats (a B group with one seat per bench) never is.
+        lengths = [ceil_div(sizes[group] - cursors[group], seats) for group, seats in per_bench if seats]
+        if total_benches is not None:
+            lengths.append(total_benches - benches)
+        if not lengths:
+            raise AllotmentError('Students without a subject code can never be seated. Please fix their subject codes.')
+        rounds = min(lengths)
+
+        taken = []
+        for group, seats in per_bench:
+            count = min(sizes[group] - cursors[group], rounds * seats)
+            taken.append((group, seats, cursors[group], count))
+            cursors[group] += count
+        benches += rounds
+        yield rounds, taken
+        for group, _ in per_bench:
+            if cursors[group] < sizes[group]:
+                heapq.heappush(heap, (cursors[group] - sizes[group], group))
+
+
+def seat_students(student_lists, students_per_bench, total_benches):
+    """
+    "Sticky pairing" seating.
+
+    The two largest remaining groups are seated together in an (A, B, A, B...)
+    pattern, bench after bench, until one of them runs out; then the next two
+    largest groups are paired. Ties go to the group that appears first in
+    `student_lists`. A single remaining group is seated with "---" in its
+    B seats.
+
+    `student_lists` maps group names to sequences supporting len(), iteration
+    and slicing; they are read front to back and never modified.
+    Returns (seated_benches, unseated): a SeatMatrix over the groups' USNs and
+    a dict mapping every group that still has students to the students left
+    over, in their original order.
+    """
+    names = list(student_lists)
+    lists = [student_lists[name] for name in names]
+    table = UsnTable(lists)
+    sizes = [len(students) for students in lists]
+    cursors = [0] * len(names)
+    seat_positions = (range(0, students_per_bench, 2), range(1, students_per_bench, 2))
+    ids = array('i')
+
+    for benches, taken in sticky_pairing_rounds(sizes, [bool(name) for name in names], students_per_bench, total_benches):
+        # One round is a block of benches; each seat position of a group takes
+        # every `seats`-th student of the group's run, bench after bench.
+        block = array('i', [EMPTY_ID]) * (benches * students_per_bench)
+        for (group, seats, first, count), positions in zip(taken, seat_positions):
+            first_id = table.offsets[group] + first
+            for k, position in enumerate(positions[:seats]):
+                filled = ceil_div(count - k, seats) if count > k else 0
+                if filled:
+                    block[position:filled * students_per_bench:students_per_bench] = array('i', range(first_id + k, first_id + count, seats))
+            cursors[group] = first + count
+        ids.extend(block)
+
+    unseated = {names[i]: lists[i][cursors[i]:] for i in range(len(names)) if cursors[i] < sizes[i]}
+    return SeatMatrix(ids, students_per_bench, table), unseated
+
+
+def column_distribution(room_config, room_name, benches, class_columns):
+    """Number of benches in each column of a room, honouring 'benchesInColumns'."""
+    if 'benchesInColumns' in room_config and room_config['benchesInColumns']:
+        try:
+            benches_in_each_column = [int(b) for b in room_config['benchesInColumns']]
+        except (ValueError, TypeError):
+            raise AllotmentError(f'Invalid data in benchesInColumns for room {room_name}.')
+        if sum(benches_in_each_column) != benches:
+            raise AllotmentError(f'For room {room_name}, sum of column benches ({sum(benches_in_each_column)}) != total benches ({benches}).')
+        if len(benches_in_each_column) != class_columns:
+            raise AllotmentError(f'For room {room_name}, # of column distributions ({len(benches_in_each_column)}) != # of columns ({class_columns}).')
+        return benches_in_each_column
+    return [benches // class_columns + (1 if i < benches % class_columns else 0) for i in range(class_columns)]
+
+
+def plan_rooms(room_configurations, seated_bench_count):
+    """
+    Validates the rooms that will receive at least one of the seated benches
+    and returns their (room_name, benches_in_each_column) in order.
+    Rooms after the last seated bench are neither validated nor returned.
+    """
+    room_plans = []
+    filled_benches = 0
+
+    for room_config in room_configurations:
+        if filled_benches >= seated_bench_count:
+            break
+
+        try:
+            room_name = room_config.get('name', f"Room {len(room_plans) + 1}")
+            benches = int(room_config['benches'])
+            class_columns = int(room_config['classColumns'])
+        except (ValueError, KeyError) as e:
+            raise AllotmentError(f'Invalid benches or column data for a room: {e}')
+        if benches <= 0 or class_columns <= 0:
+            raise AllotmentError(f'Benches and columns must be positive for room {room_name}.')
+
+        room_plans.append((room_name, column_distribution(room_config, room_name, benches, class_columns)))
+        filled_benches += benches
+
+    return room_plans
+
+
+class ColumnLayout:
+    """One filled column: `benches` seated benches from `first_bench` on, numbered from `first_number`."""
+
+    __slots__ = ('number', 'first_bench', 'benches', 'first_number')
+
+    def __init__(self, number, first_bench, benches, first_number):
+        self.number = number
+        self.first_bench = first_bench
+        self.benches = benches
+        self.first_number = first_number
+
+    def arrangement(self, seated_benches, start=0, stop=None):
+        """The column's arrangement; `start` and `stop` (0-based, within the column) keep a range of its benches."""
+        stop = self.benches if stop is None else min(stop, self.benches)
+        seats = seated_benches[self.first_bench + start:self.first_bench + max(stop, start)]
+        return {'name': f'Column {self.number} ({self.benches} Benches)',
+                'seating_plan': [{'bench_number': number, 'seats': bench} for number, bench in enumerate(seats, start=self.first_number + start)]}
+
+
+class RoomLayout:
+    """The filled columns of one room."""
+
+    __slots__ = ('name', 'columns')
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = columns
+
+    def bench_count(self):
+        return sum(column.benches for column in self.columns)
+
+    def arrangement(self, seated_benches, start=0, stop=None):
+        """
+        The room's arrangement; `start` and `stop` (0-based, in filling order
+        within the room) keep a range of its benches and the columns they are in.
+        """
+        if start == 0 and stop is None:
+            return {"room_name": self.name, "arrangement_by_column": [column.arrangement(seated_benches) for column in self.columns]}
+        columns = []
+        column_start = 0
+        for column in self.columns:
+            if start < column_start + column.benches and (stop is None or stop > column_start):
+                columns.append(column.arrangement(seated_benches, max(start - column_start, 0), None if stop is None else stop - column_start))
+            column_start += column.benches
+        return {"room_name": self.name, "arrangement_by_column": columns}
+
+
+def column_number(column, index):
+    """
+    Number of an 'arrangement_by_column' entry of a response, read from its
+    name. Columns without benches are left out of a response, so the position
+    of the entry (`index`, from 0) only stands in for a name without one.
+    """
+    match = _COLUMN_NAME_RE.match(column.get('name') or '')
+    return int(match.group(1)) if match else index + 1
+
+
+def room_layouts(room_plans, seated_bench_count):
+    """Yields a RoomLayout per room that gets benches, filling the planned rooms column by column."""
+    seated_bench_index = 0
+
+    for room_name, benches_in_each_column in room_plans:
+        bench_counter = 1
+        columns = []
+        for i, benches_for_this_column in enumerate(benches_in_each_column):
+            if seated_bench_index >= seated_bench_count:
+                break
+            benches = min(benches_for_this_column, seated_bench_count - seated_bench_index)
+            if benches <= 0:
+                continue
+            columns.append(ColumnLayout(i + 1, seated_bench_index, benches, bench_counter))
+            seated_bench_index += benches
+            bench_counter += benches
+
+        if columns:
+            yield RoomLayout(room_name, columns)
+
+
+def iter_room_arrangements(seated_benches, room_plans):
+    """Yields one room arrangement at a time, filling the planned rooms column by column."""
+    for room in room_layouts(room_plans, len(seated_benches)):
+        yield room.arrangement(seated_benches)
+
+
+def layout_rooms(seated_benches, room_configurations):
+    """Fills the rooms in order with the seated benches, column by column."""
+    return list(iter_room_arrangements(seated_benches, plan_rooms(room_configurations, len(seated_benches))))
+
+
+def seat_headers(students_per_bench):
+    return [f'Seat {i+1}' for i in range(students_per_bench)]
+
+
+def allot_groups(final_student_lists, room_configurations, students_per_bench, timer=NULL_TIMER):
+    """
+    The engine both input modes share: sticky-pairing seating of the final
+    groups, then the rooms the seated benches fill.
+    Returns (seated_benches, unseated, room_plans).
+    """
+    with timer.phase('seat'):
+        total_benches = total_bench_count(room_configurations)
+        seated_benches, unseated = seat_students(final_student_lists, students_per_bench, total_benches)
+    with timer.phase('rooms'):
+        room_plans = plan_rooms(room_configurations, len(seated_benches))
+    return seated_benches, unseated, room_plans
+
+
+def compute_allotment(data, student_groups=None, timer=NULL_TIMER):
+    """
+    Runs validation, grouping, merging, seating and room planning for a
+    request payload. The per-room layouts are left to the response builders.
+    `student_groups` ({subject_code: [usn, ...]}) replaces 'combinedStudentData'
+    when given; its lists may be sorted in place. An 'optimize' entry in the
+    payload improves the greedy seating within a time budget (seat_optimizer.py).
+    `timer` (an instrumentation.PhaseTimer) records the time spent in each phase.
+    Raises AllotmentError for input the client has to fix.
+    """
+    with timer.phase('normalize'):
+        room_configurations, students_per_bench, common_groups_str, combined_student_data, skipped_students_report = normalize_allotment_input(data, student_groups)
+
+    with timer.phase('group'):
+        initial_student_lists, skipped_students_report = subject_student_lists(combined_student_data, skipped_students_report, student_groups)
+    with timer.phase('merge'):
+        final_student_lists = merge_common_groups(initial_student_lists, common_groups_str)
+
+    seated_benches, unseated, room_plans = allot_groups(final_student_lists, room_configurations, students_per_bench, timer)
+
+    plan = AllotmentPlan(students_per_bench, skipped_students_report, initial_student_lists, final_student_lists, seated_benches, unseated, room_plans)
+    if data.get('optimize'):
+        from seating_app.seat_optimizer import optimize_plan
+        with timer.phase('optimize'):
+            plan = optimize_plan(plan, data['optimize'])
+    return plan
+
+
+def compute_branch_allotment(data, timer=NULL_TIMER):
+    """
+    compute_allotment() for a range-based payload: every entry of
+    'branchDetails' is a group of its own, and common paper groups are named
+    after their leader. The plan's 'group_map' holds the branches.
+    Raises AllotmentError for input the client has to fix.
+    """
+    with timer.phase('normalize'):
+        room_configurations, branch_details, students_per_bench, common_groups_str = normalize_branch_input(data)
+    with timer.phase('group'):
+        initial_student_lists, skipped_students_report = branch_student_lists(branch_details)
+    with timer.phase('merge'):
+        final_student_lists = merge_branch_groups(initial_student_lists, common_groups_str)
+
+    seated_benches, unseated, room_plans = allot_groups(final_student_lists, room_configurations, students_per_bench, timer)
+    return AllotmentPlan(students_per_bench, skipped_students_report, initial_student_lists, final_student_lists, seated_benches, unseated, room_plans)
+
+
+def unseated_students(plan):
+    return {subject: sorted(students) for subject, students in plan.unseated.items()}
+
+
+def group_map(plan):
+    """Students per subject code, with range-encoded groups written out as lists."""
+    if all(isinstance(students, list) for students in plan.group_map.values()):
+        return plan.group_map
+    return {subject: as_usn_list(students) for subject, students in plan.group_map.items()}
+
+
+def allotment_response(plan, with_rooms=True):
+    """The default JSON response body for a computed plan; with_rooms=False leaves out 'room_arrangements'."""
+    response = {
+        'status': 'success',
+        'student_seat_headers': seat_headers(plan.students_per_bench),
+    }
+    if with_rooms:
+        response['room_arrangements'] = list(iter_room_arrangements(plan.seated_benches, plan.room_plans))
+    response.update({
+        'skipped_students': plan.skipped_students,
+        'unseated_students': unseated_students(plan),
+        'group_map': group_map(plan)  # Send this back for PDF generation logic
+    })
+    if plan.optimization:
+        response['optimization'] = plan.optimization
+    return response
+
+
+_encode_json = json.JSONEncoder(sort_keys=True, separators=(',', ':')).encode
+
+
+def encode_allotment_response(plan, extra=None):
+    """
+    allotment_response(plan), plus the `extra` keys, encoded exactly as
+    Flask's jsonify() encodes it outside debug mode (sorted keys, no spaces,
+    closing newline). The rooms are built and encoded one at a time, so the
+    response never exists as Python objects as a whole.
+    """
+    fields = allotment_response(plan, with_rooms=False)
+    fields.update(extra or {})
+    chunks = []
+    for key in sorted([*fields, 'room_arrangements']):
+        chunks.append(((',' if chunks else '{') + _encode_json(key) + ':').encode('utf-8'))
+        if key != 'room_arrangements':
+            chunks.append(_encode_json(fields[key]).encode('utf-8'))
+            continue
+        separator = b'['
+        for room in room_layouts(plan.room_plans, len(plan.seated_benches)):
+            chunks.append(separator)
+            chunks.append(_encode_json(room.arrangement(plan.seated_benches)).encode('utf-8'))
+            separator = b','
+        chunks.append(b']' if separator == b',' else b'[]')
+    chunks.append(b'}\n')
+    return b''.join(chunks)
+
+
+def generate_allotment(data, student_groups=None):
+    """
+    Builds the full /api/generate-allotment response body for a request payload.
+    Raises AllotmentError for input the client has to fix.
+    """
+    return allotment_response(compute_allotment(data, student_groups))
+
+
+def generate_allotment_records(data, student_groups=None):
+    """
+    Streaming form of generate_allotment().
+
+    All validation and the seating loop run before this returns, so input
+    errors still raise AllotmentError. The returned generator then yields a
+    'header' record, one 'room' record per room as its layout is built, and a
+    'trailer' record with the unseated students.
+    """
+    plan = compute_allotment(data, student_groups)
+
+    def records():
+        yield {
+            'type': 'header',
+            'status': 'success',
+            'student_seat_headers': seat_headers(plan.students_per_bench),
+            'skipped_students': plan.skipped_students,
+            'room_count': len(plan.room_plans),
+        }
+        for index, room in enumerate(iter_room_arrangements(plan.seated_benches, plan.room_plans)):
+            yield dict(room, type='room', index=index)
+        trailer = {
+            'type': 'trailer',
+            'unseated_students': unseated_students(plan),
+            'group_map': group_map(plan),
+        }
+        if plan.optimization:
+            trailer['optimization'] = plan.optimization
+        yield trailer
+
+    return records()
@@ -0,0 +1,257 @@
+# seating_app/incremental_allotment.py
+
+"""
+Incremental re-allotment: patches a previous /api/generate-allotment plan
+with late additions and withdrawals instead of recomputing it.
+
+    {
+      "previousPlan": {...},          # the earlier response, as returned
+      "roomConfigurations": [...],    # the same rooms the plan was made for
+      "studentsPerBench": 2,
+      "commonPaperGroups": "...",
+      "delta": {"added": {"21CS301": ["1XX21CS121"]}, "removed": {"21EC302": ["1XX21EC007"]}}
+    }
+
+Every bench that is not touched by the delta keeps its students in the same
+seat. Withdrawn students leave a "---" seat. Students without a seat (the
+added ones, then those the previous plan could not seat) go, in order:
+
+1. into a seat vacated by a student of their own seating group, which keeps
+   the column pattern of the original sticky pairing;
+2. into any other empty seat whose neighbours on the bench do not sit the
+   same paper;
+3. onto new benches after the last seated one, paired with the same sticky
+   pairing rules as a full allotment, as far as the rooms allow.
+
+The response is a full allotment response plus 'changed_rooms' (the rooms
+whose seating sheet has to be reprinted) and a 'delta_report'.
+"""
+
+from bisect import bisect_right
+from collections import defaultdict, deque
+
+from seating_app.engine import (
+    EMPTY_SEAT, AllotmentError, iter_room_arrangements, plan_rooms, seat_headers, seat_students, seating_groups,
+    total_bench_count,
+)
+
+
+def normalize_delta(entries):
+    """{subject: [usn, ...]} or [{usn, subjectCode}, ...] -> {SUBJECT: [USN, ...]}"""
+    students = defaultdict(list)
+    if isinstance(entries, dict):
+        entries = [{'usn': usn, 'subjectCode': subject} for subject, usns in entries.items() for usn in usns]
+    for entry in entries or []:
+        students[entry['subjectCode'].strip().upper()].append(entry['usn'].strip().upper())
+    return students
+
+
+def flatten_previous_plan(room_arrangements, students_per_bench):
+    """
+    The seat lists of a previous response in seating order (shared, not
+    copied), plus (room_name, bench count) per room.
+    """
+    seated_benches = []
+    room_bench_counts = []
+    for room in room_arrangements:
+        first = len(seated_benches)
+        for column in room['arrangement_by_column']:
+            seated_benches.extend(bench['seats'] for bench in column['seating_plan'])
+        room_bench_counts.append((room['room_name'], len(seated_benches) - first))
+    if any(len(seats) != students_per_bench for seats in seated_benches):
+        raise AllotmentError('The previous plan was made for a different number of students per bench.')
+    return seated_benches, room_bench_counts
+
+
+def check_rooms_match(room_plans, room_bench_counts):
+    if len(room_plans) != len(room_bench_counts):
+        raise AllotmentError('The previous plan does not match the room configuration.')
+    for index, ((room_name, benches_in_each_column), (previous_name, count)) in enumerate(zip(room_plans, room_bench_counts)):
+        capacity = sum(benches_in_each_column)
+        is_last = index == len(room_plans) - 1
+        if room_name != previous_name or count > capacity or (count < capacity and not is_last):
+            raise AllotmentError(f'The previous plan does not match the room configuration at room {previous_name}.')
+
+
+class VacantSeats:
+    """
+    The empty seats of a plan, handed out so that no two students of one
+    seating group sit side by side on a bench, as in sticky pairing, where a
+    bench of three holds A, B, A. `members(group)` returns the set of USNs in a
+    group; only the benches that are looked at are ever checked against it.
+    """
+
+    def __init__(self, seated_benches, members):
+        self.seated_benches = seated_benches
+        self.members = members
+        self.vacated = defaultdict(deque)
+        self.empty = [(b, p) for b, seats in enumerate(seated_benches) if EMPTY_SEAT in seats
+                      for p, usn in enumerate(seats) if usn == EMPTY_SEAT]
+        self.exhausted = set()
+
+    def vacate(self, bench, position, group):
+        self.vacated[group].append((bench, position))
+
+    def allowed(self, bench, position, group):
+        seats = self.seated_benches[bench]
+        if seats[position] != EMPTY_SEAT:
+            return False
+        members = self.members(group)
+        return not any(seats[p] in members for p in (position - 1, position + 1) if 0 <= p < len(seats))
+
+    def take(self, group):
+        """An empty (bench, position) for a student of `group`, or None."""
+        if not group or group in self.exhausted:
+            return None
+        vacated = self.vacated.get(group)
+        while vacated:
+            bench, position = vacated.popleft()
+            if self.allowed(bench, position, group):
+                return bench, position
+        for index, (bench, position) in enumerate(self.empty):
+            if self.allowed(bench, position, group):
+                del self.empty[index]
+                return bench, position
+        # Seats only ever get filled, so a group that found none never will.
+        self.exhausted.add(group)
+        return None
+
+
+def reallot(data):
+    """
+    Applies the delta in an incremental request to its previous plan.
+    Returns the response body. Raises AllotmentError for input the client has to fix.
+    Only the benches and rooms the delta touches are copied or rebuilt; the
+    previous plan itself is left unchanged.
+    """
+    try:
+        previous = data['previousPlan']
+        room_configurations = data['roomConfigurations']
+        students_per_bench = int(data['studentsPerBench'])
+        common_groups_str = data.get('commonPaperGroups', '')
+        delta = data.get('delta') or {}
+        added = normalize_delta(delta.get('added'))
+        removed = normalize_delta(delta.get('removed'))
+        previous_rooms = previous['room_arrangements']
+        seated_benches, room_bench_counts = flatten_previous_plan(previous_rooms, students_per_bench)
+        group_map = dict(previous['group_map'])
+        previous_unseated = previous.get('unseated_students') or {}
+        total_benches = total_bench_count(room_configurations)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise AllotmentError(f'Invalid or missing incremental input data: {e}')
+    if students_per_bench <= 0:
+        raise AllotmentError('Students per bench must be greater than 0.')
+
+    room_plans = plan_rooms(room_configurations, len(seated_benches))
+    check_rooms_match(room_plans, room_bench_counts)
+
+    groups = seating_groups(set(group_map) | set(added), common_groups_str)
+    report = {'added': 0, 'removed': 0, 'seated': 0, 'not_found': [], 'already_present': []}
+
+    withdrawn = {}
+    for subject, usns in removed.items():
+        present = set(group_map.get(subject, ()))
+        for usn in usns:
+            if usn in present and usn not in withdrawn:
+                withdrawn[usn] = groups[subject]
+                report['removed'] += 1
+            elif usn not in withdrawn:
+                report['not_found'].append(usn)
+        if subject in group_map:
+            group_map[subject] = [usn for usn in group_map[subject] if usn not in withdrawn]
+
+    # Students waiting for a seat: the added ones first, then those the previous plan left unseated.
+    waiting = []
+    for subject, usns in added.items():
+        group_map[subject] = list(group_map.get(subject, ()))
+        present = set(group_map[subject])
+        for usn in usns:
+            if usn in present:
+                report['already_present'].append(usn)
+                continue
+            present.add(usn)
+            group_map[subject].append(usn)
+            waiting.append((usn, groups[subject]))
+            report['added'] += 1
+    for group, usns in previous_unseated.items():
+        waiting.extend((usn, group) for usn in usns if usn not in withdrawn)
+
+    member_sets = {}
+
+    def members(group):
+        if group not in member_sets:
+            member_sets[group] = {usn for subject, usns in group_map.items() if groups.get(subject) == group for usn in usns}
+        return member_sets[group]
+
+    touched = set()
+
+    def patch(bench, position, usn):
+        if bench not in touched:
+            seated_benches[bench] = list(seated_benches[bench])
+            touched.add(bench)
+        seated_benches[bench][position] = usn
+
+    vacancies = VacantSeats(seated_benches, members)
+    if withdrawn:
+        for b, seats in enumerate(seated_benches):
+            if not withdrawn.keys().isdisjoint(seats):
+                for p, usn in enumerate(seats):
+                    if usn in withdrawn:
+                        patch(b, p, EMPTY_SEAT)
+                        vacancies.vacate(b, p, withdrawn[usn])
+                        vacancies.empty.append((b, p))
+        vacancies.empty.sort()
+
+    leftover = defaultdict(list)
+    for usn, group in waiting:
+        seat = vacancies.take(group)
+        if seat is None:
+            leftover[group].append(usn)
+        else:
+            patch(seat[0], seat[1], usn)
+            report['seated'] += 1
+
+    first_new_bench = len(seated_benches)
+    new_benches, unseated = seat_students(leftover, students_per_bench, total_benches - first_new_bench)
+    seated_benches.extend(new_benches)
+    touched.update(range(first_new_bench, len(seated_benches)))
+    report['seated'] += sum(len(students) - len(unseated.get(group, ())) for group, students in leftover.items())
+
+    room_plans = plan_rooms(room_configurations, len(seated_benches))
+    changed = changed_room_indexes(room_plans, touched)
+    return {
+        'status': 'success',
+        'student_seat_headers': seat_headers(students_per_bench),
+        'room_arrangements': room_arrangements(previous_rooms, seated_benches, room_plans, changed),
+        'skipped_students': previous.get('skipped_students', {}),
+        'unseated_students': {group: sorted(students) for group, students in unseated.items()},
+        'group_map': group_map,
+        'changed_rooms': [room_plans[index][0] for index in changed],
+        'delta_report': report,
+    }
+
+
+def changed_room_indexes(room_plans, touched_benches):
+    """Indexes of the rooms holding any of the touched bench indexes, in room order."""
+    starts = []
+    offset = 0
+    for _, benches_in_each_column in room_plans:
+        starts.append(offset)
+        offset += sum(benches_in_each_column)
+    return sorted({bisect_right(starts, bench) - 1 for bench in touched_benches})
+
+
+def room_arrangements(previous_rooms, seated_benches, room_plans, changed):
+    """The previous room arrangements, with the changed rooms laid out again."""
+    rooms = list(previous_rooms)
+    start = sum(sum(columns) for _, columns in room_plans[:changed[0]]) if changed else 0
+    for index in range(changed[0] if changed else len(rooms), len(room_plans)):
+        capacity = sum(room_plans[index][1])
+        if index in changed:
+            room = next(iter_room_arrangements(seated_benches[start:start + capacity], [room_plans[index]]), None)
+            if index < len(rooms):
+                rooms[index] = room
+            else:
+                rooms.append(room)
+        start += capacity
+    return [room for room in rooms if room is not None]
@@ -0,0 +1,238 @@
+# seating_app/instrumentation.py
+
+"""
+Hot-path instrumentation for the allotment API.
+
+- PhaseTimer records how long each phase of one request took; the API sends
+  the durations back in a Server-Timing header.
+- Counter, Gauge and Histogram are minimal thread-safe Prometheus metrics,
+  rendered in the text exposition format by Registry.render().
+- ProfileStore keeps the last few cProfile captures as text reports, in an
+  SQLite database (PROFILES_DB) every worker process opens, so any worker
+  can serve a report another one captured.
+
+Nothing in here depends on Flask, so the engine can be handed a PhaseTimer
+from a script as well.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class PhaseTimer:
+    """Wall-clock seconds spent in each named phase of one request, in the order the phases first ran."""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def server_timing(self, **extra):
+        """Server-Timing header value; `extra` adds phases measured elsewhere (name=seconds)."""
+        phases = dict(self.phases, **extra)
+        return ', '.join(f'{name};dur={seconds * 1000:.2f}' for name, seconds in phases.items())
+
+
+class NullTimer:
+    """Stands in for a PhaseTimer when nobody is measuring."""
+
+    def phase(self, name):
+        return nullcontext()
+
+
+NULL_TIMER = NullTimer()
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def label_values(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} takes the labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """(metric name, {label: value}, value) for every exposed sample."""
+        return []
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(f'{name}{format_labels(labels)} {format_value(value)}' for name, labels, value in self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self.label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in values]
+
+
+class Gauge(Metric):
+    """A value read when the metrics are scraped, from `read()`."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, read):
+        super().__init__(name, help_text)
+        self.read = read
+
+    def samples(self):
+        return [(self.name, {}, self.read())]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = self.label_values(labels)
+        with self._lock:
+            counts, total = self._values.get(key, (None, 0.0))
+            if counts is None:
+                counts = [0] * len(self.buckets)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, list(counts), total) for key, (counts, total) in self._values.items())
+        samples = []
+        for key, counts, total in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append((f'{self.name}_bucket', dict(labels, le=format_value(bound)), cumulative))
+            samples.append((f'{self.name}_sum', labels, total))
+            samples.append((f'{self.name}_count', labels, cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        return '\n'.join(metric.render() for metric in self.metrics) + '\n'
+
+
+def exponential_buckets(start, factor, count):
+    return [start * factor ** i for i in range(count)]
+
+
+_PROFILES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    report TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_created ON profiles (created_at);
+"""
+
+
+def default_profiles_db_path():
+    return os.environ.get('PROFILES_DB') or os.path.join(tempfile.gettempdir(), 'exam-profiles.sqlite3')
+
+
+class ProfileStore:
+    """The text reports of the last `max_entries` cProfile captures, by ID, shared by every process that opens the database."""
+
+    def __init__(self, db_path=None, max_entries=16, report_lines=60):
+        self.db_path = db_path or default_profiles_db_path()
+        self.max_entries = max_entries
+        self.report_lines = report_lines
+        self._local = threading.local()
+
+    def connection(self):
+        # sqlite3 connections stay in the thread that opened them.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(_PROFILES_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def save(self, profile, title=''):
+        out = io.StringIO()
+        if title:
+            out.write(title + '\n\n')
+        pstats.Stats(profile, stream=out).sort_stats('cumulative').print_stats(self.report_lines)
+        profile_id = uuid.uuid4().hex
+        connection = self.connection()
+        connection.execute('INSERT INTO profiles (id, created_at, report) VALUES (?, ?, ?)', (profile_id, time.time(), out.getvalue()))
+        connection.execute('DELETE FROM profiles WHERE id NOT IN (SELECT id FROM profiles ORDER BY created_at DESC LIMIT ?)',
+                           (self.max_entries,))
+        return profile_id
+
+    def get(self, profile_id):
+        row = self.connection().execute('SELECT report FROM profiles WHERE id = ?', (profile_id,)).fetchone()
+        return row and row[0]
+
+
+def start_profile():
+    """A running cProfile.Profile, or None when another profiler is already active (one per process)."""
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        return None
+    return profile
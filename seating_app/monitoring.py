@@ -0,0 +1,52 @@
+# seating_app/monitoring.py
+
+"""Request instrumentation: Server-Timing phases, Prometheus metrics and on-demand cProfile captures."""
+
+import time
+
+from flask import Blueprint, current_app, g, jsonify, request
+
+from seating_app.instrumentation import PROMETHEUS_MIMETYPE, PhaseTimer, start_profile
+from seating_app.services import services
+
+blueprint = Blueprint('monitoring', __name__)
+
+
+@blueprint.before_app_request
+def start_request_instrumentation():
+    g.request_started = time.perf_counter()
+    g.timer = PhaseTimer()
+    wants_profile = services().profiling_enabled and request.headers.get('X-Profile', '').lower() in ('1', 'true')
+    g.profile = start_profile() if wants_profile else None
+
+
+@blueprint.after_app_request
+def finish_request_instrumentation(response):
+    """Records the request latency, adds Server-Timing and stores the cProfile capture, if any."""
+    state = services()
+    elapsed = time.perf_counter() - g.request_started
+    if g.profile is not None:
+        g.profile.disable()
+        title = f'{request.method} {request.full_path.rstrip("?")} -> {response.status_code} in {elapsed * 1000:.1f} ms'
+        response.headers['X-Profile-Id'] = state.profile_store.save(g.profile, title)
+    if g.timer.phases:
+        response.headers['Server-Timing'] = g.timer.server_timing(total=elapsed)
+        for phase, seconds in g.timer.phases.items():
+            state.phase_latency.observe(seconds, phase=phase)
+    state.request_latency.observe(elapsed, endpoint=request.endpoint or 'unmatched', method=request.method, status=response.status_code)
+    return response
+
+
+@blueprint.route('/metrics', methods=['GET'])
+def metrics_api():
+    """Prometheus text exposition of the request, phase, size and cache metrics."""
+    return current_app.response_class(services().metrics.render(), content_type=PROMETHEUS_MIMETYPE)
+
+
+@blueprint.route('/api/profiles/<profile_id>', methods=['GET'])
+def profile_api(profile_id):
+    """The cProfile report of a request sent with 'X-Profile: 1' (see its 'X-Profile-Id' header)."""
+    report = services().profile_store.get(profile_id)
+    if report is None:
+        return jsonify({'status': 'error', 'message': f"Unknown profile ID '{profile_id}'."}), 404
+    return current_app.response_class(report, mimetype='text/plain')
@@ -0,0 +1,200 @@
+# seating_app/multi_centre.py
+
+"""
+Multi-centre allotment for /api/generate-allotment-centres.
+
+A single allotment fills the rooms in catalogue order, so with the rooms of
+several exam centres in one list the first centres are packed with the
+largest subjects and the last ones are left half empty. Here every room
+names its centre:
+
+    {"name": "Room 101", "benches": 30, "classColumns": 3, "centre": "North Campus"}
+
+and a coordinator
+
+1. splits every subject's students, in sorted order and contiguous blocks,
+   across the centres in proportion to their seats (benches x
+   studentsPerBench), keeping each centre's running total as close to its
+   share as whole students allow;
+2. runs an ordinary sticky-pairing allotment for each centre, with the
+   common paper groups merged inside the centre, one centre per task in the
+   shared process pool;
+3. merges the centres' rooms, each tagged with its 'centre', into one body
+   of the /api/generate-allotment shape, plus a 'centres' summary.
+
+Workers send their rooms back already encoded as JSON, as batch sessions
+do, so the coordinator does no per-seat work.
+
+Every centre gets its share of the seats, not of the benches sticky pairing
+can fill: a centre whose share pairs badly can still leave students without
+a seat. They are reported in 'unseated_students' as usual.
+
+A centre whose worker process dies is left out of the rooms and reported
+under 'errors'; the response then has the status 'partial'.
+"""
+
+from collections import Counter, namedtuple
+
+from seating_app.batch_allotment import encode_json
+from seating_app.capacity_planner import room_bench_counts
+from seating_app.engine import (
+    EMPTY_ID, AllotmentError, compute_allotment, normalize_allotment_input, room_layouts, seat_headers,
+    subject_student_lists, unseated_students,
+)
+from seating_app.usn_ranges import as_usn_list
+from seating_app.worker_pool import WORKER_LOST_MESSAGE, map_items
+
+# The coordinator's split: the centres in order of first appearance with their seats and
+# assigned students, the sorted student lists per subject, and one
+# (centre, payload, student_groups) job per centre that got students.
+CentreSplit = namedtuple('CentreSplit', ['students_per_bench', 'skipped_students', 'subjects', 'centres', 'seats', 'rooms', 'assigned', 'jobs'])
+
+# Keys of an allotment payload the coordinator consumes instead of passing them on to the centres.
+COORDINATOR_KEYS = ('roomConfigurations', 'combinedStudentData', 'rosterId', 'skippedStudentsReport')
+
+
+def proportional_shares(sizes, capacities):
+    """
+    Splits every size across the centres in proportion to `capacities`.
+    Returns one list of per-centre counts per size. Each size is split by
+    largest remainder, the leftover students going to the centres furthest
+    behind their share of everything split so far, so the centre totals stay
+    proportional as well as every subject.
+    """
+    total_capacity = sum(capacities)
+    # Running totals, scaled by total_capacity to stay in integers.
+    assigned = [0] * len(capacities)
+    targets = [0] * len(capacities)
+    shares = []
+    for size in sizes:
+        share = [size * capacity // total_capacity for capacity in capacities]
+        for centre, capacity in enumerate(capacities):
+            targets[centre] += size * capacity
+        behind = sorted(range(len(capacities)), key=lambda centre: ((assigned[centre] + share[centre]) * total_capacity - targets[centre], centre))
+        for centre in behind[:size - sum(share)]:
+            share[centre] += 1
+        for centre, count in enumerate(share):
+            assigned[centre] += count
+        shares.append(share)
+    return shares
+
+
+def split_centres(data, student_groups=None):
+    """
+    Validates a multi-centre payload and splits the students across the
+    centres. `student_groups` stands in for 'combinedStudentData' as in
+    compute_allotment(). Returns a CentreSplit. Raises AllotmentError.
+    """
+    room_configurations, students_per_bench, common_groups_str, combined_student_data, skipped_students_report = normalize_allotment_input(data, student_groups)
+    centre_configurations = {}
+    seats = Counter()
+    for room_config, (room_name, benches) in zip(room_configurations, room_bench_counts(room_configurations)):
+        centre = str(room_config.get('centre') or '').strip()
+        if not centre:
+            raise AllotmentError(f"No 'centre' given for room {room_name}. Every room needs one in a multi-centre allotment.")
+        centre_configurations.setdefault(centre, []).append(room_config)
+        seats[centre] += benches * students_per_bench
+
+    subjects, skipped_students_report = subject_student_lists(combined_student_data, skipped_students_report, student_groups)
+    for students in subjects.values():
+        students.sort()
+    centres = list(centre_configurations)
+    shares = proportional_shares([len(students) for students in subjects.values()], [seats[centre] for centre in centres])
+
+    shared_payload = {key: value for key, value in data.items() if key not in COORDINATOR_KEYS}
+    first = dict.fromkeys(subjects, 0)
+    jobs = []
+    assigned = Counter()
+    for index, centre in enumerate(centres):
+        groups = {}
+        for (subject, students), share in zip(subjects.items(), shares):
+            if share[index]:
+                groups[subject] = students[first[subject]:first[subject] + share[index]]
+                first[subject] += share[index]
+                assigned[centre] += share[index]
+        if groups:
+            jobs.append((centre, dict(shared_payload, roomConfigurations=centre_configurations[centre]), groups))
+
+    return CentreSplit(students_per_bench, skipped_students_report, subjects, centres, seats,
+                       {centre: len(configurations) for centre, configurations in centre_configurations.items()}, assigned, jobs)
+
+
+def allot_centre(job):
+    """
+    Worker entry point: (centre, payload, student_groups) -> (centre, outcome, error).
+    The outcome is (rooms as comma-joined JSON, centre summary, unseated students).
+    """
+    centre, payload, student_groups = job
+    try:
+        plan = compute_allotment(payload, student_groups)
+    except AllotmentError as e:
+        return centre, None, str(e)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return centre, None, f'Invalid allotment data: {e}'
+    seated_benches = plan.seated_benches
+    rooms = [encode_json(dict(room.arrangement(seated_benches), centre=centre)) for room in room_layouts(plan.room_plans, len(seated_benches))]
+    summary = {
+        'rooms_used': len(rooms),
+        'benches_used': len(seated_benches),
+        'seated_students': len(seated_benches.ids) - seated_benches.ids.count(EMPTY_ID),
+    }
+    if plan.optimization:
+        summary['optimization'] = plan.optimization
+    return centre, (','.join(rooms), summary, unseated_students(plan)), None
+
+
+def run_centres(jobs):
+    """
+    Allots every centre job, in parallel when there are several workers.
+    Returns ({centre: outcome}, {centre: error}), the errors being the centres
+    whose worker process died. Raises AllotmentError naming the first centre
+    whose input failed.
+    """
+    outcomes, lost = {}, {}
+    for centre, outcome, error in map_items(allot_centre, jobs, lambda job: (job[0], None, WORKER_LOST_MESSAGE)):
+        if error == WORKER_LOST_MESSAGE:
+            lost[centre] = error
+        elif error is not None:
+            raise AllotmentError(f'Centre {centre}: {error}')
+        else:
+            outcomes[centre] = outcome
+    return outcomes, lost
+
+
+def centres_response_body(split, outcomes, errors=None):
+    """
+    The merged response as JSON bytes, encoded like jsonify() outside debug mode.
+    A centre in `errors` gets its message in its summary and under 'errors'.
+    """
+    errors = errors or {}
+    unseated = {}
+    centres = []
+    for centre in split.centres:
+        summary = {'centre': centre, 'rooms': split.rooms[centre], 'seats': split.seats[centre], 'students': split.assigned[centre],
+                   'rooms_used': 0, 'benches_used': 0, 'seated_students': 0}
+        if centre in outcomes:
+            _, centre_summary, centre_unseated = outcomes[centre]
+            summary.update(centre_summary)
+            for group, students in centre_unseated.items():
+                unseated.setdefault(group, []).extend(students)
+        elif centre in errors:
+            summary['error'] = errors[centre]
+        summary['unseated_students'] = summary['students'] - summary['seated_students']
+        centres.append(summary)
+
+    fields = {
+        'status': ('partial' if outcomes else 'error') if errors else 'success',
+        'student_seat_headers': seat_headers(split.students_per_bench),
+        'skipped_students': split.skipped_students,
+        'unseated_students': {group: sorted(students) for group, students in unseated.items()},
+        'group_map': {subject: students if isinstance(students, list) else as_usn_list(students) for subject, students in split.subjects.items()},
+        'centres': centres,
+    }
+    if errors:
+        fields['errors'] = errors
+    room_arrangements = ','.join(outcomes[centre][0] for centre in split.centres if centre in outcomes and outcomes[centre][0])
+    members = []
+    for key in sorted([*fields, 'room_arrangements']):
+        value = f'[{room_arrangements}]' if key == 'room_arrangements' else encode_json(fields[key])
+        members.append(f'{encode_json(key)}:{value}')
+    return ('{' + ','.join(members) + '}\n').encode('utf-8')
@@ -0,0 +1,165 @@
+# seating_app/paged_results.py
+
+"""
+Allotment results kept on the server for paged retrieval.
+
+/api/generate-allotment?view=paged (branches.py) stores the computed plan
+under a result ID and answers with a summary only: the seat headers, the
+skipped and unseated students, and the outline of every room (name and
+benches per column). The results view then fetches the rooms a page at a
+time, or one room with a bench range, as they scroll into view, so the
+first response and every page stay the same size however large the plan.
+
+What is stored is the compact plan (the seat IDs as raw bytes, the USNs
+once each, and the room layouts), not the response; a page's arrangements
+are built from it when the page is asked for. Results live in an SQLite
+database (RESULTS_DB) that every worker process opens, so any worker can
+answer for a result another one computed. Each process keeps the results
+it has read decoded in a ResultCache, as a stored result never changes.
+Results are deleted RESULT_TTL seconds after they were computed.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from array import array
+
+from seating_app.engine import ColumnLayout, RoomLayout, SeatMatrix, UsnTable
+from seating_app.result_cache import ResultCache
+
+MAX_PAGE_ROOMS = 50
+MAX_PAGE_BENCHES = 2000
+RESULT_TTL_SECONDS = int(os.environ.get('RESULT_TTL') or 30 * 60)
+# Largest encoded result kept; a larger plan is answered in full instead.
+MAX_RESULT_BYTES = 256 * 2**20
+# Bytes a decoded result is charged per student: its seat ID, plus its USN once pages have been read.
+BYTES_PER_STUDENT = 96
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    document TEXT NOT NULL,
+    seat_ids BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_created ON results (created_at);
+"""
+
+
+def default_db_path():
+    return os.environ.get('RESULTS_DB') or os.path.join(tempfile.gettempdir(), 'exam-paged-results.sqlite3')
+
+
+class PagedResult:
+    """A computed plan held for paging: the seated benches, their RoomLayouts and the response fields outside the rooms."""
+
+    __slots__ = ('seated_benches', 'rooms', 'fields')
+
+    def __init__(self, seated_benches, rooms, fields):
+        self.seated_benches = seated_benches
+        self.rooms = rooms
+        self.fields = fields
+
+    def nbytes(self):
+        """An estimate of the memory the result holds, for the store's byte bound."""
+        return len(self.seated_benches.ids) * self.seated_benches.ids.itemsize + len(self.seated_benches.table) * BYTES_PER_STUDENT
+
+    def summary(self, result_id):
+        outlines = []
+        for room in self.rooms:
+            outlines.append({
+                'room_name': room.name,
+                'benches': room.bench_count(),
+                'columns': [{'name': f'Column {column.number} ({column.benches} Benches)', 'benches': column.benches} for column in room.columns],
+            })
+        return dict(self.fields, status='success', result_id=result_id, room_count=len(self.rooms), rooms=outlines)
+
+    def room_page(self, offset, limit):
+        """The arrangements of `limit` rooms from `offset` on."""
+        return [room.arrangement(self.seated_benches) for room in self.rooms[offset:offset + limit]]
+
+    def room_benches(self, index, start, count):
+        """The arrangement of `count` benches of room `index`, from its `start`-th bench (0-based) on."""
+        return self.rooms[index].arrangement(self.seated_benches, start, start + count)
+
+    def full_response(self):
+        """The whole response, as the default /api/generate-allotment answers it."""
+        return dict(self.fields, status='success', room_arrangements=self.room_page(0, len(self.rooms)))
+
+    def encode(self):
+        """(JSON document, seat ID bytes) to store."""
+        matrix = self.seated_benches
+        document = {
+            'fields': self.fields,
+            'students_per_bench': matrix.students_per_bench,
+            'usns': matrix.table.lookup[:-1],
+            'rooms': [[room.name, [[column.number, column.first_bench, column.benches, column.first_number] for column in room.columns]]
+                      for room in self.rooms],
+        }
+        return json.dumps(document, separators=(',', ':')), matrix.ids.tobytes()
+
+    @classmethod
+    def decode(cls, document, seat_ids):
+        document = json.loads(document)
+        ids = array('i')
+        ids.frombytes(seat_ids)
+        seated_benches = SeatMatrix(ids, document['students_per_bench'], UsnTable([document['usns']]))
+        rooms = [RoomLayout(name, [ColumnLayout(*column) for column in columns]) for name, columns in document['rooms']]
+        return cls(seated_benches, rooms, document['fields'])
+
+
+class PagedResultStore:
+    """Results by ID in one SQLite database, shared by every process that opens it."""
+
+    def __init__(self, db_path=None, ttl_seconds=RESULT_TTL_SECONDS):
+        self.db_path = db_path or default_db_path()
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._decoded = ResultCache(max_entries=32, max_bytes=512 * 2**20, ttl_seconds=ttl_seconds, size=PagedResult.nbytes)
+
+    def connection(self):
+        # sqlite3 connections stay in the thread that opened them.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def put(self, result):
+        """Stores a PagedResult. Returns its ID, or None when it is too large to keep."""
+        document, seat_ids = result.encode()
+        if len(document) + len(seat_ids) > MAX_RESULT_BYTES:
+            return None
+        result_id = uuid.uuid4().hex
+        now = time.time()
+        connection = self.connection()
+        connection.execute('DELETE FROM results WHERE created_at < ?', (now - self.ttl_seconds,))
+        connection.execute('INSERT INTO results (id, created_at, document, seat_ids) VALUES (?, ?, ?, ?)',
+                           (result_id, now, document, seat_ids))
+        self._decoded.put(result_id, result)
+        return result_id
+
+    def get(self, result_id):
+        """The PagedResult stored under `result_id`, or None for an unknown or expired ID."""
+        result = self._decoded.get(result_id)
+        if result is None:
+            row = self.connection().execute('SELECT document, seat_ids FROM results WHERE id = ? AND created_at >= ?',
+                                            (result_id, time.time() - self.ttl_seconds)).fetchone()
+            if row is None:
+                return None
+            result = PagedResult.decode(*row)
+            self._decoded.put(result_id, result)
+        return result
+
+
+def page_bounds(args, default_limit, max_limit, offset_name='offset', limit_name='limit'):
+    """(offset, limit) from query arguments, clamped to 0..max_limit. Raises ValueError for non-numbers."""
+    offset = max(int(args.get(offset_name, 0)), 0)
+    limit = min(max(int(args.get(limit_name, default_limit)), 0), max_limit)
+    return offset, limit
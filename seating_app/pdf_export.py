@@ -0,0 +1,459 @@
+# seating_app/pdf_export.py
+
+"""
+Server-side PDF export of an allotment result.
+
+Produces the same two documents as the jsPDF/AutoTable export in
+final_index.html, with the same page sizes, positions, fonts, colours and
+table styles:
+
+- room layouts (A4 landscape): one page per room with the room title and one
+  grid table per column side by side, plus the per-branch room summary line
+  (exportRoomLayoutsToPdf);
+- summary report (A4 portrait): skipped and unseated students as striped
+  tables (exportSummaryReport).
+
+The PDF is written directly, using the standard Helvetica fonts that jsPDF
+uses, so there is no PDF library to install. Tables follow the AutoTable
+rules the browser export relies on: default 5pt cell padding and 40pt page
+margins, 1.15 line height, 'auto' column widths, line breaking and a repeated
+header row when a table runs onto a new page.
+
+Rooms are rendered independently, on the shared worker pool when there are
+many of them; a room whose worker process dies is rendered again in the
+request thread. Every room is checked before the first byte is sent, so a
+malformed result is a 400, never a truncated PDF.
+"""
+
+import zlib
+
+from seating_app.engine import EMPTY_SEAT
+from seating_app.worker_pool import map_items, worker_count
+
+PT_PER_MM = 72 / 25.4
+A4_PORTRAIT = (210.0, 297.0)
+A4_LANDSCAPE = (297.0, 210.0)
+FONT_ROW_RATIO = 1.15
+DEFAULT_CELL_PADDING = 5 / PT_PER_MM
+DEFAULT_MARGIN = 40 / PT_PER_MM
+PDF_MIMETYPE = 'application/pdf'
+REPORTS = {'room-layouts': 'classroom-seating-layouts.pdf', 'summary': 'summary-report.pdf'}
+
+# Rooms rendered in the request thread before the worker pool is worth its overhead.
+PARALLEL_MIN_ROOMS = 8
+
+# Advance widths (1/1000 em) of the standard Helvetica fonts for ' ' .. '~'.
+HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+HELVETICA_BOLD_WIDTHS = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+
+
+class PdfExportError(ValueError):
+    """The export request cannot be rendered. The message is safe to send back to the client."""
+
+
+# AutoTable's defaults and the two themes the browser export uses.
+DEFAULT_STYLE = {'font_size': 10, 'bold': False, 'padding': DEFAULT_CELL_PADDING, 'fill': None,
+                 'text_color': 20, 'line_color': 200, 'line_width': 0, 'cell_width': None}
+THEMES = {
+    'grid': {'table': {'fill': 255, 'text_color': 80, 'line_width': 0.1},
+             'head': {'text_color': 255, 'fill': (26, 188, 156), 'bold': True, 'line_width': 0},
+             'alternate': {}},
+    'striped': {'table': {'fill': 255, 'text_color': 80},
+                'head': {'text_color': 255, 'fill': (41, 128, 185), 'bold': True},
+                'alternate': {'fill': 245}},
+}
+
+
+def text_width(text, font_size, bold=False):
+    """Width of `text` in mm at `font_size` pt."""
+    widths = HELVETICA_BOLD_WIDTHS if bold else HELVETICA_WIDTHS
+    units = sum(widths[ord(c) - 32] if 32 <= ord(c) <= 126 else 556 for c in text)
+    return units * font_size / 1000 / PT_PER_MM
+
+
+def split_text(text, max_width, font_size, bold=False):
+    """Breaks `text` into lines no wider than `max_width` mm, at spaces where possible (like jsPDF's splitTextToSize)."""
+    lines = []
+    for paragraph in str(text).split('\n'):
+        line = ''
+        for word in paragraph.split(' '):
+            candidate = f'{line} {word}' if line else word
+            if text_width(candidate, font_size, bold) <= max_width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            line = ''
+            while text_width(word, font_size, bold) > max_width and len(word) > 1:
+                cut = len(word) - 1
+                while cut > 1 and text_width(word[:cut], font_size, bold) > max_width:
+                    cut -= 1
+                lines.append(word[:cut])
+                word = word[cut:]
+            line = word
+        lines.append(line)
+    return lines
+
+
+def pdf_string(text):
+    data = str(text).encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def rgb(color):
+    if isinstance(color, (int, float)):
+        color = (color, color, color)
+    return ' '.join(f'{c / 255:.3f}' for c in color)
+
+
+class Page:
+    """One page of drawing operators, in jsPDF's top-left millimetre coordinates."""
+
+    def __init__(self, size):
+        self.width, self.height = size
+        self.ops = []
+
+    def rect(self, x, y, w, h, fill=None, line_width=0, line_color=200):
+        k = PT_PER_MM
+        stroke = line_width > 0
+        if fill is None and not stroke:
+            return
+        if fill is not None:
+            self.ops.append(f'{rgb(fill)} rg')
+        if stroke:
+            self.ops.append(f'{line_width * k:.2f} w {rgb(line_color)} RG')
+        self.ops.append(f'{x * k:.2f} {(self.height - y - h) * k:.2f} {w * k:.2f} {h * k:.2f} re '
+                        + ('B' if fill is not None and stroke else 'f' if fill is not None else 'S'))
+
+    def text(self, x, y, text, font_size, bold=False, color=0, align='left'):
+        if align == 'center':
+            x -= text_width(text, font_size, bold) / 2
+        k = PT_PER_MM
+        self.ops.append(f'BT /{"F2" if bold else "F1"} {font_size:g} Tf {rgb(color)} rg '
+                        f'{x * k:.2f} {(self.height - y) * k:.2f} Td {pdf_string(text).decode("latin-1")} Tj ET')
+
+    def content(self):
+        return zlib.compress('\n'.join(self.ops).encode('latin-1'))
+
+
+class Document:
+    """The pages of one document part. Like jsPDF, drawing goes to the last page added."""
+
+    def __init__(self, size):
+        self.size = size
+        self.pages = [Page(size)]
+
+    @property
+    def page(self):
+        return self.pages[-1]
+
+    def add_page(self):
+        self.pages.append(Page(self.size))
+
+
+def resolve_style(*layers):
+    style = dict(DEFAULT_STYLE)
+    for layer in layers:
+        style.update(layer or {})
+    return style
+
+
+def fit_column_widths(columns, available):
+    """
+    AutoTable's 'auto' table width: columns without a fixed width are grown or
+    shrunk in proportion to their content width, never below their longest word.
+    `columns` holds (fixed_width or None, min_width, content_width).
+    """
+    widths = [fixed if fixed is not None else content for fixed, _, content in columns]
+    resizable = [i for i, (fixed, _, _) in enumerate(columns) if fixed is None]
+    while resizable:
+        total = sum(widths[i] for i in resizable)
+        difference = available - sum(widths)
+        if abs(difference) < 1e-6 or total <= 0:
+            break
+        clamped = []
+        for i in resizable:
+            widths[i] += difference * widths[i] / total
+            if widths[i] < columns[i][1]:
+                widths[i] = columns[i][1]
+                clamped.append(i)
+        if not clamped:
+            break
+        resizable = [i for i in resizable if i not in clamped]
+    return widths
+
+
+def draw_table(doc, head, body, start_y, theme='grid', head_styles=None, body_styles=None, column_styles=None,
+               margin_left=DEFAULT_MARGIN, margin_right=DEFAULT_MARGIN):
+    """Draws a table the way jspdf-autotable does. Returns its final y on the page it ends on."""
+    theme = THEMES[theme]
+    column_styles = column_styles or {}
+    rows = [('head', [str(cell) for cell in head])] + [('body', [str(cell) for cell in row]) for row in body]
+    row_styles = []
+    for index, (section, cells) in enumerate(rows):
+        styles = []
+        for column in range(len(cells)):
+            if section == 'head':
+                styles.append(resolve_style(theme['table'], theme['head'], head_styles, {'cell_width': column_styles.get(column, {}).get('cell_width')}))
+            else:
+                # AutoTable shades the first body row and every other one after it.
+                alternate = theme['alternate'] if index % 2 == 1 else None
+                styles.append(resolve_style(theme['table'], alternate, body_styles, column_styles.get(column)))
+        row_styles.append(styles)
+
+    column_count = max(len(cells) for _, cells in rows)
+    columns = []
+    for column in range(column_count):
+        fixed, min_width, content_width = None, 0, 0
+        for (_, cells), styles in zip(rows, row_styles):
+            if column >= len(cells):
+                continue
+            style = styles[column]
+            padding = 2 * style['padding']
+            fixed = style['cell_width'] if style['cell_width'] is not None else fixed
+            lines = cells[column].split('\n')
+            content_width = max(content_width, max(text_width(line, style['font_size'], style['bold']) for line in lines) + padding)
+            longest_word = max((text_width(word, style['font_size'], style['bold']) for line in lines for word in line.split(' ')), default=0)
+            min_width = max(min_width, longest_word + padding)
+        columns.append((fixed, min_width, content_width))
+    widths = fit_column_widths(columns, doc.size[0] - margin_left - margin_right)
+
+    laid_out = []
+    for (section, cells), styles in zip(rows, row_styles):
+        row_cells = []
+        height = 0
+        for column, text in enumerate(cells):
+            style = styles[column]
+            lines = split_text(text, widths[column] - 2 * style['padding'], style['font_size'], style['bold'])
+            row_cells.append((lines, style))
+            height = max(height, len(lines) * style['font_size'] / PT_PER_MM * FONT_ROW_RATIO + 2 * style['padding'])
+        laid_out.append((section, row_cells, height))
+
+    head_row = laid_out[0]
+    page_bottom = doc.size[1] - DEFAULT_MARGIN
+    y = start_y
+    y = draw_row(doc.page, head_row, widths, margin_left, y)
+    for row in laid_out[1:]:
+        if y + row[2] > page_bottom:
+            doc.add_page()
+            y = draw_row(doc.page, head_row, widths, margin_left, DEFAULT_MARGIN)
+        y = draw_row(doc.page, row, widths, margin_left, y)
+    return y
+
+
+def draw_row(page, row, widths, x, y):
+    _, cells, height = row
+    for (lines, style), width in zip(cells, widths):
+        page.rect(x, y, width, height, style['fill'], style['line_width'], style['line_color'])
+        font_mm = style['font_size'] / PT_PER_MM
+        baseline = y + style['padding'] + font_mm * (2 - FONT_ROW_RATIO)
+        for line in lines:
+            if line:
+                page.text(x + style['padding'], baseline, line, style['font_size'], style['bold'], style['text_color'])
+            baseline += font_mm * FONT_ROW_RATIO
+        x += width
+    return y + height
+
+
+def branch_prefix_map(branch_details):
+    """{prefix: BRANCH NAME} from the form's branches, as exportRoomLayoutsToPdf builds it."""
+    prefixes = {}
+    for branch in branch_details or []:
+        name = str(branch.get('name') or '').strip().upper()
+        prefix = str(branch.get('prefix') or '').strip()
+        if name and prefix:
+            prefixes[prefix] = name
+    return prefixes
+
+
+def room_branch_counts(room, prefixes=None, usn_subjects=None):
+    """
+    Students per branch in one room: by USN prefix when branch prefixes are
+    known, else by subject code from the result's 'group_map'.
+    """
+    counts = {}
+    for column in room['arrangement_by_column']:
+        for bench in column['seating_plan']:
+            for usn in bench['seats']:
+                if not usn or usn == EMPTY_SEAT:
+                    continue
+                if prefixes:
+                    branch = next((name for prefix, name in prefixes.items() if usn.startswith(prefix)), None)
+                else:
+                    branch = usn_subjects.get(usn) if usn_subjects else None
+                if branch is not None:
+                    counts[branch] = counts.get(branch, 0) + 1
+    return counts
+
+
+def check_room(room):
+    """Raises KeyError or TypeError for a room render_room cannot draw."""
+    if 'room_name' not in room:
+        raise KeyError('room_name')
+    for column in room['arrangement_by_column']:
+        for bench in column['seating_plan']:
+            if 'bench_number' not in bench:
+                raise KeyError('bench_number')
+            if not isinstance(bench['seats'], list):
+                raise TypeError(f"the seats of bench {bench['bench_number']} are not a list")
+
+
+def render_room(job):
+    """Worker entry point: (room, seat_headers, branch_counts) -> compressed content streams of the room's pages."""
+    room, seat_headers, branch_counts = job
+    doc = Document(A4_LANDSCAPE)
+    page_width, page_height = A4_LANDSCAPE
+    margin = 10
+    doc.page.text(page_width / 2, margin + 5, f"CLASS ROOM NUMBER: {room['room_name']}", 18, bold=True, align='center')
+
+    max_final_y = margin + 12
+    columns = room['arrangement_by_column']
+    column_width = (page_width - 2 * margin) / len(columns) if columns else 0
+    head = ['Bench'] + [f'Seat {chr(65 + i)}' for i in range(len(seat_headers))]
+    for index, column in enumerate(columns):
+        start_x = margin + index * column_width
+        body = [[bench['bench_number']] + list(bench['seats']) for bench in column['seating_plan']]
+        final_y = draw_table(doc, head, body, margin + 12, theme='grid',
+                             head_styles={'fill': (44, 62, 80), 'text_color': 255, 'font_size': 9},
+                             body_styles={'font_size': 9, 'padding': 1.5},
+                             column_styles={0: {'bold': True, 'cell_width': 14}},
+                             margin_left=start_x, margin_right=page_width - (start_x + column_width))
+        max_final_y = max(max_final_y, final_y)
+
+    if branch_counts:
+        summary = 'Room Summary: ' + '   |   '.join(f'{branch}: {count} student(s)' for branch, count in branch_counts.items())
+        if max_final_y > page_height - 25:
+            doc.add_page()
+            max_final_y = margin
+        doc.page.text(margin, max_final_y + 12, summary, 10, bold=True)
+    return [page.content() for page in doc.pages]
+
+
+def render_summary_report(result):
+    """Content streams of the summary report pages (exportSummaryReport)."""
+    doc = Document(A4_PORTRAIT)
+    doc.page.text(14, 22, 'Exam Administration Summary Report', 18)
+    start_y = 30
+
+    def add_section(title, data, columns, color):
+        nonlocal start_y
+        entries = [(key, values) for key, values in (data or {}).items() if len(values) > 0]
+        if not entries:
+            return
+        if start_y > 240:
+            doc.add_page()
+            start_y = 22
+        doc.page.text(14, start_y, title, 14)
+        body = [[key, ', '.join(values) if isinstance(values, list) else f'{len(values)} student(s)'] for key, values in entries]
+        start_y = draw_table(doc, columns, body, start_y + 6, theme='striped', head_styles={'fill': color}) + 15
+
+    add_section('Skipped (Ineligible) Students', result.get('skipped_students'), ['Branch', 'Skipped USNs'], (231, 76, 60))
+    add_section('Unseated Students', result.get('unseated_students'), ['Branch / Group', 'Count Remaining'], (243, 156, 18))
+    return [page.content() for page in doc.pages]
+
+
+def room_jobs(result, branch_details=None):
+    prefixes = branch_prefix_map(branch_details)
+    usn_subjects = None
+    if not prefixes and result.get('group_map'):
+        usn_subjects = {}
+        for subject, usns in result['group_map'].items():
+            for usn in usns:
+                usn_subjects.setdefault(usn, subject)
+    seat_headers = result.get('student_seat_headers') or []
+    for room in result['room_arrangements']:
+        check_room(room)
+    return [(room, seat_headers, room_branch_counts(room, prefixes, usn_subjects)) for room in result['room_arrangements']]
+
+
+def iter_room_pages(jobs):
+    """Content streams of every room's pages, in room order."""
+    if len(jobs) < PARALLEL_MIN_ROOMS or worker_count() == 1:
+        for job in jobs:
+            yield from render_room(job)
+        return
+    for pages in map_items(render_room, jobs, render_room):
+        yield from pages
+
+
+def write_pdf(page_streams, size):
+    """
+    Yields a PDF file in pieces: the header and fonts first, then every page
+    as its content stream arrives, then the page tree and cross-reference table.
+    """
+    k = PT_PER_MM
+    offsets = {}
+    position = 0
+
+    def obj(number, body):
+        nonlocal position
+        offsets[number] = position
+        data = f'{number} 0 obj\n'.encode() + body + b'\nendobj\n'
+        position += len(data)
+        return data
+
+    header = b'%PDF-1.3\n%\xe2\xe3\xcf\xd3\n'
+    position = len(header)
+    yield header
+    yield obj(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+    yield obj(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+    yield obj(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+
+    media_box = f'[0 0 {size[0] * k:.2f} {size[1] * k:.2f}]'
+    kids = []
+    number = 5
+    for stream in page_streams:
+        yield obj(number, f'<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n'.encode() + stream + b'\nendstream')
+        yield obj(number + 1, (f'<< /Type /Page /Parent 2 0 R /MediaBox {media_box} /Contents {number} 0 R '
+                               '/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>').encode())
+        kids.append(f'{number + 1} 0 R')
+        number += 2
+    yield obj(2, f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'.encode())
+
+    xref = [f'xref\n0 {number}\n', '0000000000 65535 f \n']
+    xref += [f'{offsets[n]:010d} 00000 n \n' for n in range(1, number)]
+    yield (''.join(xref) + f'trailer\n<< /Size {number} /Root 1 0 R >>\nstartxref\n{position}\n%%EOF\n').encode()
+
+
+def room_layouts_pdf(result, branch_details=None):
+    """The room layouts document as an iterator of bytes (exportRoomLayoutsToPdf)."""
+    return write_pdf(iter_room_pages(room_jobs(result, branch_details)), A4_LANDSCAPE)
+
+
+def summary_report_pdf(result):
+    """The summary report document as an iterator of bytes (exportSummaryReport)."""
+    return write_pdf(render_summary_report(result), A4_PORTRAIT)
+
+
+def export_pdf(data):
+    """
+    Renders the document an export request asks for:
+    {'report': 'room-layouts' | 'summary', 'result': <allotment response>, 'branchDetails': [...]}.
+    Returns (iterator of PDF bytes, download file name).
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('result'), dict):
+        raise PdfExportError("Send the allotment response to export as 'result'.")
+    report = data.get('report', 'room-layouts')
+    if report not in REPORTS:
+        raise PdfExportError(f"Unknown report '{report}'. Use one of: {', '.join(REPORTS)}.")
+    result = data['result']
+    try:
+        if report == 'summary':
+            return summary_report_pdf(result), REPORTS[report]
+        return room_layouts_pdf(result, data.get('branchDetails')), REPORTS[report]
+    except (KeyError, TypeError, AttributeError) as e:
+        raise PdfExportError(f'The allotment result is incomplete or malformed: {e}')
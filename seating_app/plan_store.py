@@ -0,0 +1,172 @@
+# seating_app/plan_store.py
+
+"""
+Published seating plans and the "where do I sit?" lookup.
+
+A plan the exam cell publishes is flattened into one row per seated
+student: (USN, plan, room, column, bench number, seat number, subject
+code). The rows live in SQLite with an index on (usn, plan_id), so finding
+a student's seat is one B-tree lookup, O(log n), whatever the size of the
+plan. The allotment itself is never recomputed and 'room_arrangements' is
+never scanned after publishing.
+
+Every server process opens the same database file (PLANS_DB) read-mostly
+in WAL mode, so lookups from many worker processes do not block each other
+or a publish in progress. Every publish and delete bumps the store's
+revision, which is what a process keys its cached lookups on.
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from seating_app.engine import EMPTY_SEAT, column_number
+
+MAX_PLAN_NAME_LENGTH = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    students INTEGER NOT NULL,
+    rooms INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seats (
+    usn TEXT NOT NULL,
+    plan_id TEXT NOT NULL REFERENCES plans (id) ON DELETE CASCADE,
+    room_name TEXT NOT NULL,
+    column_number INTEGER NOT NULL,
+    bench_number INTEGER NOT NULL,
+    seat_number INTEGER NOT NULL,
+    subject_code TEXT
+);
+CREATE INDEX IF NOT EXISTS seats_usn ON seats (usn, plan_id);
+CREATE INDEX IF NOT EXISTS seats_plan ON seats (plan_id);
+CREATE TABLE IF NOT EXISTS revision (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO revision (id, value) VALUES (1, 0);
+"""
+
+
+class PlanStoreError(ValueError):
+    """The plan cannot be published. The message is safe to send back to the client."""
+
+
+def default_db_path():
+    return os.environ.get('PLANS_DB') or os.path.join(tempfile.gettempdir(), 'exam-plans.sqlite3')
+
+
+def seat_rows(result):
+    """
+    (usn, room, column, bench, seat, subject code) for every seated student of
+    an allotment response. USNs are stored upper-case, the way lookup() asks.
+    """
+    subject_of = {}
+    for subject, usns in (result.get('group_map') or {}).items():
+        for usn in usns:
+            subject_of.setdefault(usn.strip().upper(), subject)
+    for room in result['room_arrangements']:
+        for index, column in enumerate(room['arrangement_by_column']):
+            number = column_number(column, index)
+            for bench in column['seating_plan']:
+                for seat_number, usn in enumerate(bench['seats'], start=1):
+                    if usn and usn != EMPTY_SEAT:
+                        usn = usn.strip().upper()
+                        yield usn, room['room_name'], number, bench['bench_number'], seat_number, subject_of.get(usn)
+
+
+class PlanStore:
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_db_path()
+        self._local = threading.local()
+
+    def connection(self):
+        # sqlite3 connections stay in the thread that opened them.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA foreign_keys=ON')
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        connection = self.connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def publish(self, result, name=''):
+        """Stores the seats of an allotment response. Returns the plan summary. Raises PlanStoreError."""
+        name = str(name or '').strip()[:MAX_PLAN_NAME_LENGTH]
+        plan_id = uuid.uuid4().hex
+        try:
+            rows = [(usn, plan_id, *rest) for usn, *rest in seat_rows(result)]
+            room_count = len(result['room_arrangements'])
+        except (KeyError, TypeError, AttributeError) as e:
+            raise PlanStoreError(f'The allotment result is incomplete or malformed: {e}')
+        if not rows:
+            raise PlanStoreError('The allotment result has no seated students.')
+
+        created_at = time.time()
+        with self.transaction() as connection:
+            connection.execute('INSERT INTO plans (id, name, created_at, students, rooms) VALUES (?, ?, ?, ?, ?)',
+                               (plan_id, name or f'Plan {time.strftime("%Y-%m-%d %H:%M", time.localtime(created_at))}',
+                                created_at, len(rows), room_count))
+            connection.executemany('INSERT INTO seats (usn, plan_id, room_name, column_number, bench_number, seat_number, subject_code) '
+                                   'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            connection.execute('UPDATE revision SET value = value + 1')
+        return self.plan(plan_id)
+
+    def plan(self, plan_id):
+        row = self.connection().execute('SELECT id, name, created_at, students, rooms FROM plans WHERE id = ?', (plan_id,)).fetchone()
+        return None if row is None else plan_summary(row)
+
+    def plans(self):
+        """Summaries of all published plans, newest first."""
+        rows = self.connection().execute('SELECT id, name, created_at, students, rooms FROM plans ORDER BY created_at DESC')
+        return [plan_summary(row) for row in rows]
+
+    def delete(self, plan_id):
+        """Removes a plan and its seats. Returns False for an unknown plan ID."""
+        with self.transaction() as connection:
+            if connection.execute('DELETE FROM plans WHERE id = ?', (plan_id,)).rowcount == 0:
+                return False
+            connection.execute('UPDATE revision SET value = value + 1')
+            return True
+
+    def revision(self):
+        """A number that changes with every publish and delete, by any process using the database."""
+        return self.connection().execute('SELECT value FROM revision').fetchone()[0]
+
+    def lookup(self, usn, plan_id=None):
+        """The seats of one USN, in every published plan (newest first) or in `plan_id` only."""
+        query = ('SELECT s.plan_id, p.name, s.room_name, s.column_number, s.bench_number, s.seat_number, s.subject_code '
+                 'FROM seats s JOIN plans p ON p.id = s.plan_id WHERE s.usn = ?')
+        params = (usn.strip().upper(),)
+        if plan_id:
+            query += ' AND s.plan_id = ?'
+            params += (plan_id,)
+        rows = self.connection().execute(query + ' ORDER BY p.created_at DESC, s.room_name, s.column_number, s.bench_number', params)
+        return [{
+            'plan_id': plan_id, 'plan_name': plan_name, 'room_name': room_name, 'column': column_number,
+            'bench_number': bench_number, 'seat': f'Seat {seat_number}', 'subject_code': subject_code,
+        } for plan_id, plan_name, room_name, column_number, bench_number, seat_number, subject_code in rows]
+
+
+def plan_summary(row):
+    plan_id, name, created_at, students, rooms = row
+    return {'plan_id': plan_id, 'name': name, 'created_at': created_at, 'students': students, 'rooms': rooms}
@@ -0,0 +1,190 @@
+# seating_app/plan_validation.py
+
+"""
+Adjacency-conflict validation of a seating plan.
+
+Sticky pairing keeps two papers apart within a bench, but says nothing about
+the benches in front, behind or across the aisle. The validator lays every
+room out as a grid of seating-group IDs (one grid row per bench row, one
+grid column per seat, the room's columns side by side) and counts the pairs
+of occupied neighbouring seats that write the same paper:
+
+- front_back: the same seat of the bench in front or behind;
+- side: the seat to the left or right, on the same bench or across the
+  aisle in the neighbouring column;
+- diagonal: the seats diagonally in front or behind.
+
+All rooms are stacked into one grid, separated by an empty row, so each
+direction is counted for the whole plan with one array comparison. 'score'
+is the share of occupied neighbouring pairs that are not in conflict: 1.0
+means no two neighbours write the same paper.
+
+numpy is only imported when a plan is validated.
+"""
+
+import re
+
+from seating_app.engine import EMPTY_SEAT, column_number, seating_groups
+
+DIRECTIONS = ('front_back', 'side', 'diagonal')
+_SERIAL_RE = re.compile(r'^(.*?)[0-9]+$')
+
+
+class ValidationUnavailable(RuntimeError):
+    """numpy is not installed on the server."""
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ValidationUnavailable('Plan validation needs the numpy package on the server.')
+    return numpy
+
+
+def count_conflicts(grid, room_starts):
+    """
+    Counts same-group neighbours in a stacked room grid (-1 = empty seat).
+    Returns (totals, per-room counts) where both map direction -> conflicts,
+    plus the number of occupied neighbouring pairs under 'pairs'.
+    """
+    np = _numpy()
+    if not room_starts:
+        return dict.fromkeys(DIRECTIONS + ('pairs',), 0), {key: np.zeros(0, dtype=np.int64) for key in DIRECTIONS + ('pairs',)}
+    occupied = grid >= 0
+    shifts = {
+        'front_back': [(grid[1:, :], grid[:-1, :], occupied[1:, :] & occupied[:-1, :])],
+        'side': [(grid[:, 1:], grid[:, :-1], occupied[:, 1:] & occupied[:, :-1])],
+        'diagonal': [(grid[1:, 1:], grid[:-1, :-1], occupied[1:, 1:] & occupied[:-1, :-1]),
+                     (grid[1:, :-1], grid[:-1, 1:], occupied[1:, :-1] & occupied[:-1, 1:])],
+    }
+    totals = {'pairs': 0}
+    per_room = {'pairs': np.zeros(len(room_starts), dtype=np.int64)}
+    for direction, comparisons in shifts.items():
+        totals[direction] = 0
+        per_room[direction] = np.zeros(len(room_starts), dtype=np.int64)
+        for a, b, both in comparisons:
+            rows = np.count_nonzero((a == b) & both, axis=1)
+            pair_rows = np.count_nonzero(both, axis=1)
+            # Row i of a shifted comparison starts at grid row i; pad so every room start is a valid index.
+            per_room[direction] += np.add.reduceat(np.append(rows, 0), room_starts)
+            per_room['pairs'] += np.add.reduceat(np.append(pair_rows, 0), room_starts)
+            totals[direction] += int(rows.sum())
+            totals['pairs'] += int(pair_rows.sum())
+    return totals, per_room
+
+
+def validation_report(room_names, grid, room_starts):
+    totals, per_room = count_conflicts(grid, room_starts)
+    total = sum(totals[direction] for direction in DIRECTIONS)
+    rooms = []
+    for index, room_name in enumerate(room_names):
+        counts = {direction: int(per_room[direction][index]) for direction in DIRECTIONS}
+        counts['total'] = sum(counts.values())
+        rooms.append(dict(counts, room_name=room_name))
+    return {
+        'conflicts': dict({direction: totals[direction] for direction in DIRECTIONS}, total=total),
+        'neighbour_pairs': totals['pairs'],
+        'score': round(1 - total / totals['pairs'], 6) if totals['pairs'] else 1.0,
+        'rooms': rooms,
+    }
+
+
+def room_geometry(room_plans, students_per_bench):
+    """Grid rows and first grid row of every room, with one empty row between rooms."""
+    room_starts = []
+    height = 0
+    for _, benches_in_each_column in room_plans:
+        room_starts.append(height)
+        height += max(benches_in_each_column, default=0) + 1
+    width = max((len(columns) for _, columns in room_plans), default=0) * students_per_bench
+    return room_starts, height, width
+
+
+def validate_plan(plan):
+    """Validation report for a computed AllotmentPlan."""
+    np = _numpy()
+    students_per_bench = plan.students_per_bench
+    room_plans = [(name, columns) for name, columns in plan.room_plans]
+    room_starts, height, width = room_geometry(room_plans, students_per_bench)
+
+    # Student IDs -> seating-group IDs: group g holds the IDs from offsets[g] on.
+    matrix = plan.seated_benches
+    seat_ids = matrix.as_numpy()
+    offsets = np.asarray(matrix.table.offsets[:-1], dtype=np.int64)
+    ids = np.where(seat_ids >= 0, np.searchsorted(offsets, seat_ids, side='right') - 1, -1).astype(np.int32)
+
+    # Grid row and first grid column of every seated bench, in seating order.
+    bench_count = len(matrix)
+    bench_rows = np.empty(bench_count, dtype=np.int64)
+    bench_cols = np.empty(bench_count, dtype=np.int64)
+    index = 0
+    for room_start, (_, benches_in_each_column) in zip(room_starts, room_plans):
+        for column, benches in enumerate(benches_in_each_column):
+            count = max(min(benches, bench_count - index), 0)
+            bench_rows[index:index + count] = np.arange(room_start, room_start + count)
+            bench_cols[index:index + count] = column * students_per_bench
+            index += count
+
+    grid = np.full((height, width), -1, dtype=np.int32)
+    for seat in range(students_per_bench):
+        grid[bench_rows, bench_cols + seat] = ids[:, seat]
+    return validation_report([name for name, _ in room_plans], grid, room_starts)
+
+
+def validate_response(result, common_groups_str=''):
+    """
+    Validation report for an allotment response body. Students are grouped by
+    'group_map' (merged by 'commonPaperGroups'); a response without one, like
+    the branch-based API's, is grouped by USN prefix.
+    """
+    np = _numpy()
+    rooms = result['room_arrangements']
+    students_per_bench = max((len(bench['seats']) for room in rooms for column in room['arrangement_by_column']
+                              for bench in column['seating_plan']), default=1)
+    # Columns without benches are not listed, so each column goes where its number puts it. Any run
+    # of missing columns becomes one empty column, which parts its neighbours just the same, so the
+    # grid is never wider than twice the listed columns whatever numbers the names carry.
+    room_plans, room_columns = [], []
+    for room in rooms:
+        listed = [(column_number(column, index), column) for index, column in enumerate(room['arrangement_by_column'])]
+        position, previous = {}, None
+        for number in sorted({number for number, _ in listed}):
+            position[number] = 1 if previous is None else position[previous] + (1 if number == previous + 1 else 2)
+            previous = number
+        columns = [(position[number], column) for number, column in listed]
+        benches_in_each_column = [0] * max(position.values(), default=0)
+        for number, column in columns:
+            benches_in_each_column[number - 1] = len(column['seating_plan'])
+        room_plans.append((room['room_name'], benches_in_each_column))
+        room_columns.append(columns)
+    room_starts, height, width = room_geometry(room_plans, students_per_bench)
+
+    usn_group = {}
+    group_map = result.get('group_map') or {}
+    groups = seating_groups(group_map, common_groups_str)
+    for subject, usns in group_map.items():
+        for usn in usns:
+            usn_group.setdefault(usn, groups[subject])
+    group_ids = {}
+
+    def group_id(usn):
+        group = usn_group.get(usn)
+        if group is None:
+            match = _SERIAL_RE.match(usn)
+            group = match.group(1) if match else usn
+        return group_ids.setdefault(group, len(group_ids))
+
+    rows, cols, ids = [], [], []
+    for room_start, columns in zip(room_starts, room_columns):
+        for number, column in columns:
+            for row, bench in enumerate(column['seating_plan'], start=room_start):
+                for seat, usn in enumerate(bench['seats']):
+                    if usn and usn != EMPTY_SEAT:
+                        rows.append(row)
+                        cols.append((number - 1) * students_per_bench + seat)
+                        ids.append(group_id(usn))
+
+    grid = np.full((height, width), -1, dtype=np.int32)
+    grid[np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)] = np.array(ids, dtype=np.int32)
+    return validation_report([name for name, _ in room_plans], grid, room_starts)
@@ -0,0 +1,125 @@
+# seating_app/result_cache.py
+
+"""
+Content-addressed cache for encoded allotment responses.
+
+Requests are keyed on a hash of their normalized input, so the same plan
+submitted again (with different USN casing, stray whitespace or a
+re-ordered JSON object) maps to the same key. The key doubles as the
+response ETag. Entries are evicted least-recently-used once the cache holds
+too many entries or too many bytes, and expire after a fixed TTL.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from seating_app.engine import is_range_entry, parse_common_groups
+from seating_app.usn_ranges import parse_skip_numbers
+
+# Bump when the engine output changes for the same input, so old ETags stop matching.
+CACHE_VERSION = 1
+
+
+def normalized_allotment_input(data):
+    """
+    The parts of an allotment payload that decide the response, normalized
+    the same way the engine normalizes them. Raises on malformed input; the
+    caller should then skip the cache and let the engine report the error.
+    """
+    normalized = {
+        'version': CACHE_VERSION,
+        'students_per_bench': int(data['studentsPerBench']),
+        # Order matters: it decides tie-breaks between equally sized groups.
+        'students': [normalized_student(student) for student in data.get('combinedStudentData', [])],
+        # Roster IDs are content hashes of the grouped roster, so they identify the students too.
+        'roster': None if data.get('combinedStudentData') else data.get('rosterId'),
+        'common_groups': parse_common_groups(data.get('commonPaperGroups', '')),
+        'rooms': data['roomConfigurations'],
+        'skipped': data.get('skippedStudentsReport', {}),
+    }
+    return normalized
+
+
+def normalized_student(student):
+    if is_range_entry(student):
+        return ['range', str(student['prefix']).strip().upper(), int(student['start']), int(student['end']),
+                sorted(parse_skip_numbers(student.get('skip'))), student['subjectCode'].strip().upper(), student.get('name')]
+    return [student['usn'].strip().upper(), student['subjectCode'].strip().upper()]
+
+
+def allotment_cache_key(data):
+    """
+    Hex digest of the normalized payload, or None when it cannot be normalized
+    or must not be cached. An optimized plan is never cached: it depends on
+    the time budget and on how far the search gets in it, so the same payload
+    does not always give the same plan.
+    """
+    try:
+        if data.get('optimize'):
+            return None
+        normalized = normalized_allotment_input(data)
+        encoded = json.dumps(normalized, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU of encoded responses, bounded by entry count, total bytes and age.
+    `size` gives the bytes a value holds (len() of the encoded response by default).
+    """
+
+    def __init__(self, max_entries=64, max_bytes=256 * 2**20, ttl_seconds=15 * 60, clock=time.monotonic, size=len):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.size = size
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() - entry[0] > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        """Stores `value`. Returns False when it is too large to be cached at all."""
+        size = self.size(value)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self.clock(), value)
+            self.total_bytes += size
+            while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def _remove(self, key):
+        _, value = self._entries.pop(key)
+        self.total_bytes -= self.size(value)
@@ -0,0 +1,213 @@
+# seating_app/roster_ingest.py
+
+"""
+Server-side ingestion of student rosters uploaded as CSV or XLSX.
+
+Rows are read one at a time (csv.reader over the upload stream, openpyxl in
+read-only mode for XLSX), so memory grows with the number of distinct
+students rather than with the size of the file. Each row contributes one
+(USN, subject code) pair. Pairs are upper-cased, validated and
+de-duplicated, then grouped by subject code exactly like the
+'combinedStudentData' path does.
+
+Without a header row the columns follow the existing upload format:
+Col 2 is the USN and Col 4 the subject code. A header row naming a 'USN'
+column and a 'Subject Code' (or 'Subject') column overrides that.
+
+The resulting groups are stored under a content-derived roster ID, so an
+allotment request can send {"rosterId": ...} instead of the full student
+list. A roster is deleted ROSTER_TTL seconds after it was last uploaded.
+openpyxl is only needed, and only imported, for XLSX files.
+"""
+
+import codecs
+import csv
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from collections import defaultdict
+
+USN_PATTERN = re.compile(r'^[A-Z0-9][A-Z0-9/-]{2,24}$')
+DEFAULT_USN_COLUMN = 1
+DEFAULT_SUBJECT_COLUMN = 3
+MAX_REPORTED_INVALID_ROWS = 50
+_ROSTER_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+ROSTER_TTL_SECONDS = int(os.environ.get('ROSTER_TTL') or 24 * 60 * 60)
+
+
+class RosterError(ValueError):
+    """The upload cannot be read as a roster. The message is safe to send back to the client."""
+
+
+def iter_csv_rows(stream):
+    reader = csv.reader(codecs.iterdecode(stream, 'utf-8-sig', errors='replace'))
+    for row in reader:
+        yield row
+
+
+def iter_xlsx_rows(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RosterError('XLSX uploads need the openpyxl package on the server. Upload a CSV file instead.')
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise RosterError(f'Could not open the Excel file: {e}')
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ['' if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def iter_roster_rows(stream, filename):
+    name = (filename or '').lower()
+    if name.endswith('.xlsx'):
+        return iter_xlsx_rows(stream)
+    if name.endswith('.csv') or name.endswith('.txt'):
+        return iter_csv_rows(stream)
+    if name.endswith('.xls'):
+        raise RosterError('Old .xls workbooks are not supported. Save the file as .xlsx or .csv.')
+    raise RosterError('Unsupported file type. Please upload a .csv or .xlsx file.')
+
+
+def header_columns(row):
+    """(usn_column, subject_column) named by a header row, or None if the row is not a header."""
+    labels = [re.sub(r'[^A-Z]', '', str(cell).upper()) for cell in row]
+    if 'USN' not in labels:
+        return None
+    usn_column = labels.index('USN')
+    for wanted in ('SUBJECTCODE', 'SUBJECT', 'PAPERCODE', 'COURSECODE'):
+        if wanted in labels:
+            return usn_column, labels.index(wanted)
+    return None
+
+
+def build_roster(rows, usn_column=None, subject_column=None):
+    """
+    Validates and groups roster rows.
+    Returns (student_groups, report) where student_groups maps each subject
+    code to its USNs in first-seen order.
+    """
+    student_groups = defaultdict(list)
+    seen = set()
+    report = {'rows': 0, 'students': 0, 'duplicates': 0, 'invalid_row_count': 0, 'invalid_rows': []}
+
+    def invalid(row_number, reason):
+        report['invalid_row_count'] += 1
+        if len(report['invalid_rows']) < MAX_REPORTED_INVALID_ROWS:
+            report['invalid_rows'].append({'row': row_number, 'reason': reason})
+
+    explicit_columns = usn_column is not None or subject_column is not None
+    usn_column = DEFAULT_USN_COLUMN if usn_column is None else usn_column
+    subject_column = DEFAULT_SUBJECT_COLUMN if subject_column is None else subject_column
+
+    for row_number, row in enumerate(rows, start=1):
+        if not any(str(cell).strip() for cell in row):
+            continue
+        if row_number == 1 and not explicit_columns:
+            columns = header_columns(row)
+            if columns:
+                usn_column, subject_column = columns
+                continue
+        report['rows'] += 1
+
+        if len(row) <= max(usn_column, subject_column):
+            invalid(row_number, 'missing USN or subject code column')
+            continue
+        usn = str(row[usn_column]).strip().upper()
+        subject_code = str(row[subject_column]).strip().upper()
+        if not subject_code:
+            invalid(row_number, 'empty subject code')
+            continue
+        if not USN_PATTERN.match(usn):
+            invalid(row_number, f'invalid USN {usn!r}')
+            continue
+        if (usn, subject_code) in seen:
+            report['duplicates'] += 1
+            continue
+        seen.add((usn, subject_code))
+        student_groups[subject_code].append(usn)
+        report['students'] += 1
+
+    report['subject_counts'] = {subject: len(usns) for subject, usns in student_groups.items()}
+    return student_groups, report
+
+
+def roster_id(student_groups):
+    encoded = json.dumps(list(student_groups.items()), separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:32]
+
+
+class RosterStore:
+    """
+    Stores grouped rosters as JSON files, one per roster ID, shared by every
+    worker process. A file's modification time is its last upload; files
+    older than `ttl_seconds` are treated as gone and deleted on the next save.
+    """
+
+    def __init__(self, directory=None, ttl_seconds=ROSTER_TTL_SECONDS):
+        self.directory = directory or os.environ.get('ROSTER_DIR') or os.path.join(tempfile.gettempdir(), 'exam-rosters')
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, roster_id):
+        if not _ROSTER_ID_RE.match(roster_id or ''):
+            return None
+        return os.path.join(self.directory, f'{roster_id}.json')
+
+    def _expired(self, path, now):
+        try:
+            return os.path.getmtime(path) < now - self.ttl_seconds
+        except FileNotFoundError:
+            return True
+
+    def save(self, student_groups, report):
+        os.makedirs(self.directory, exist_ok=True)
+        now = time.time()
+        self._expire(now)
+        new_id = roster_id(student_groups)
+        path = self._path(new_id)
+        try:
+            # The same roster uploaded again: it is kept for another ROSTER_TTL.
+            os.utime(path, (now, now))
+        except FileNotFoundError:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'groups': list(student_groups.items()), 'report': report}, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        return new_id
+
+    def _expire(self, now):
+        """Deletes the expired rosters, and temporary files left behind by a save that died."""
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if (name.endswith('.json') or name.endswith('.tmp')) and self._expired(path, now):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _read(self, roster_id):
+        path = self._path(roster_id)
+        if path is None or self._expired(path, time.time()):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def load_groups(self, roster_id):
+        """The stored {subject_code: [usn, ...]} groups, or None for an unknown roster ID."""
+        stored = self._read(roster_id)
+        if stored is None:
+            return None
+        return defaultdict(list, stored['groups'])
+
+    def load_report(self, roster_id):
+        stored = self._read(roster_id)
+        return None if stored is None else stored['report']
@@ -0,0 +1,221 @@
+# seating_app/seat_optimizer.py
+
+"""
+Optional optimizing mode for /api/generate-allotment.
+
+Sticky pairing always pairs the two largest remaining groups. When one
+paper dominates a session, that leaves benches with "---" seats, students
+without a seat, and long runs of the same paper one behind the other. With
+
+    "optimize": {"timeBudgetMs": 500}
+
+in the payload, the greedy plan is improved by local search until the time
+budget runs out:
+
+- swap: a student with a same-paper neighbour trades seats with a student
+  of another group, or moves to an empty seat, anywhere in the plan;
+- fill: an unseated student takes an empty seat.
+
+Two students of a group never share a bench side by side, as in the greedy
+plan: a move that would seat one beside another of their group on the same
+bench is rejected outright. Every other move is scored incrementally from
+the (at most eight) neighbours of the seats it touches, on the grid
+plan_validation.py counts conflicts on, so only the conflicts with the
+benches in front, behind and across the aisle are traded off.
+The cost of a plan is its neighbour conflicts plus 'unseatedWeight' for
+every student without a seat. The default weight of 8 (the most neighbours
+a seat can have) seats every student who fits; 0 only uses conflict-free
+seats. Moves that would raise the cost are rejected, so the plan at the end
+is the best one found. The rooms and benches in use do not change.
+"""
+
+import random
+import time
+from array import array
+
+from seating_app.plan_validation import room_geometry
+from seating_app.engine import EMPTY_ID, AllotmentError, SeatMatrix
+
+DEFAULT_TIME_BUDGET_MS = 500
+MAX_TIME_BUDGET_MS = 10000
+DEFAULT_UNSEATED_WEIGHT = 8
+# Moves between two looks at the clock.
+CLOCK_CHECK_INTERVAL = 256
+
+
+def optimize_options(options):
+    """The 'optimize' payload value -> (time_budget_ms, unseated_weight, seed). Raises AllotmentError."""
+    if options is True:
+        options = {}
+    if not isinstance(options, dict):
+        raise AllotmentError("'optimize' must be true or an object such as {\"timeBudgetMs\": 500}.")
+    try:
+        time_budget_ms = int(options.get('timeBudgetMs', DEFAULT_TIME_BUDGET_MS))
+        unseated_weight = int(options.get('unseatedWeight', DEFAULT_UNSEATED_WEIGHT))
+        seed = int(options.get('seed', 0))
+    except (TypeError, ValueError) as e:
+        raise AllotmentError(f'Invalid optimize options: {e}')
+    if not 0 < time_budget_ms <= MAX_TIME_BUDGET_MS:
+        raise AllotmentError(f'The optimize time budget must be between 1 and {MAX_TIME_BUDGET_MS} ms.')
+    if unseated_weight < 0:
+        raise AllotmentError('The unseated weight cannot be negative.')
+    return time_budget_ms, unseated_weight, seed
+
+
+class SeatGrid:
+    """
+    Seating-group IDs of a plan's seats on a flat grid with a one-cell border,
+    -1 where there is no student. `cells[k]` is the grid cell of seat k, the
+    seats being numbered bench by bench in seating order.
+    """
+
+    def __init__(self, room_plans, bench_count, students_per_bench):
+        room_starts, height, width = room_geometry(room_plans, students_per_bench)
+        stride = width + 2
+        self.groups = [-1] * ((height + 2) * stride)
+        self.neighbours = (-stride - 1, -stride, -stride + 1, -1, 1, stride - 1, stride, stride + 1)
+        self.students_per_bench = students_per_bench
+        self.cells = []
+        bench = 0
+        for room_start, (_, benches_in_each_column) in zip(room_starts, room_plans):
+            for column, benches in enumerate(benches_in_each_column):
+                count = max(0, min(benches, bench_count - bench))
+                for row in range(room_start, room_start + count):
+                    first = (row + 1) * stride + column * students_per_bench + 1
+                    self.cells.extend(range(first, first + students_per_bench))
+                bench += count
+
+    def same(self, cell, group, skip=-1):
+        """Neighbours of `cell` (other than `skip`) holding `group`."""
+        groups = self.groups
+        count = 0
+        for offset in self.neighbours:
+            neighbour = cell + offset
+            if groups[neighbour] == group and neighbour != skip:
+                count += 1
+        return count
+
+    def bench_clash(self, seat, group, skip=-1):
+        """Whether a seat beside seat `seat` on its bench (other than cell `skip`) holds `group`."""
+        groups = self.groups
+        cell = self.cells[seat]
+        position = seat % self.students_per_bench
+        if position > 0 and cell - 1 != skip and groups[cell - 1] == group:
+            return True
+        return position < self.students_per_bench - 1 and cell + 1 != skip and groups[cell + 1] == group
+
+    def conflicts(self):
+        return sum(self.same(cell, self.groups[cell]) for cell in self.cells if self.groups[cell] >= 0) // 2
+
+
+def plan_metrics(conflicts, seats, pools):
+    return {
+        'conflicts': conflicts,
+        'empty_seats': seats.count(EMPTY_ID),
+        'unseated': sum(end - next_id for _, next_id, end in pools),
+    }
+
+
+def optimize_plan(plan, options):
+    """
+    Improves a greedy AllotmentPlan within the time budget in `options`.
+    Returns a new plan whose 'optimization' holds the greedy and optimized metrics.
+    """
+    time_budget_ms, unseated_weight, seed = optimize_options(options)
+    started = time.perf_counter()
+    deadline = started + time_budget_ms / 1000
+    rng = random.Random(seed)
+
+    matrix = plan.seated_benches
+    offsets = matrix.table.offsets
+    # Seating group of every student ID; the groups hold consecutive IDs.
+    group_of = array('i')
+    for index in range(len(offsets) - 1):
+        group_of.extend(array('i', [index]) * (offsets[index + 1] - offsets[index]))
+
+    seats = list(matrix.ids)
+    grid = SeatGrid(plan.room_plans, len(matrix), plan.students_per_bench)
+    cells, groups, same, bench_clash = grid.cells, grid.groups, grid.same, grid.bench_clash
+    for cell, student in zip(cells, seats):
+        if student != EMPTY_ID:
+            groups[cell] = group_of[student]
+
+    # [group ID, next unseated student ID, end of the group's IDs] per group that may get a seat.
+    group_index = {name: index for index, name in enumerate(plan.group_lists)}
+    pools = []
+    for name, students in plan.unseated.items():
+        if name:
+            index = group_index[name]
+            pools.append([index, offsets[index + 1] - len(students), offsets[index + 1]])
+    conflicts = grid.conflicts()
+    greedy = plan_metrics(conflicts, seats, pools)
+    empty_seats = greedy['empty_seats']
+
+    seat_count = len(seats)
+    iterations = improvements = 0
+    while seat_count:
+        iterations += 1
+        if iterations % CLOCK_CHECK_INTERVAL == 0:
+            if time.perf_counter() >= deadline or (not conflicts and not (pools and empty_seats)):
+                break
+        k1 = int(rng.random() * seat_count)
+        cell1 = cells[k1]
+        g1 = groups[cell1]
+
+        if g1 < 0:
+            if not pools or seats[k1] != EMPTY_ID:
+                continue
+            options = [(same(cell1, pool[0]), pool) for pool in pools if not bench_clash(k1, pool[0])]
+            if not options:
+                continue
+            cost, pool = min(options)
+            delta = cost - unseated_weight
+            if delta > 0:
+                continue
+            groups[cell1] = pool[0]
+            seats[k1] = pool[1]
+            pool[1] += 1
+            if pool[1] == pool[2]:
+                pools.remove(pool)
+            empty_seats -= 1
+            conflicts += cost
+        else:
+            before = same(cell1, g1)
+            if not before:
+                continue
+            k2 = int(rng.random() * seat_count)
+            cell2 = cells[k2]
+            g2 = groups[cell2]
+            if g2 == g1 or bench_clash(k2, g1, cell1) or (g2 >= 0 and bench_clash(k1, g2, cell2)):
+                continue
+            after = same(cell2, g1, cell1)
+            if g2 >= 0:
+                before += same(cell2, g2, cell1)
+                after += same(cell1, g2, cell2)
+            delta = after - before
+            if delta > 0:
+                continue
+            groups[cell1], groups[cell2] = g2, g1
+            seats[k1], seats[k2] = seats[k2], seats[k1]
+            conflicts += delta
+        if delta < 0:
+            improvements += 1
+
+    remaining = {group: end - next_id for group, next_id, end in pools}
+    unseated = {}
+    for name, students in plan.unseated.items():
+        if not name:
+            unseated[name] = students
+        elif group_index[name] in remaining:
+            unseated[name] = students[len(students) - remaining[group_index[name]]:]
+
+    report = {
+        'time_budget_ms': time_budget_ms,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'iterations': iterations,
+        'improving_moves': improvements,
+        'greedy': greedy,
+        'optimized': plan_metrics(conflicts, seats, pools),
+    }
+    seated_benches = SeatMatrix(array('i', seats), plan.students_per_bench, matrix.table)
+    return plan._replace(seated_benches=seated_benches, unseated=unseated, optimization=report)
@@ -0,0 +1,138 @@
+# seating_app/services.py
+
+"""
+The state one app keeps between requests: caches, stores, the job
+dispatcher and the metrics registry.
+
+Every store is built on first use, so a worker that never publishes a plan
+never opens the plan database, and one that never runs a job never starts
+the job dispatcher thread. The database paths default to the environment
+variables the stores read (PLANS_DB, JOBS_DB, RESULTS_DB, PROFILES_DB); the
+same names in the app config override them. Rosters stay in ROSTER_DIR, where job workers look
+for them.
+"""
+
+import os
+import threading
+
+from flask import current_app
+
+from seating_app.instrumentation import Counter, Gauge, Histogram, ProfileStore, Registry, exponential_buckets
+from seating_app.result_cache import ResultCache
+
+# Found seats are cached per plan store revision, so a burst of students asking for
+# the same USN costs one index lookup per process until a plan is published or deleted.
+SEAT_CACHE_SECONDS = 30
+
+
+def lazy(build):
+    """A read-only attribute built on first use, once per Services."""
+    name = build.__name__
+
+    def get(self):
+        try:
+            return self._built[name]
+        except KeyError:
+            with self._lock:
+                if name not in self._built:
+                    self._built[name] = build(self)
+                return self._built[name]
+    return property(get, doc=build.__doc__)
+
+
+class Services:
+    def __init__(self, config):
+        self.config = config
+        self._built = {}
+        self._lock = threading.RLock()
+
+        # cProfile captures of requests sent with 'X-Profile: 1'. Off unless ALLOTMENT_PROFILING=1,
+        # since profiling slows the request down several times.
+        profiling = config.get('ALLOTMENT_PROFILING', os.environ.get('ALLOTMENT_PROFILING', ''))
+        self.profiling_enabled = str(profiling).lower() in ('1', 'true')
+
+        # Publishing and deleting plans needs 'Authorization: Bearer <PLANS_TOKEN>'; without a token, both are off.
+        self.plans_token = str(config.get('PLANS_TOKEN', os.environ.get('PLANS_TOKEN', '')) or '')
+
+        # Prometheus metrics, served at /metrics.
+        metrics = self.metrics = Registry()
+        self.request_latency = metrics.register(Histogram(
+            'allotment_http_request_duration_seconds', 'Time to build a response (to the first byte when streamed).',
+            exponential_buckets(0.005, 2, 12), ['endpoint', 'method', 'status']))
+        self.phase_latency = metrics.register(Histogram(
+            'allotment_phase_duration_seconds', 'Time spent in each phase of /api/generate-allotment.',
+            exponential_buckets(0.0005, 2, 15), ['phase']))
+        self.students_per_request = metrics.register(Histogram(
+            'allotment_students', 'Students in each computed allotment.', exponential_buckets(100, 4, 8)))
+        self.benches_per_request = metrics.register(Histogram(
+            'allotment_benches', 'Benches seated in each computed allotment.', exponential_buckets(10, 4, 8)))
+        self.request_bytes = metrics.register(Histogram(
+            'allotment_request_bytes', 'Request body size of /api/generate-allotment.', exponential_buckets(1024, 4, 10)))
+        self.response_bytes = metrics.register(Histogram(
+            'allotment_response_bytes', 'Encoded response body size of /api/generate-allotment.', exponential_buckets(1024, 4, 10)))
+        self.cache_lookups = metrics.register(Counter(
+            'allotment_cache_lookups_total', 'Result cache lookups of /api/generate-allotment by outcome.', ['result']))
+        metrics.register(Gauge('allotment_cache_entries', 'Responses held by the result cache.', lambda: len(self.allotment_cache)))
+        metrics.register(Gauge('allotment_cache_bytes', 'Bytes held by the result cache.', lambda: self.allotment_cache.total_bytes))
+        self.seat_lookups = metrics.register(Counter(
+            'allotment_seat_lookups_total', 'USN -> seat lookups by outcome.', ['result']))
+        metrics.register(Gauge('allotment_jobs_queued', 'Allotment jobs waiting for a worker.', lambda: self.job_count('queued')))
+        metrics.register(Gauge('allotment_jobs_running', 'Allotment jobs being computed.', lambda: self.job_count('running')))
+
+    def job_count(self, state):
+        """Jobs in `state` in the queue every worker shares; 0 while there is no job database, so a /metrics scrape never creates it."""
+        if 'job_store' not in self._built:
+            from seating_app.allotment_jobs import default_db_path
+            if not os.path.exists(self.config.get('JOBS_DB') or default_db_path()):
+                return 0
+        return self.job_store.counts().get(state, 0)
+
+    @lazy
+    def allotment_cache(self):
+        """Encoded responses of recent plans, keyed (and ETagged) by the normalized request."""
+        return ResultCache(max_entries=64, max_bytes=256 * 2**20, ttl_seconds=15 * 60)
+
+    @lazy
+    def seat_cache(self):
+        """Encoded answers of the USN -> seat lookup, keyed by plan store revision."""
+        return ResultCache(max_entries=100000, max_bytes=64 * 2**20, ttl_seconds=SEAT_CACHE_SECONDS)
+
+    @lazy
+    def roster_store(self):
+        """Uploaded rosters, grouped by subject code and referenced by 'rosterId'."""
+        from seating_app.roster_ingest import RosterStore
+        return RosterStore()
+
+    @lazy
+    def job_store(self):
+        """Asynchronous allotments, queued in SQLite."""
+        from seating_app.allotment_jobs import JobStore
+        return JobStore(self.config.get('JOBS_DB'))
+
+    @lazy
+    def job_dispatcher(self):
+        """Runs the queued jobs on the worker pool; its thread starts with the first job request."""
+        from seating_app.allotment_jobs import JobDispatcher
+        return JobDispatcher(self.job_store)
+
+    @lazy
+    def plan_store(self):
+        """Published plans for the USN -> seat lookup."""
+        from seating_app.plan_store import PlanStore
+        return PlanStore(self.config.get('PLANS_DB'))
+
+    @lazy
+    def paged_results(self):
+        """Results of '?view=paged' allotments, read back a page of rooms at a time."""
+        from seating_app.paged_results import PagedResultStore
+        return PagedResultStore(self.config.get('RESULTS_DB'))
+
+    @lazy
+    def profile_store(self):
+        """cProfile reports of requests sent with 'X-Profile: 1'."""
+        return ProfileStore(self.config.get('PROFILES_DB'))
+
+
+def services():
+    """The Services of the app handling the current request."""
+    return current_app.extensions['seating']
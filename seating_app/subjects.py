@@ -0,0 +1,341 @@
+# seating_app/subjects.py
+
+"""
+The subject-based input mode: students listed with their subject codes
+('combinedStudentData', from manual entry or a file parsed in the browser)
+or uploaded once as a roster and referenced by 'rosterId'. Students are
+grouped by subject code and the groups of a common paper group are merged
+under their sorted codes (engine.compute_allotment).
+
+Besides the allotment itself (result cache, NDJSON streaming, compact
+bodies, scoring) this blueprint holds the endpoints that take the same
+payload: batch, multi-centre, capacity planning, incremental updates,
+queued jobs, and roster upload.
+"""
+
+from flask import Blueprint, current_app, g, jsonify, request, stream_with_context, url_for
+
+from seating_app.result_cache import allotment_cache_key
+from seating_app.services import services
+from seating_app.engine import AllotmentError, allotment_response, compute_allotment, encode_allotment_response, generate_allotment_records
+
+blueprint = Blueprint('subjects', __name__)
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_ndjson():
+    """Streaming is opt-in: an 'Accept: application/x-ndjson' header or '?stream=1'."""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'ndjson'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def negotiate_variant():
+    """
+    Picks the representation for a non-streaming request.
+    Returns (variant, mimetype, content_coding); variant is None for the default JSON.
+    '?format=compact' selects the compact columnar body, sent as MessagePack when the
+    client accepts it (and msgpack is installed) and compressed when the client accepts
+    zstd or gzip.
+    """
+    if request.args.get('format', '').lower() != 'compact':
+        return None, 'application/json', None
+    from seating_app.compact_format import MSGPACK_MIMETYPE, available_content_codings, msgpack_available
+    mimetype = 'application/json'
+    if msgpack_available() and request.accept_mimetypes.best_match(['application/json', MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE:
+        mimetype = MSGPACK_MIMETYPE
+    coding = next((c for c in available_content_codings() if request.accept_encodings[c]), None)
+    variant = '-'.join(filter(None, ['compact', 'msgpack' if mimetype == MSGPACK_MIMETYPE else None, coding]))
+    return variant, mimetype, coding
+
+
+def wants_score():
+    """'?score=1' adds the adjacency-conflict report ('validation') to the response."""
+    return request.args.get('score', '').lower() in ('1', 'true')
+
+
+def encode_allotment(plan, variant, mimetype, coding, validation=None):
+    """The body for a computed plan; `validation`, the report of a '?score=1' request, is added as 'validation'."""
+    timer = g.timer
+    if variant is None and not current_app.debug:
+        # Rooms are laid out and encoded one at a time; the bytes are what jsonify() would send.
+        with timer.phase('encode'):
+            return encode_allotment_response(plan, None if validation is None else {'validation': validation})
+    if variant is not None:
+        from seating_app.compact_format import MSGPACK_MIMETYPE, compact_response, compress, pack_msgpack
+    with timer.phase('layout'):
+        body = allotment_response(plan) if variant is None else compact_response(plan)
+    if validation is not None:
+        body['validation'] = validation
+    with timer.phase('encode'):
+        if variant is None:
+            return jsonify(body).get_data()
+        data = pack_msgpack(body) if mimetype == MSGPACK_MIMETYPE else current_app.json.dumps(body).encode('utf-8')
+        return compress(data, coding) if coding else data
+
+
+def requested_student_groups(data):
+    """The stored roster named by 'rosterId', for requests that carry no inline student data."""
+    if not isinstance(data, dict) or data.get('combinedStudentData') or not data.get('rosterId'):
+        return None
+    with g.timer.phase('roster'):
+        student_groups = services().roster_store.load_groups(str(data['rosterId']))
+    if student_groups is None:
+        raise AllotmentError(f"Unknown roster ID '{data['rosterId']}'. Please upload the roster again.")
+    return student_groups
+
+
+def stream_allotment(data):
+    try:
+        records = generate_allotment_records(data, requested_student_groups(data))
+    except AllotmentError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    lines = (current_app.json.dumps(record) + '\n' for record in records)
+    return current_app.response_class(stream_with_context(lines), mimetype=NDJSON_MIMETYPE)
+
+
+def generate_subject_allotment(data):
+    """/api/generate-allotment for a subject-based payload (see api.generate_allotment_api)."""
+    if wants_ndjson():
+        return stream_allotment(data)
+
+    state = services()
+    timer = g.timer
+    variant, mimetype, coding = negotiate_variant()
+    scored = wants_score()
+    with timer.phase('cache'):
+        key = allotment_cache_key(data)
+        representation = '-'.join(filter(None, [variant, 'scored' if scored else None]))
+        etag = f'{key}-{representation}' if key and representation else key
+
+        if etag and request.if_none_match.contains(etag):
+            state.cache_lookups.inc(result='not_modified')
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+
+        body = state.allotment_cache.get(etag) if etag else None
+    cache_status = 'HIT'
+    if body is None:
+        try:
+            plan = compute_allotment(data, requested_student_groups(data), timer)
+        except AllotmentError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        state.students_per_request.observe(sum(len(students) for students in plan.group_map.values()))
+        state.benches_per_request.observe(len(plan.seated_benches))
+        validation = None
+        if scored:
+            from seating_app.plan_validation import ValidationUnavailable, validate_plan
+            try:
+                with timer.phase('validate'):
+                    validation = validate_plan(plan)
+            except ValidationUnavailable as e:
+                return jsonify({'status': 'error', 'message': str(e)}), 501
+        body = encode_allotment(plan, variant, mimetype, coding, validation)
+        cache_status = 'MISS'
+        if etag:
+            state.allotment_cache.put(etag, body)
+    state.cache_lookups.inc(result=cache_status.lower() if etag else 'uncacheable')
+    state.response_bytes.observe(len(body))
+
+    response = current_app.response_class(body, mimetype=mimetype)
+    response.headers['X-Cache'] = cache_status
+    if variant:
+        response.vary.update(['Accept', 'Accept-Encoding'])
+    if coding:
+        response.headers['Content-Encoding'] = coding
+    if etag:
+        response.set_etag(etag)
+    return response
+
+
+@blueprint.route('/api/generate-allotment-batch', methods=['POST'])
+def generate_allotment_batch_api():
+    """
+    Allots many exam sessions that share one room catalogue in a single request.
+    Body: the shared 'roomConfigurations' and default 'studentsPerBench', plus a
+    'sessions' list of allotment payloads, each with an optional 'sessionId' and
+    an optional 'rooms' list of catalogue room names. Sessions run in parallel
+    worker processes; 'results' and 'errors' are keyed by session ID, and
+    'session_order' keeps the submitted order.
+    """
+    from seating_app.batch_allotment import batch_response_body, parse_batch, run_sessions
+    data = request.get_json()
+    try:
+        sessions = parse_batch(data)
+    except AllotmentError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    jobs, errors = [], {}
+    for session_id, payload, error in sessions:
+        if error is None:
+            try:
+                jobs.append((session_id, payload, requested_student_groups(payload)))
+                continue
+            except AllotmentError as e:
+                error = str(e)
+        errors[session_id] = error
+
+    results, session_errors = run_sessions(jobs) if jobs else ({}, {})
+    errors.update(session_errors)
+    body = batch_response_body([session_id for session_id, _, _ in sessions], results, errors)
+    return current_app.response_class(body, mimetype='application/json')
+
+
+@blueprint.route('/api/generate-allotment-centres', methods=['POST'])
+def generate_allotment_centres_api():
+    """
+    Multi-centre allotment. Body: an allotment payload whose rooms each carry a 'centre'.
+    Every subject's students are split across the centres in proportion to their seats,
+    each centre is allotted on its own in a parallel worker process, and the rooms come
+    back in one /api/generate-allotment shaped body, tagged with their centre, plus a
+    'centres' summary (seats, students assigned, seated and unseated per centre).
+    Centres whose worker process died are listed under 'errors' with the status 'partial'.
+    """
+    from seating_app.multi_centre import centres_response_body, run_centres, split_centres
+    data = request.get_json()
+    timer = g.timer
+    try:
+        with timer.phase('split'):
+            split = split_centres(data, requested_student_groups(data))
+        with timer.phase('allot'):
+            outcomes, errors = run_centres(split.jobs)
+    except AllotmentError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    with timer.phase('merge'):
+        body = centres_response_body(split, outcomes, errors)
+    return current_app.response_class(body, mimetype='application/json')
+
+
+@blueprint.route('/api/plan-capacity', methods=['POST'])
+def plan_capacity_api():
+    """
+    Whether the students fit the rooms, without running the allotment.
+    Body: the allotment payload, where 'groupSizes' ({subject_code: count}) may replace
+    'combinedStudentData'. Returns the benches needed and available, the unseated count per
+    group for the rooms as given, and the smallest subset of the rooms that seats everyone.
+    Cheap enough to call on every edit of the room list.
+    """
+    from seating_app.capacity_planner import plan_capacity
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({'status': 'error', 'message': 'Invalid or missing root input data.'}), 400
+    try:
+        student_groups = None if data.get('groupSizes') else requested_student_groups(data)
+        return jsonify(plan_capacity(data, student_groups))
+    except AllotmentError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+
+@blueprint.route('/api/update-allotment', methods=['POST'])
+def update_allotment_api():
+    """
+    Incremental re-allotment for late registrations and withdrawals.
+    Body: 'previousPlan' (an earlier /api/generate-allotment response), the same
+    'roomConfigurations', 'studentsPerBench' and 'commonPaperGroups', and a
+    'delta' of {'added': {subject: [usn, ...]}, 'removed': {subject: [usn, ...]}}.
+    Untouched benches keep their seats; 'changed_rooms' lists the rooms to reprint.
+    """
+    from seating_app.incremental_allotment import reallot
+    data = request.get_json()
+    try:
+        return jsonify(reallot(data))
+    except AllotmentError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+
+@blueprint.route('/api/jobs', methods=['POST'])
+def submit_job_api():
+    """
+    Queues an allotment and answers at once with 202 and the job ID.
+    Body: the same payload as /api/generate-allotment. Poll GET /api/jobs/<id>
+    ('?wait=<seconds>' long-polls until the job finishes), then GET its 'result_url'.
+    While the queue is full the answer is 503 with a Retry-After header.
+    """
+    from seating_app.allotment_jobs import RETRY_AFTER_SECONDS, QueueFull
+    state = services()
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({'status': 'error', 'message': 'Invalid or missing root input data.'}), 400
+    try:
+        job_id = state.job_store.submit(request.get_data(as_text=True))
+    except QueueFull as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503, {'Retry-After': str(RETRY_AFTER_SECONDS)}
+    state.job_dispatcher.start()
+    state.job_dispatcher.wake.set()
+    status_url = url_for('.job_status_api', job_id=job_id)
+    body = {'status': 'success', 'job_id': job_id, 'state': 'queued', 'status_url': status_url,
+            'result_url': url_for('.job_result_api', job_id=job_id)}
+    return jsonify(body), 202, {'Location': status_url}
+
+
+@blueprint.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status_api(job_id):
+    """State and timings of a job. '?wait=<seconds>' (up to 30) holds the answer until the job has finished."""
+    state = services()
+    try:
+        wait = float(request.args.get('wait') or 0)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': "'wait' must be a number of seconds."}), 400
+    state.job_dispatcher.start()
+    status = state.job_store.wait(job_id, wait) if wait > 0 else state.job_store.status(job_id)
+    if status is None:
+        return jsonify({'status': 'error', 'message': f"Unknown job ID '{job_id}'."}), 404
+    if status['state'] == 'done':
+        status['result_url'] = url_for('.job_result_api', job_id=job_id)
+    return jsonify(dict(status, status='success'))
+
+
+@blueprint.route('/api/jobs/<job_id>/result', methods=['GET'])
+def job_result_api(job_id):
+    """The /api/generate-allotment response of a finished job; 409 while it is still queued or running."""
+    row = services().job_store.result(job_id)
+    if row is None:
+        return jsonify({'status': 'error', 'message': f"Unknown job ID '{job_id}'."}), 404
+    state, result, error = row
+    if state == 'failed':
+        return jsonify({'status': 'error', 'message': error}), 400
+    if state != 'done':
+        return jsonify({'status': 'error', 'message': f'The allotment is still {state}.', 'state': state}), 409
+    return current_app.response_class(result, mimetype='application/json')
+
+
+@blueprint.route('/api/rosters', methods=['POST'])
+def upload_roster_api():
+    """
+    Multipart upload of a student roster ('file': .csv or .xlsx).
+    Optional 'usnColumn' / 'subjectColumn' form fields (1-based) override the
+    default columns (Col 2: USN, Col 4: Subject Code) and header detection.
+    Returns the roster ID to send as 'rosterId' to /api/generate-allotment.
+    """
+    from seating_app.roster_ingest import RosterError, build_roster, iter_roster_rows
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'status': 'error', 'message': 'No roster file uploaded.'}), 400
+
+    try:
+        usn_column = int(request.form['usnColumn']) - 1 if request.form.get('usnColumn') else None
+        subject_column = int(request.form['subjectColumn']) - 1 if request.form.get('subjectColumn') else None
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Column numbers must be whole numbers.'}), 400
+    if (usn_column is not None and usn_column < 0) or (subject_column is not None and subject_column < 0):
+        return jsonify({'status': 'error', 'message': 'Column numbers start at 1.'}), 400
+
+    try:
+        student_groups, report = build_roster(iter_roster_rows(upload.stream, upload.filename), usn_column, subject_column)
+    except RosterError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    if not student_groups:
+        return jsonify({'status': 'error', 'message': 'No valid students found in the uploaded roster.', 'report': report}), 400
+
+    roster_id = services().roster_store.save(student_groups, report)
+    return jsonify({'status': 'success', 'roster_id': roster_id, 'report': report}), 201
+
+
+@blueprint.route('/api/rosters/<roster_id>', methods=['GET'])
+def roster_summary_api(roster_id):
+    report = services().roster_store.load_report(roster_id)
+    if report is None:
+        return jsonify({'status': 'error', 'message': f"Unknown roster ID '{roster_id}'."}), 404
+    return jsonify({'status': 'success', 'roster_id': roster_id, 'report': report})
@@ -0,0 +1,216 @@
+# seating_app/usn_ranges.py
+
+"""
+Lazy, range-encoded USN lists.
+
+A branch roster like "1XX21CS001 to 1XX21CS120, skipping 5 and 12" is kept
+as a UsnRange (prefix, start, end and the skipped serials) instead of 118
+strings. A UsnSequence chains ranges and plain USN lists together and
+behaves enough like a list (len, indexing, slicing, iteration, append,
+extend, in-place sort) for the grouping, common-paper merging and seating
+code in engine.py to use it unchanged. USN strings are only
+formatted when a seat is filled or a list is written out.
+
+Serials are formatted like the range inputs always have been:
+f"{prefix}{serial:03}".
+
+A few bytes of request can stand for any number of students, so the ranges
+of one request may hold at most MAX_RANGE_STUDENTS students together; a
+range that would go past it is turned away and reported as skipped.
+"""
+
+from bisect import bisect_right
+
+# Students all the USN ranges of one request may hold, 2.5 times the largest benchmark scenario.
+MAX_RANGE_STUDENTS = 500_000
+
+
+def format_usn(prefix, serial):
+    return f"{prefix}{serial:03}"
+
+
+def parse_skip_numbers(skip):
+    """Accepts "5, 12, 45" or [5, 12, 45]."""
+    if not skip:
+        return []
+    if isinstance(skip, str):
+        return [int(s.strip()) for s in skip.split(',') if s.strip()]
+    return [int(s) for s in skip]
+
+
+class UsnRange:
+    """Serials start..end (inclusive) of one prefix, minus the skipped ones. Iterates in serial order."""
+
+    __slots__ = ('prefix', 'start', 'end', 'skipped', '_gaps')
+
+    def __init__(self, prefix, start, end, skipped=()):
+        self.prefix = prefix
+        self.start = start
+        self.end = end
+        self.skipped = tuple(sorted({s for s in skipped if start <= s <= end}))
+        # _gaps[k] = how many kept serials come before the k-th skipped one.
+        self._gaps = [s - start - k for k, s in enumerate(self.skipped)]
+
+    def __len__(self):
+        return self.end - self.start + 1 - len(self.skipped)
+
+    def serial(self, index):
+        """Serial number of the index-th kept USN."""
+        return self.start + index + bisect_right(self._gaps, index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            first, stop, step = index.indices(len(self))
+            if step != 1:
+                return list(self)[index]
+            if first >= stop:
+                return UsnRange(self.prefix, self.start, self.start - 1)
+            return UsnRange(self.prefix, self.serial(first), self.serial(stop - 1), self.skipped)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('UsnRange index out of range')
+        return format_usn(self.prefix, self.serial(index))
+
+    def __iter__(self):
+        skipped = set(self.skipped)
+        prefix = self.prefix
+        for serial in range(self.start, self.end + 1):
+            if serial not in skipped:
+                yield format_usn(prefix, serial)
+
+    def __repr__(self):
+        return f'UsnRange({self.prefix!r}, {self.start}, {self.end}, skipped={list(self.skipped)})'
+
+
+def usn_ranges(prefix, start, end, skipped=()):
+    """
+    UsnRanges covering prefix+start..end. The range is split where the serial
+    gains a digit (999 -> 1000), so every piece iterates in sorted string order.
+    """
+    pieces = []
+    low = start
+    while low <= end:
+        high = min(end, max(999, 10 ** len(str(low)) - 1))
+        piece = UsnRange(prefix, low, high, skipped)
+        if len(piece):
+            pieces.append(piece)
+        low = high + 1
+    return pieces
+
+
+class UsnSequence:
+    """A list-like chain of USN lists and UsnRanges."""
+
+    __slots__ = ('segments', '_ends')
+
+    def __init__(self, segments=()):
+        self.segments = []
+        self._ends = []
+        for segment in segments:
+            self._add_segment(segment)
+
+    def _add_segment(self, segment):
+        if isinstance(segment, UsnSequence):
+            for inner in segment.segments:
+                self._add_segment(inner)
+            return
+        if not len(segment):
+            return
+        self.segments.append(segment)
+        self._ends.append((self._ends[-1] if self._ends else 0) + len(segment))
+
+    def __len__(self):
+        return self._ends[-1] if self._ends else 0
+
+    def __bool__(self):
+        return bool(self._ends)
+
+    def __iter__(self):
+        for segment in self.segments:
+            yield from segment
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            first, stop, step = index.indices(len(self))
+            if step != 1:
+                return list(self)[index]
+            pieces = []
+            segment_start = 0
+            for segment, segment_end in zip(self.segments, self._ends):
+                if segment_end > first and segment_start < stop:
+                    pieces.append(segment[max(first - segment_start, 0):min(stop, segment_end) - segment_start])
+                segment_start = segment_end
+            return UsnSequence(pieces)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('UsnSequence index out of range')
+        position = bisect_right(self._ends, index)
+        return self.segments[position][index - (self._ends[position - 1] if position else 0)]
+
+    def append(self, usn):
+        if self.segments and isinstance(self.segments[-1], list):
+            self.segments[-1].append(usn)
+            self._ends[-1] += 1
+        else:
+            self._add_segment([usn])
+
+    def extend(self, students):
+        if isinstance(students, UsnRange):
+            self._add_segment(students)
+        elif isinstance(students, UsnSequence):
+            # Plain lists are copied so appending here never changes the other sequence.
+            for segment in students.segments:
+                self._add_segment(list(segment) if isinstance(segment, list) else segment)
+        else:
+            for usn in students:
+                self.append(usn)
+
+    def sort(self):
+        """
+        Sorts in place. Segments are ordered by their first USN; only runs of
+        segments whose USN spans overlap are materialized and sorted as strings.
+        """
+        segments = sorted((sorted(segment) if isinstance(segment, list) else segment for segment in self.segments), key=lambda segment: segment[0])
+        clusters = []
+        highest = None
+        for segment in segments:
+            if clusters and highest > segment[0]:
+                clusters[-1].append(segment)
+                highest = max(highest, segment[-1])
+            else:
+                clusters.append([segment])
+                highest = segment[-1]
+        self.segments, self._ends = [], []
+        for cluster in clusters:
+            self._add_segment(cluster[0] if len(cluster) == 1 else sorted(usn for segment in cluster for usn in segment))
+
+    def __repr__(self):
+        return f'UsnSequence({self.segments!r})'
+
+
+def parse_usn_range(entry):
+    """UsnRanges for one range-encoded 'combinedStudentData' entry ({prefix, start, end, skip, subjectCode})."""
+    prefix = str(entry['prefix']).strip().upper()
+    start, end = int(entry['start']), int(entry['end'])
+    if start < 0 or start > end:
+        raise ValueError(f'start USN > end USN for prefix {prefix}')
+    return usn_ranges(prefix, start, end, parse_skip_numbers(entry.get('skip')))
+
+
+def rejected_range(prefix, start, end):
+    """The skipped-students entry for a range turned away by MAX_RANGE_STUDENTS."""
+    return f'{format_usn(prefix, start)} to {format_usn(prefix, end)} (over {MAX_RANGE_STUDENTS} students in ranges)'
+
+
+def range_skip_report(entry):
+    """(report name, skipped USNs) for a range entry, in the shape of 'skippedStudentsReport'."""
+    prefix = str(entry['prefix']).strip().upper()
+    skipped = sorted({format_usn(prefix, serial) for serial in parse_skip_numbers(entry.get('skip'))})
+    name = str(entry.get('name') or entry['subjectCode']).strip().upper()
+    return name, skipped
+
+
+def as_usn_list(students):
+    return students if isinstance(students, list) else list(students)
@@ -0,0 +1,80 @@
+# seating_app/worker_pool.py
+
+"""
+The shared process pool for CPU-bound work that is split per item (batch
+sessions, PDF pages). One pool per server process, created on first use.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# The error recorded for an item whose worker process died.
+WORKER_LOST_MESSAGE = 'The worker process stopped unexpectedly. Please try again.'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def worker_count():
+    """WORKER_PROCESSES from the environment, else one worker per core."""
+    return int(os.environ.get('WORKER_PROCESSES') or 0) or os.cpu_count() or 1
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Flask serves requests from threads, and forking a threaded process is unsafe.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=worker_count(), mp_context=context)
+        return _pool
+
+
+def discard_pool(pool=None):
+    """
+    Drops a broken pool so the next caller starts a fresh one. With `pool`,
+    only if it is still the current pool, so a fresh pool other requests
+    already use is left alone.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None and (pool is None or pool is _pool):
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def map_items(function, items, lost):
+    """
+    [function(item) for item in items], on the pool when there are several
+    items and workers. When a worker process dies, every item it takes down
+    gets lost(item) as its outcome and the other items keep theirs; the
+    broken pool is discarded.
+    """
+    if len(items) <= 1 or worker_count() == 1:
+        return list(map(function, items))
+    pool = get_pool()
+    futures = []
+    for item in items:
+        try:
+            futures.append(pool.submit(function, item))
+        except RuntimeError:
+            # Broken, or shut down since by another request that found it broken.
+            futures.append(None)
+    outcomes = []
+    broken = False
+    for item, future in zip(items, futures):
+        if future is not None:
+            try:
+                outcomes.append(future.result())
+                continue
+            except (BrokenProcessPool, CancelledError):
+                pass
+        broken = True
+        outcomes.append(lost(item))
+    if broken:
+        discard_pool(pool)
+    return outcomes
@@ -0,0 +1,124 @@
+# tests/conftest.py
+
+import importlib.util
+import os
+import re
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from seating_app import create_app  # noqa: E402
+from seating_app.engine import EMPTY_SEAT  # noqa: E402
+
+SUBJECTS = ['CS', 'EC', 'ME', 'AI', 'DS', 'MA', 'PH']
+_COLUMN_RE = re.compile(r'^Column (\d+) ')
+
+
+PLANS_TOKEN = 'test-token'
+
+
+def database_config(tmp_path):
+    """App config that puts every database in `tmp_path`."""
+    return {'TESTING': True, 'PLANS_DB': str(tmp_path / 'plans.sqlite3'), 'JOBS_DB': str(tmp_path / 'jobs.sqlite3'),
+            'RESULTS_DB': str(tmp_path / 'results.sqlite3'), 'PROFILES_DB': str(tmp_path / 'profiles.sqlite3'),
+            'PLANS_TOKEN': PLANS_TOKEN}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """An app whose rosters, jobs and plans live in a temporary directory."""
+    monkeypatch.setenv('ROSTER_DIR', str(tmp_path / 'rosters'))
+    return create_app(database_config(tmp_path))
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def load_baseline(name):
+    """The Flask app of tests/baseline/<name>.py, the server before the seating engine existed."""
+    spec = importlib.util.spec_from_file_location(f'baseline_{name}', os.path.join(ROOT, 'tests', 'baseline', f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def random_payload(rng, students_per_bench=(1, 2, 3)):
+    """
+    A valid subject-based payload: unique USNs, disjoint common paper groups,
+    and sometimes fewer seats than students.
+    """
+    subjects = rng.sample(SUBJECTS, rng.randint(1, 5))
+    shuffled = rng.sample(subjects, len(subjects))
+    common = [shuffled[i:i + 2] for i in range(0, len(shuffled) - 1, 2) if rng.random() < 0.5]
+    usns = rng.sample(range(100000), rng.randint(1, 150))
+    students = [{'usn': f'1XX{usn:05}', 'subjectCode': rng.choice(subjects)} for usn in usns]
+    rooms = []
+    for index in range(rng.randint(1, 5)):
+        class_columns = rng.randint(1, 4)
+        benches = rng.randint(class_columns, 25)
+        room = {'name': f'R{index}', 'benches': benches, 'classColumns': class_columns}
+        if rng.random() < 0.4:
+            # Any split, columns without benches included.
+            columns = [0] * class_columns
+            for _ in range(benches):
+                columns[rng.randrange(class_columns)] += 1
+            room['benchesInColumns'] = columns
+        rooms.append(room)
+    return {
+        'roomConfigurations': rooms,
+        'studentsPerBench': rng.choice(students_per_bench),
+        'commonPaperGroups': ';'.join(','.join(group) for group in common),
+        'combinedStudentData': students,
+    }
+
+
+def seating_group_of(payload):
+    """USN -> seating group for a random_payload(), named like merge_common_groups() names it."""
+    group_of = {}
+    for group in payload['commonPaperGroups'].split(';'):
+        subjects = sorted(filter(None, group.split(',')))
+        for subject in subjects:
+            group_of[subject] = ', '.join(subjects)
+    return {student['usn']: group_of.get(student['subjectCode'], student['subjectCode']) for student in payload['combinedStudentData']}
+
+
+def seat_positions(response):
+    """(room name, column number, row, seat) -> USN of every occupied seat of a response body; row 0 is the front bench."""
+    seats = {}
+    for room in response['room_arrangements']:
+        for column in room['arrangement_by_column']:
+            number = int(_COLUMN_RE.match(column['name']).group(1))
+            for row, bench in enumerate(column['seating_plan']):
+                for seat, usn in enumerate(bench['seats']):
+                    if usn and usn != EMPTY_SEAT:
+                        seats[room['room_name'], number, row, seat] = usn
+    return seats
+
+
+def neighbour_conflicts(response, group_of):
+    """
+    Reference conflict count, seat by seat: {direction: conflicts, 'total': ...}
+    and the number of occupied neighbouring pairs. Columns sit side by side in
+    the order of their numbers.
+    """
+    students_per_bench = len(response['student_seat_headers'])
+    seats = {}
+    for (room_name, column, row, seat), usn in seat_positions(response).items():
+        seats[room_name, row, (column - 1) * students_per_bench + seat] = group_of[usn]
+    neighbours = {'side': [(0, 1)], 'front_back': [(1, 0)], 'diagonal': [(1, -1), (1, 1)]}
+    conflicts = dict.fromkeys(neighbours, 0)
+    pairs = 0
+    for (room_name, row, x), group in seats.items():
+        for direction, steps in neighbours.items():
+            for d_row, d_x in steps:
+                other = seats.get((room_name, row + d_row, x + d_x))
+                if other is not None:
+                    pairs += 1
+                    conflicts[direction] += other == group
+    conflicts['total'] = sum(conflicts.values())
+    return conflicts, pairs
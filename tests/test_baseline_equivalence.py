@@ -0,0 +1,119 @@
+# tests/test_baseline_equivalence.py
+
+"""
+Differential tests: for random payloads, valid and invalid, the server
+answers /api/generate-allotment with the same status and the same bytes as
+the baseline apps in tests/baseline did, in both input modes.
+"""
+
+import json
+import random
+
+import pytest
+
+from conftest import load_baseline
+
+CASES = 300
+
+
+@pytest.fixture(scope='module')
+def baseline_client():
+    return load_baseline('app').test_client()
+
+
+@pytest.fixture(scope='module')
+def baseline_final_client():
+    return load_baseline('final_app').test_client()
+
+
+def random_rooms(rng):
+    rooms = []
+    for index in range(rng.randint(1, 6)):
+        benches, class_columns = rng.randint(1, 30), rng.randint(1, 4)
+        room = {'name': f'R{index}', 'benches': benches, 'classColumns': class_columns}
+        if rng.random() < 0.3:
+            columns = [0] * class_columns
+            for _ in range(benches):
+                columns[rng.randrange(class_columns)] += 1
+            room['benchesInColumns'] = columns
+        if rng.random() < 0.03:
+            room['benches'] = 0
+        if rng.random() < 0.03:
+            room['benchesInColumns'] = [1, 'x']
+        if rng.random() < 0.03:
+            del room['name']
+        rooms.append(room)
+    return rooms
+
+
+def subject_payload(rng):
+    subjects = [rng.choice(['CS', 'ec', 'ME ', 'AI', 'ds', 'X1', 'X2', '']) for _ in range(rng.randint(1, 6))]
+    students = [{'usn': f' 1xx{rng.randint(0, 99999):05}', 'subjectCode': rng.choice(subjects)} for _ in range(rng.randint(0, 200))]
+    payload = {
+        'roomConfigurations': random_rooms(rng),
+        'studentsPerBench': rng.choice([1, 2, 3, 4, 0, 'a']),
+        'commonPaperGroups': rng.choice(['', 'CS,EC', 'cs,ec; ai,ds', 'X1,X2,CS;ME', 'ZZ,YY', 'CS']),
+        'combinedStudentData': students,
+    }
+    if rng.random() < 0.2:
+        payload['skippedStudentsReport'] = {'CS': ['A']}
+    return payload
+
+
+def branch_payload(rng):
+    branches = []
+    for index in range(rng.randint(1, 5)):
+        start = rng.randint(1, 60)
+        end = start + rng.randint(-2, 80)
+        branches.append({
+            'name': rng.choice(['cs', 'ec', 'me', 'ai', '']) + str(index % 3),
+            'prefix': rng.choice(['1XX21CS', '1XX21EC', '1XX22']),
+            'start': start, 'end': end,
+            'skip': ', '.join(str(rng.randint(start, max(start, end + 1))) for _ in range(rng.randint(0, 3))),
+        })
+    names = [branch['name'].upper() for branch in branches if branch['name']]
+    groups = ';'.join(','.join(rng.sample(names, min(len(names), 2))) for _ in range(rng.randint(0, 2))) if names else ''
+    return {
+        'roomConfigurations': random_rooms(rng),
+        'studentsPerBench': rng.choice([1, 2, 3, 4, 0, 'a']),
+        'commonPaperGroups': groups,
+        'branchDetails': branches,
+    }
+
+
+def assert_same_answer(expected, actual, payload):
+    assert actual.status_code == expected.status_code, payload
+    assert actual.data == expected.data, payload
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_subject_mode_matches_baseline(client, baseline_client, seed):
+    rng = random.Random(seed)
+    for _ in range(CASES):
+        payload = subject_payload(rng)
+        assert_same_answer(baseline_client.post('/api/generate-allotment', json=payload),
+                           client.post('/api/generate-allotment', json=payload), payload)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_branch_mode_matches_baseline(client, baseline_final_client, seed):
+    rng = random.Random(seed)
+    for _ in range(CASES):
+        payload = branch_payload(rng)
+        assert_same_answer(baseline_final_client.post('/api/generate-allotment', json=payload),
+                           client.post('/api/generate-allotment', json=payload), payload)
+
+
+def test_streamed_rooms_and_cache_hits_match_baseline(client, baseline_client):
+    """The NDJSON room records and a repeated (cached) answer carry what the baseline's body does."""
+    rng = random.Random(7)
+    for _ in range(50):
+        payload = subject_payload(rng)
+        expected = baseline_client.post('/api/generate-allotment', json=payload)
+        if expected.status_code != 200:
+            continue
+        records = [json.loads(line) for line in client.post('/api/generate-allotment?stream=1', json=payload).get_data(as_text=True).splitlines()]
+        rooms = [{key: value for key, value in record.items() if key not in ('type', 'index')} for record in records if record['type'] == 'room']
+        assert rooms == expected.get_json()['room_arrangements']
+        assert client.post('/api/generate-allotment', json=payload).data == expected.data
+        assert client.post('/api/generate-allotment', json=payload).headers['X-Cache'] == 'HIT'
@@ -0,0 +1,26 @@
+# tests/test_capacity_planner.py
+
+"""The capacity planner's replay of sticky pairing agrees with the seating itself."""
+
+import random
+
+import pytest
+
+from seating_app.capacity_planner import sticky_pairing_usage
+from seating_app.engine import EMPTY_SEAT, seat_students
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_usage_matches_seat_students(seed):
+    rng = random.Random(seed)
+    for _ in range(300):
+        names = rng.sample(['A', 'B', 'C', 'D', 'E', 'F'], rng.randint(1, 6))
+        student_lists = {name: [f'{name}{i}' for i in range(rng.randint(1, 60))] for name in names}
+        students_per_bench = rng.randint(1, 4)
+        total_benches = rng.choice([None, rng.randint(1, 80)])
+
+        benches, empty_seats, unseated = sticky_pairing_usage({name: len(usns) for name, usns in student_lists.items()}, students_per_bench, total_benches)
+        seated, left = seat_students(student_lists, students_per_bench, 10**6 if total_benches is None else total_benches)
+        assert benches == len(seated)
+        assert empty_seats == sum(bench.count(EMPTY_SEAT) for bench in seated)
+        assert unseated == {name: len(usns) for name, usns in left.items()}
@@ -0,0 +1,96 @@
+# tests/test_incremental_allotment.py
+
+"""Incremental re-allotment against random plans and random deltas."""
+
+import random
+
+import pytest
+
+from conftest import random_payload, seat_positions, seating_group_of
+from seating_app.engine import AllotmentError, generate_allotment
+from seating_app.incremental_allotment import reallot
+
+
+def random_delta(rng, payload, previous):
+    """Withdraws some seated students and adds new ones, some to a new subject."""
+    subject_of = {student['usn']: student['subjectCode'] for student in payload['combinedStudentData']}
+    seated = list(seat_positions(previous).values())
+    removed = {}
+    for usn in rng.sample(seated, rng.randint(0, min(len(seated), 8))):
+        removed.setdefault(subject_of[usn], []).append(usn)
+    added = {}
+    subjects = sorted(set(subject_of.values())) + ['NEW']
+    for serial in range(rng.randint(0, 8)):
+        added.setdefault(rng.choice(subjects), []).append(f'2XX{serial:05}')
+    return {'added': added, 'removed': removed}
+
+
+def check_benches(response, group_of):
+    """No two neighbouring seats of a bench hold the same seating group."""
+    seats = seat_positions(response)
+    for (room_name, column, row, seat), usn in seats.items():
+        neighbour = seats.get((room_name, column, row, seat + 1))
+        assert neighbour is None or group_of[neighbour] != group_of[usn], (room_name, column, row)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_reallot_keeps_every_student_once(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        payload = random_payload(rng)
+        previous = generate_allotment(payload)
+        delta = random_delta(rng, payload, previous)
+        result = reallot(dict(payload, previousPlan=previous, delta=delta))
+
+        withdrawn = {usn for usns in delta['removed'].values() for usn in usns}
+        expected = {student['usn'] for student in payload['combinedStudentData']} - withdrawn
+        expected |= {usn for usns in delta['added'].values() for usn in usns}
+        assert {usn for usns in result['group_map'].values() for usn in usns} == expected
+
+        seats = seat_positions(result)
+        seated = list(seats.values())
+        unseated = [usn for usns in result['unseated_students'].values() for usn in usns]
+        assert sorted(seated + unseated) == sorted(expected)
+        assert result['delta_report']['removed'] == len(withdrawn)
+        assert result['delta_report']['added'] == sum(map(len, delta['added'].values()))
+
+        # Students who stayed keep their seats; rooms that are not reprinted do not change.
+        for position, usn in seat_positions(previous).items():
+            assert usn in withdrawn or seats[position] == usn
+        changed = set(result['changed_rooms'])
+        previous_rooms = {room['room_name']: room for room in previous['room_arrangements']}
+        for room in result['room_arrangements']:
+            if room['room_name'] not in changed:
+                assert room == previous_rooms[room['room_name']]
+
+        added = [{'usn': usn, 'subjectCode': subject} for subject, usns in delta['added'].items() for usn in usns]
+        seating_group = seating_group_of(dict(payload, combinedStudentData=payload['combinedStudentData'] + added))
+        check_benches(result, seating_group)
+
+        # A group with students still waiting has no vacated seat left empty.
+        for position, usn in seat_positions(previous).items():
+            if usn in withdrawn and position not in seats:
+                assert seating_group[usn] not in result['unseated_students'], (payload, delta)
+
+
+def test_full_rooms_of_three_refill_a_vacated_seat():
+    students = [{'usn': f'1XX21CS{i:03}', 'subjectCode': 'CS'} for i in range(8)]
+    students += [{'usn': f'1XX21EC{i:03}', 'subjectCode': 'EC'} for i in range(4)]
+    payload = {'roomConfigurations': [{'name': 'R', 'benches': 4, 'classColumns': 2}], 'studentsPerBench': 3,
+               'combinedStudentData': students}
+    previous = generate_allotment(payload)
+    assert not previous['unseated_students']
+    delta = {'removed': {'CS': ['1XX21CS005']}, 'added': {'CS': ['1XX21CS100']}}
+    result = reallot(dict(payload, previousPlan=previous, delta=delta))
+    assert result['unseated_students'] == {}
+    assert result['delta_report']['seated'] == 1
+    position = next(position for position, usn in seat_positions(previous).items() if usn == '1XX21CS005')
+    assert seat_positions(result)[position] == '1XX21CS100'
+
+
+def test_rejects_a_plan_for_other_rooms():
+    payload = random_payload(random.Random(0))
+    previous = generate_allotment(payload)
+    payload['roomConfigurations'] = [dict(room, name=room['name'] + 'X') for room in payload['roomConfigurations']]
+    with pytest.raises(AllotmentError):
+        reallot(dict(payload, previousPlan=previous, delta={}))
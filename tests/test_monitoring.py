@@ -0,0 +1,36 @@
+# tests/test_monitoring.py
+
+"""/metrics, and what a scrape may touch."""
+
+import os
+
+from conftest import database_config
+from seating_app import create_app
+
+
+def metric(client, name):
+    for line in client.get('/metrics').get_data(as_text=True).splitlines():
+        if line.startswith(name + ' '):
+            return float(line.split()[1])
+    raise AssertionError(f'{name} is not exported')
+
+
+def test_scrapes_do_not_create_the_job_store(app, client):
+    assert metric(client, 'allotment_jobs_queued') == 0
+    assert metric(client, 'allotment_jobs_running') == 0
+    assert not os.path.exists(app.config['JOBS_DB'])
+
+    app.extensions['seating'].job_store.submit('{}')
+    assert metric(client, 'allotment_jobs_queued') == 1
+
+
+def test_workers_report_the_shared_queue_and_profiles(tmp_path, monkeypatch):
+    monkeypatch.setenv('ROSTER_DIR', str(tmp_path / 'rosters'))
+    config = dict(database_config(tmp_path), ALLOTMENT_PROFILING='1')
+    submitting, scraped = create_app(config), create_app(config)
+    submitting.extensions['seating'].job_store.submit('{}')
+    assert metric(scraped.test_client(), 'allotment_jobs_queued') == 1
+
+    profiled = submitting.test_client().get('/metrics', headers={'X-Profile': '1'})
+    report = scraped.test_client().get(f"/api/profiles/{profiled.headers['X-Profile-Id']}")
+    assert report.status_code == 200 and 'GET /metrics' in report.get_data(as_text=True)
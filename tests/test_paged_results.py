@@ -0,0 +1,51 @@
+# tests/test_paged_results.py
+
+"""'?view=paged' results, stored by one worker and read back by another."""
+
+import random
+
+from conftest import database_config
+from seating_app import create_app
+from seating_app.paged_results import PagedResultStore
+from test_baseline_equivalence import branch_payload
+
+
+def test_pages_from_another_worker_match_the_full_response(tmp_path, monkeypatch):
+    monkeypatch.setenv('ROSTER_DIR', str(tmp_path / 'rosters'))
+    config = database_config(tmp_path)
+    computing, reading = create_app(config).test_client(), create_app(config).test_client()
+    rng = random.Random(3)
+    checked = 0
+    while checked < 40:
+        payload = branch_payload(rng)
+        full = computing.post('/api/generate-allotment', json=payload)
+        if full.status_code != 200:
+            continue
+        checked += 1
+        expected = full.get_json()
+        summary = computing.post('/api/generate-allotment?view=paged', json=payload).get_json()
+        result_id = summary['result_id']
+        assert reading.get(f'/api/results/{result_id}').get_json() == summary
+
+        rooms = []
+        for offset in range(0, summary['room_count'], 3):
+            rooms += reading.get(f'/api/results/{result_id}/rooms?offset={offset}&limit=3').get_json()['room_arrangements']
+        assert rooms == expected['room_arrangements']
+        assert {key: value for key, value in summary.items() if key in expected and key != 'status'} == {
+            key: value for key, value in expected.items() if key in summary and key != 'status'}
+
+        if rooms:
+            room = reading.get(f'/api/results/{result_id}/rooms/0?start=1&count=2').get_json()['room']
+            benches = [bench for column in room['arrangement_by_column'] for bench in column['seating_plan']]
+            assert benches == [bench for column in rooms[0]['arrangement_by_column'] for bench in column['seating_plan']][1:3]
+
+
+def test_unknown_and_expired_results(tmp_path, client):
+    assert client.get('/api/results/nope').status_code == 404
+    store = PagedResultStore(str(tmp_path / 'results.sqlite3'))
+    expired = PagedResultStore(str(tmp_path / 'results.sqlite3'), ttl_seconds=-1)
+    summary = client.post('/api/generate-allotment?view=paged', json={
+        'roomConfigurations': [{'name': 'R', 'benches': 2, 'classColumns': 1}], 'studentsPerBench': 1,
+        'branchDetails': [{'name': 'CS', 'prefix': '1XX21CS', 'start': 1, 'end': 2, 'skip': ''}]}).get_json()
+    assert store.get(summary['result_id']).summary(summary['result_id']) == summary
+    assert expired.get(summary['result_id']) is None
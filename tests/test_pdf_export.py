@@ -0,0 +1,35 @@
+# tests/test_pdf_export.py
+
+"""PDF export: malformed results are refused up front, and lost rooms are rendered again."""
+
+import random
+
+from conftest import random_payload
+from seating_app import pdf_export
+from seating_app.engine import generate_allotment
+
+
+def many_rooms_result():
+    rooms = [{'name': f'R{i}', 'benches': 4, 'classColumns': 2} for i in range(pdf_export.PARALLEL_MIN_ROOMS + 2)]
+    students = [{'usn': f'1XX{i:03}', 'subjectCode': 'AB'[i % 2]} for i in range(80)]
+    return generate_allotment({'roomConfigurations': rooms, 'studentsPerBench': 2, 'combinedStudentData': students,
+                               'commonPaperGroups': ''})
+
+
+def test_a_malformed_room_is_a_400(client):
+    result = generate_allotment(random_payload(random.Random(1)))
+    del result['room_arrangements'][-1]['arrangement_by_column'][0]['seating_plan'][-1]['bench_number']
+    response = client.post('/api/export-pdf', json={'result': result})
+    assert response.status_code == 400
+    assert 'bench_number' in response.get_json()['message']
+
+
+def test_rooms_whose_worker_died_are_rendered_again(client, monkeypatch):
+    result = many_rooms_result()
+    expected = client.post('/api/export-pdf', json={'result': result}).get_data()
+
+    def lose_every_second(function, items, lost):
+        return [lost(item) if index % 2 else function(item) for index, item in enumerate(items)]
+    monkeypatch.setattr(pdf_export, 'map_items', lose_every_second)
+    response = client.post('/api/export-pdf', json={'result': result})
+    assert response.status_code == 200 and response.get_data() == expected
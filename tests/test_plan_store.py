@@ -0,0 +1,86 @@
+# tests/test_plan_store.py
+
+"""Published plans: the rows stored per seat, and lookups from more than one worker."""
+
+import random
+
+import pytest
+
+from conftest import PLANS_TOKEN, database_config, random_payload
+from seating_app import create_app
+from seating_app.engine import EMPTY_SEAT, generate_allotment
+from seating_app.plan_store import seat_rows
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_seat_rows_match_the_response(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        payload = random_payload(rng)
+        response = generate_allotment(payload)
+        subject_of = {student['usn']: student['subjectCode'] for student in payload['combinedStudentData']}
+        expected = []
+        for room in response['room_arrangements']:
+            for column in room['arrangement_by_column']:
+                number = int(column['name'].split()[1])
+                for bench in column['seating_plan']:
+                    expected += [(usn, room['room_name'], number, bench['bench_number'], seat, subject_of[usn])
+                                 for seat, usn in enumerate(bench['seats'], start=1) if usn != EMPTY_SEAT]
+        assert list(seat_rows(response)) == expected
+
+
+def test_seat_rows_skip_columns_without_benches():
+    payload = {'roomConfigurations': [{'name': 'R', 'benches': 5, 'classColumns': 4, 'benchesInColumns': [1, 0, 3, 1]}],
+               'studentsPerBench': 1, 'combinedStudentData': [{'usn': f'1XX{i:03}', 'subjectCode': 'A'} for i in range(5)]}
+    rows = list(seat_rows(generate_allotment(payload)))
+    assert [(column, bench) for _, _, column, bench, _, _ in rows] == [(1, 1), (3, 2), (3, 3), (3, 4), (4, 5)]
+
+
+AUTHORIZED = {'Authorization': f'Bearer {PLANS_TOKEN}'}
+
+
+def test_lookups_follow_plans_published_by_another_worker(tmp_path, monkeypatch):
+    monkeypatch.setenv('ROSTER_DIR', str(tmp_path / 'rosters'))
+    config = database_config(tmp_path)
+    publisher, reader = create_app(config).test_client(), create_app(config).test_client()
+    payload = {'roomConfigurations': [{'name': 'R1', 'benches': 2, 'classColumns': 1}], 'studentsPerBench': 1,
+               'combinedStudentData': [{'usn': '1XX001', 'subjectCode': 'A'}]}
+
+    first = publisher.post('/api/plans', json={'result': generate_allotment(payload), 'name': 'first'},
+                           headers=AUTHORIZED).get_json()
+    assert [seat['plan_name'] for seat in reader.get('/api/seats/1xx001').get_json()['seats']] == ['first']
+
+    payload['roomConfigurations'][0]['name'] = 'R2'
+    publisher.post('/api/plans', json={'result': generate_allotment(payload), 'name': 'second'}, headers=AUTHORIZED)
+    seats = reader.get('/api/seats/1XX001').get_json()['seats']
+    assert sorted(seat['room_name'] for seat in seats) == ['R1', 'R2']
+
+    assert publisher.delete(f"/api/plans/{first['plan_id']}", headers=AUTHORIZED).status_code == 200
+    assert [seat['plan_name'] for seat in reader.get('/api/seats/1XX001').get_json()['seats']] == ['second']
+
+
+def test_lower_case_usns_are_found_in_any_case(client):
+    payload = {'roomConfigurations': [{'name': 'R', 'benches': 2, 'classColumns': 1}], 'studentsPerBench': 1,
+               'branchDetails': [{'name': 'CS', 'prefix': '1xx21cs', 'start': 1, 'end': 2, 'skip': ''}]}
+    result = client.post('/api/generate-allotment', json=payload).get_json()
+    assert client.post('/api/plans', json={'result': result}, headers=AUTHORIZED).status_code == 201
+    for usn in ('1xx21cs001', '1XX21CS001', ' 1Xx21cS002 '):
+        seats = client.get(f'/api/seats/{usn}').get_json()['seats']
+        assert [(seat['room_name'], seat['bench_number']) for seat in seats] == [('R', 1 if usn.strip()[-1] == '1' else 2)]
+
+
+def test_publishing_needs_the_token(tmp_path, monkeypatch, client):
+    result = generate_allotment({'roomConfigurations': [{'name': 'R', 'benches': 1, 'classColumns': 1}], 'studentsPerBench': 1,
+                                 'combinedStudentData': [{'usn': '1XX001', 'subjectCode': 'A'}]})
+    for headers in ({}, {'Authorization': 'Bearer wrong'}, {'Authorization': PLANS_TOKEN}):
+        assert client.post('/api/plans', json={'result': result}, headers=headers).status_code == 401
+    plan_id = client.post('/api/plans', json={'result': result}, headers=AUTHORIZED).get_json()['plan_id']
+    assert client.delete(f'/api/plans/{plan_id}').status_code == 401
+    assert client.get('/api/seats/1XX001').get_json()['seats']
+
+    monkeypatch.delenv('PLANS_TOKEN', raising=False)
+    config = dict(database_config(tmp_path))
+    del config['PLANS_TOKEN']
+    untokened = create_app(config).test_client()
+    assert untokened.post('/api/plans', json={'result': result}, headers=AUTHORIZED).status_code == 403
+    assert untokened.delete(f'/api/plans/{plan_id}', headers=AUTHORIZED).status_code == 403
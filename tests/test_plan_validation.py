@@ -0,0 +1,69 @@
+# tests/test_plan_validation.py
+
+"""The vectorized validator agrees with a seat-by-seat count of neighbour conflicts."""
+
+import random
+
+import pytest
+
+from conftest import neighbour_conflicts, random_payload, seating_group_of
+from seating_app.engine import allotment_response, compute_allotment
+from seating_app.plan_validation import DIRECTIONS, validate_plan, validate_response
+
+pytest.importorskip('numpy')
+
+
+def conflict_totals(report):
+    return {direction: report['conflicts'][direction] for direction in DIRECTIONS + ('total',)}
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_validator_matches_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        payload = random_payload(rng)
+        plan = compute_allotment(payload)
+        response = allotment_response(plan)
+        conflicts, pairs = neighbour_conflicts(response, seating_group_of(payload))
+
+        from_plan = validate_plan(plan)
+        assert conflict_totals(from_plan) == conflicts, payload
+        assert from_plan['neighbour_pairs'] == pairs, payload
+        assert sum(room['total'] for room in from_plan['rooms']) == conflicts['total']
+
+        from_response = validate_response(response, payload['commonPaperGroups'])
+        assert conflict_totals(from_response) == conflicts, payload
+        assert from_response['neighbour_pairs'] == pairs, payload
+        assert from_response['score'] == from_plan['score']
+
+
+def test_one_column_by_hand():
+    # One seat per bench: A, A, B, B front to back.
+    payload = {'roomConfigurations': [{'name': 'R', 'benches': 4, 'classColumns': 1}], 'studentsPerBench': 1,
+               'combinedStudentData': [{'usn': f'1XX{i:03}', 'subjectCode': 'AB'[i % 2]} for i in range(4)]}
+    report = validate_plan(compute_allotment(payload))
+    assert report['conflicts'] == {'front_back': 2, 'side': 0, 'diagonal': 0, 'total': 2}
+    assert report['neighbour_pairs'] == 3 and report['score'] == round(1 / 3, 6)
+
+
+def test_columns_beside_an_empty_column_are_not_neighbours():
+    payload = {'roomConfigurations': [{'name': 'R', 'benches': 5, 'classColumns': 4, 'benchesInColumns': [1, 0, 3, 1]}],
+               'studentsPerBench': 1, 'combinedStudentData': [{'usn': f'1XX{i:03}', 'subjectCode': 'A'} for i in range(5)]}
+    plan = compute_allotment(payload)
+    response = allotment_response(plan)
+    assert [column['name'] for column in response['room_arrangements'][0]['arrangement_by_column']] == [
+        'Column 1 (1 Benches)', 'Column 3 (3 Benches)', 'Column 4 (1 Benches)']
+    expected = {'front_back': 2, 'side': 1, 'diagonal': 1, 'total': 4}
+    assert conflict_totals(validate_plan(plan)) == expected
+    assert conflict_totals(validate_response(response)) == expected
+
+
+def test_column_numbers_far_apart_do_not_widen_the_grid():
+    payload = {'roomConfigurations': [{'name': 'R', 'benches': 5, 'classColumns': 4, 'benchesInColumns': [1, 0, 3, 1]}],
+               'studentsPerBench': 1, 'combinedStudentData': [{'usn': f'1XX{i:03}', 'subjectCode': 'A'} for i in range(5)]}
+    response = allotment_response(compute_allotment(payload))
+    columns = response['room_arrangements'][0]['arrangement_by_column']
+    expected = conflict_totals(validate_response(response))
+    columns[1]['name'] = 'Column 100000000 (3 Benches)'
+    columns[2]['name'] = 'Column 100000001 (1 Benches)'
+    assert conflict_totals(validate_response(response)) == expected
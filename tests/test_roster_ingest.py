@@ -0,0 +1,28 @@
+# tests/test_roster_ingest.py
+
+"""Stored rosters expire, and are cleaned up by the next upload."""
+
+import os
+import time
+
+from seating_app.roster_ingest import RosterStore
+
+
+def test_expired_rosters_are_gone_and_deleted(tmp_path):
+    store = RosterStore(str(tmp_path), ttl_seconds=60)
+    old_id = store.save({'CS': ['1XX001']}, {'students': 1})
+    kept_id = store.save({'EC': ['1XX002']}, {'students': 1})
+    old_path = tmp_path / f'{old_id}.json'
+    stale = time.time() - 120
+    os.utime(old_path, (stale, stale))
+    (tmp_path / 'left-behind.tmp').touch()
+    os.utime(tmp_path / 'left-behind.tmp', (stale, stale))
+
+    assert store.load_groups(old_id) is None
+    assert store.load_groups(kept_id) == {'EC': ['1XX002']}
+
+    # Uploading a kept roster again renews it; any upload deletes what has expired.
+    os.utime(tmp_path / f'{kept_id}.json', (stale, stale))
+    assert store.save({'EC': ['1XX002']}, {'students': 1}) == kept_id
+    assert store.load_report(kept_id) == {'students': 1}
+    assert sorted(os.listdir(tmp_path)) == [f'{kept_id}.json']
@@ -0,0 +1,70 @@
+# tests/test_seat_optimizer.py
+
+"""The optimizing mode only moves students around, and never makes a plan worse."""
+
+import random
+
+import pytest
+
+from conftest import neighbour_conflicts, random_payload, seat_positions, seating_group_of
+from seating_app.engine import AllotmentError, allotment_response, compute_allotment
+from seating_app.seat_optimizer import DEFAULT_UNSEATED_WEIGHT, optimize_options
+from test_incremental_allotment import check_benches
+
+
+def everyone(response):
+    seated = list(seat_positions(response).values())
+    return sorted(seated + [usn for usns in response['unseated_students'].values() for usn in usns])
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_optimized_plan_is_a_better_permutation(seed):
+    rng = random.Random(seed)
+    for _ in range(30):
+        payload = random_payload(rng)
+        greedy = allotment_response(compute_allotment(payload))
+        optimized = allotment_response(compute_allotment(dict(payload, optimize={'timeBudgetMs': 20, 'seed': seed})))
+        report = optimized['optimization']
+
+        assert everyone(optimized) == everyone(greedy)
+        assert optimized['group_map'] == greedy['group_map']
+        assert [room['room_name'] for room in optimized['room_arrangements']] == [room['room_name'] for room in greedy['room_arrangements']]
+
+        group_of = seating_group_of(payload)
+        check_benches(optimized, group_of)
+        for response, metrics in ((greedy, report['greedy']), (optimized, report['optimized'])):
+            assert neighbour_conflicts(response, group_of)[0]['total'] == metrics['conflicts']
+            assert sum(map(len, response['unseated_students'].values())) == metrics['unseated']
+
+        def cost(metrics):
+            return metrics['conflicts'] + DEFAULT_UNSEATED_WEIGHT * metrics['unseated']
+        assert cost(report['optimized']) <= cost(report['greedy'])
+
+
+def test_no_weight_seats_a_student_beside_their_own_paper():
+    # One paper: greedy seating leaves the second seat of every bench empty, and it stays empty.
+    payload = {'roomConfigurations': [{'name': 'R', 'benches': 6, 'classColumns': 1}], 'studentsPerBench': 2,
+               'combinedStudentData': [{'usn': f'1XX{i:03}', 'subjectCode': 'A'} for i in range(12)],
+               'commonPaperGroups': ''}
+    for weight in (0, DEFAULT_UNSEATED_WEIGHT, 1000):
+        plan = compute_allotment(dict(payload, optimize={'timeBudgetMs': 20, 'unseatedWeight': weight}))
+        assert plan.optimization['greedy'] == {'conflicts': 5, 'empty_seats': 6, 'unseated': 6}
+        assert plan.optimization['optimized']['unseated'] == 6 and plan.optimization['optimized']['conflicts'] <= 5
+        check_benches(allotment_response(plan), seating_group_of(payload))
+
+
+@pytest.mark.parametrize('options', [[], {'timeBudgetMs': 0}, {'timeBudgetMs': 'x'}, {'unseatedWeight': -1}])
+def test_invalid_options(options):
+    with pytest.raises(AllotmentError):
+        optimize_options(options)
+
+
+def test_optimized_plans_are_neither_cached_nor_etagged(client):
+    payload = random_payload(random.Random(0))
+    greedy = client.post('/api/generate-allotment', json=payload)
+    assert greedy.headers.get('ETag')
+    for _ in range(2):
+        optimized = client.post('/api/generate-allotment', json=dict(payload, optimize={'timeBudgetMs': 5}),
+                                headers={'If-None-Match': greedy.headers['ETag']})
+        assert optimized.status_code == 200 and 'optimization' in optimized.get_json()
+        assert 'ETag' not in optimized.headers and optimized.headers['X-Cache'] == 'MISS'
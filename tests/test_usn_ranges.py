@@ -0,0 +1,126 @@
+# tests/test_usn_ranges.py
+
+"""Range-encoded USN lists behave like the expanded lists they stand for."""
+
+import random
+
+import pytest
+
+from seating_app.engine import EMPTY_SEAT
+from seating_app.usn_ranges import MAX_RANGE_STUDENTS, UsnSequence, format_usn, parse_usn_range, usn_ranges
+
+
+def expanded(prefix, start, end, skipped):
+    return [format_usn(prefix, serial) for serial in range(start, end + 1) if serial not in set(skipped)]
+
+
+def random_sequence(rng):
+    """A UsnSequence of ranges and plain lists, with the list it stands for."""
+    sequence, plain = UsnSequence(), []
+    for _ in range(rng.randint(0, 5)):
+        if rng.random() < 0.6:
+            prefix = rng.choice(['1XX21CS', '1XX21EC', '1XX22'])
+            start = rng.choice([0, 1, 5, 990, 998])
+            end = start + rng.randint(-1, 40)
+            skipped = [rng.randint(start, end + 2) for _ in range(rng.randint(0, 4))]
+            for usn_range in usn_ranges(prefix, start, end, skipped):
+                sequence.extend(usn_range)
+            plain += expanded(prefix, start, end, skipped)
+        else:
+            usns = [f'{rng.choice(["1XX21CS", "1XX21EC", "Z"])}{rng.randint(0, 1200):03}' for _ in range(rng.randint(1, 6))]
+            sequence.extend(usns)
+            plain += usns
+    return sequence, plain
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_sequence_behaves_like_its_list(seed):
+    rng = random.Random(seed)
+    for _ in range(300):
+        sequence, plain = random_sequence(rng)
+        assert len(sequence) == len(plain)
+        assert bool(sequence) == bool(plain)
+        assert list(sequence) == plain
+        if plain:
+            index = rng.randrange(-len(plain), len(plain))
+            assert sequence[index] == plain[index]
+        start, stop = sorted(rng.randint(-3, len(plain) + 3) for _ in range(2))
+        assert list(sequence[start:stop]) == plain[start:stop]
+        assert list(sequence[::2]) == plain[::2]
+        sequence.sort()
+        assert list(sequence) == sorted(plain)
+
+
+def test_ranges_split_where_serials_gain_a_digit():
+    pieces = usn_ranges('1XX21CS', 995, 1003, [998])
+    assert [list(piece) for piece in pieces] == [expanded('1XX21CS', 995, 999, [998]), expanded('1XX21CS', 1000, 1003, [])]
+    assert all(list(piece) == sorted(piece) for piece in pieces)
+
+
+def test_extending_with_a_sequence_copies_its_lists():
+    source = UsnSequence([['A1', 'A2']])
+    target = UsnSequence()
+    target.extend(source)
+    target.append('A3')
+    assert list(source) == ['A1', 'A2'] and list(target) == ['A1', 'A2', 'A3']
+
+
+def test_parse_usn_range_rejects_reversed_ranges():
+    with pytest.raises(ValueError):
+        parse_usn_range({'prefix': 'X', 'start': 5, 'end': 1, 'subjectCode': 'A'})
+    assert list(UsnSequence(parse_usn_range({'prefix': ' 1xx21cs', 'start': 1, 'end': 4, 'skip': '2, 9'}))) == ['1XX21CS001', '1XX21CS003', '1XX21CS004']
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_range_entries_answer_like_expanded_entries(client, seed):
+    """Range-encoded 'combinedStudentData' gives the same bodies as its USNs listed one by one."""
+    rng = random.Random(seed)
+    for _ in range(100):
+        subjects = rng.sample(['CS', 'EC', 'ME', 'AI', 'MA'], rng.randint(1, 4))
+        entries, students, report = [], [], {}
+        for _ in range(rng.randint(1, 6)):
+            subject = rng.choice(subjects)
+            if rng.random() < 0.6:
+                prefix = rng.choice(['1xx21cs', '1XX21EC', '1XX22'])
+                start = rng.choice([0, 1, 5, 990, 998])
+                end = start + rng.randint(0, 40)
+                skip = [rng.randint(start, end + 2) for _ in range(rng.randint(0, 4))]
+                entry = {'prefix': prefix, 'start': start, 'end': end, 'skip': rng.choice([', '.join(map(str, skip)), skip]), 'subjectCode': subject.lower()}
+                if rng.random() < 0.5:
+                    entry['name'] = 'b' + subject
+                entries.append(entry)
+                students += [{'usn': usn, 'subjectCode': subject} for usn in expanded(prefix.upper(), start, end, skip)]
+                if skip:
+                    report.setdefault((entry.get('name') or subject).upper(), sorted({format_usn(prefix.upper(), serial) for serial in skip}))
+            else:
+                usns = [{'usn': f'{rng.choice(["1XX21CS", "1XX21EC", "Z"])}{rng.randint(0, 1200):03}', 'subjectCode': subject} for _ in range(rng.randint(1, 10))]
+                entries += usns
+                students += usns
+        if not students:
+            continue
+        rooms = [{'name': f'R{i}', 'benches': rng.randint(1, 25), 'classColumns': rng.randint(1, 3)} for i in range(rng.randint(1, 5))]
+        ranged = {'roomConfigurations': rooms, 'studentsPerBench': rng.randint(1, 3),
+                  'commonPaperGroups': rng.choice(['', 'CS,EC', 'cs,ec;ai,ma']), 'combinedStudentData': entries}
+        listed = dict(ranged, combinedStudentData=students, skippedStudentsReport=report)
+        for query in ('', '?stream=1', '?format=compact'):
+            first = client.post(f'/api/generate-allotment{query}', json=ranged)
+            assert first.status_code == 200
+            assert first.data == client.post(f'/api/generate-allotment{query}', json=listed).data
+
+
+def test_ranges_past_the_cap_are_reported_not_seated(client):
+    rooms = [{'name': 'R', 'benches': 4, 'classColumns': 2}]
+    huge = {'prefix': '1XX21CS', 'start': 1, 'end': 10 ** 9}
+    subject = client.post('/api/generate-allotment', json={
+        'roomConfigurations': rooms, 'studentsPerBench': 2, 'commonPaperGroups': '',
+        'combinedStudentData': [dict(huge, subjectCode='CS'), {'prefix': '1XX21EC', 'start': 1, 'end': 4, 'subjectCode': 'EC'}]})
+    branch = client.post('/api/generate-allotment', json={
+        'roomConfigurations': rooms, 'studentsPerBench': 2,
+        'branchDetails': [dict(huge, name='CS', skip=''), {'name': 'EC', 'prefix': '1XX21EC', 'start': 1, 'end': 4, 'skip': ''}]})
+    for response in (subject, branch):
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['skipped_students']['CS'] == [f'1XX21CS001 to 1XX21CS1000000000 (over {MAX_RANGE_STUDENTS} students in ranges)']
+        seated = [usn for room in body['room_arrangements'] for column in room['arrangement_by_column']
+                  for bench in column['seating_plan'] for usn in bench['seats'] if usn != EMPTY_SEAT]
+        assert sorted(seated) == [f'1XX21EC{i:03}' for i in range(1, 5)]
@@ -0,0 +1,84 @@
+# tests/test_worker_pool.py
+
+"""Per-item outcomes when a pool worker process dies."""
+
+import os
+
+import pytest
+
+from seating_app import allotment_jobs, batch_allotment, multi_centre, worker_pool
+from seating_app.allotment_jobs import JobDispatcher, JobStore
+from seating_app.worker_pool import WORKER_LOST_MESSAGE, map_items
+
+
+def square_or_die(item):
+    if item == 'die':
+        os._exit(1)
+    return item * item
+
+
+def test_a_dead_worker_loses_only_its_items(monkeypatch):
+    monkeypatch.setenv('WORKER_PROCESSES', '2')
+    worker_pool.discard_pool()
+    try:
+        outcomes = map_items(square_or_die, [1, 2, 'die', 3], lambda item: ('lost', item))
+        assert ('lost', 'die') in outcomes
+        assert all(outcome == ('lost', item) or outcome == item * item for item, outcome in zip([1, 2, 'die', 3], outcomes))
+        # The broken pool was discarded: the next call gets a fresh one.
+        assert map_items(square_or_die, [4, 5], None) == [16, 25]
+    finally:
+        worker_pool.discard_pool()
+
+
+class ShutDownPool:
+    def submit(self, *args):
+        raise RuntimeError('cannot schedule new futures after shutdown')
+
+
+def test_a_job_the_pool_refuses_is_queued_again(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    job_id = store.submit('{}')
+    refused = ShutDownPool()
+    discarded = []
+    monkeypatch.setattr(allotment_jobs, 'get_pool', lambda: refused)
+    monkeypatch.setattr(allotment_jobs, 'discard_pool', discarded.append)
+    dispatcher = JobDispatcher(store)
+    dispatcher.dispatch()
+    assert store.status(job_id)['state'] == 'queued'
+    assert dispatcher.in_flight == set() and discarded == [refused]
+
+
+def lose_every_second(function, items, lost):
+    return [lost(item) if index % 2 else function(item) for index, item in enumerate(items)]
+
+
+@pytest.fixture
+def flaky_pool(monkeypatch):
+    monkeypatch.setattr(batch_allotment, 'map_items', lose_every_second)
+    monkeypatch.setattr(multi_centre, 'map_items', lose_every_second)
+
+
+def test_batch_keeps_the_sessions_that_finished(client, flaky_pool):
+    students = [{'usn': f'1XX{i:03}', 'subjectCode': 'AB'[i % 2]} for i in range(10)]
+    response = client.post('/api/generate-allotment-batch', json={
+        'roomConfigurations': [{'name': 'R1', 'benches': 10, 'classColumns': 2}], 'studentsPerBench': 2,
+        'sessions': [{'sessionId': session_id, 'combinedStudentData': students} for session_id in ('am', 'pm', 'eve')]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['status'] == 'partial'
+    assert sorted(body['results']) == ['am', 'eve']
+    assert body['errors'] == {'pm': WORKER_LOST_MESSAGE}
+
+
+def test_centres_report_the_centre_whose_worker_died(client, flaky_pool):
+    rooms = [{'name': f'{centre}{i}', 'benches': 10, 'classColumns': 2, 'centre': centre} for centre in 'NS' for i in range(2)]
+    students = [{'usn': f'1XX{i:03}', 'subjectCode': 'AB'[i % 2]} for i in range(40)]
+    response = client.post('/api/generate-allotment-centres', json={
+        'roomConfigurations': rooms, 'studentsPerBench': 2, 'combinedStudentData': students})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['status'] == 'partial' and body['errors'] == {'S': WORKER_LOST_MESSAGE}
+    assert {room['centre'] for room in body['room_arrangements']} == {'N'}
+    summaries = {summary['centre']: summary for summary in body['centres']}
+    assert summaries['S']['error'] == WORKER_LOST_MESSAGE and summaries['S']['unseated_students'] == 20
+    assert 'error' not in summaries['N']